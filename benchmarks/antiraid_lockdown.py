@@ -0,0 +1,63 @@
+# Time-to-lockdown benchmark for /antiraid against a mocked channel set.
+# Run from the repo root: python -m benchmarks.antiraid_lockdown [channels] [latency_ms]
+
+import asyncio
+import sys
+import time
+from util.fanout import fan_out
+
+SLOWMODE = 5
+
+
+class MockChannel:
+    """Stands in for a TextChannel; every REST call costs `latency` seconds."""
+
+    def __init__(self, channel_id: int, latency: float):
+        self.id = channel_id
+        self.latency = latency
+        self.slowmode_delay = 0
+        self.messages = 0
+
+    async def send(self, **kwargs):
+        await asyncio.sleep(self.latency)
+        self.messages += 1
+
+    async def edit(self, slowmode_delay: int):
+        await asyncio.sleep(self.latency)
+        self.slowmode_delay = slowmode_delay
+
+
+async def sequential(channels):
+    for channel in channels:
+        await channel.send(embed=None)
+        await channel.edit(slowmode_delay=SLOWMODE)
+
+
+async def concurrent(channels, concurrency):
+    buckets = {
+        c.id: [lambda c=c: c.send(embed=None), lambda c=c: c.edit(slowmode_delay=SLOWMODE)]
+        for c in channels
+    }
+    return await fan_out(buckets, concurrency=concurrency)
+
+
+async def main(count: int, latency_ms: float):
+    latency = latency_ms / 1000
+    print(f"{count} channels, {latency_ms:.0f}ms per request")
+
+    channels = [MockChannel(i, latency) for i in range(count)]
+    started = time.perf_counter()
+    await sequential(channels)
+    print(f"  sequential       {time.perf_counter() - started:7.2f}s")
+
+    for concurrency in (5, 10, 25):
+        channels = [MockChannel(i, latency) for i in range(count)]
+        result = await concurrent(channels, concurrency)
+        assert all(c.slowmode_delay == SLOWMODE for c in channels)
+        print(f"  fan-out (x{concurrency:<2})    {result.elapsed:7.2f}s")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 300
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 120
+    asyncio.run(main(count, latency_ms))
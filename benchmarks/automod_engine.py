@@ -0,0 +1,48 @@
+# Messages-per-second benchmark for the local AutoMod engine.
+# Run from the repo root: python -m benchmarks.automod_engine [messages]
+
+import json
+import random
+import sys
+import time
+from util.automod_engine import compile_preset
+
+PRESET_FILE = "data/ampres.json"
+
+WORDS = (
+    "hey what's up anyone want to play later lol that was such a good match "
+    "check this out gg nice one brb dinner see you tomorrow ok sure why not"
+).split()
+SPICE = ["https://c.tenor.com/abc.gif", "discord.gg/invite123", "example.com", "retard", "kys", "🎉🎉🎉🎉🎉🎉🎉🎉"]
+
+
+def make_messages(count: int) -> list:
+    rng = random.Random(42)
+    messages = []
+    for _ in range(count):
+        words = rng.choices(WORDS, k=rng.randint(3, 30))
+        if rng.random() < 0.1:
+            words.insert(rng.randrange(len(words) + 1), rng.choice(SPICE))
+        messages.append(" ".join(words))
+    return messages
+
+
+def main(count: int):
+    with open(PRESET_FILE, "r", encoding="utf-8") as f:
+        presets = json.load(f)
+    messages = make_messages(count)
+    print(f"{count} messages, avg {sum(map(len, messages)) / count:.0f} chars")
+
+    for name, preset in presets.items():
+        started = time.perf_counter()
+        compiled = compile_preset(preset)
+        compile_ms = (time.perf_counter() - started) * 1000
+
+        started = time.perf_counter()
+        blocked = sum(1 for message in messages if compiled.scan(message))
+        elapsed = time.perf_counter() - started
+        print(f"  {name:<32} {count / elapsed:>10,.0f} msg/s   compile {compile_ms:5.1f}ms   blocked {blocked}")
+
+
+if __name__ == "__main__":
+    main(int(sys.argv[1]) if len(sys.argv) > 1 else 20000)
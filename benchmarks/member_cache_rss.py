@@ -0,0 +1,94 @@
+# Resident memory per 10k cached members under different cache policies.
+# Run from the repo root: python -m benchmarks.member_cache_rss [guilds] [members_per_guild]
+#
+# Each policy runs in a fresh interpreter: discord.py's real ConnectionState
+# builds guilds from GUILD_CREATE payloads, and the RSS growth is measured.
+# "lazy" is what the gateway sends for an unchunked large guild (just the bot),
+# which is where guilds stay until ensure_chunked() is called for them.
+
+import gc
+import os
+import subprocess
+import sys
+import time
+import discord
+import psutil
+from util.cache_policy import build_client_kwargs, load_policy
+
+BOT_ID = 1
+POLICIES = ("all", "declared", "lazy")
+
+
+def member_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id), "username": f"user{user_id}", "global_name": f"User {user_id}",
+                 "discriminator": "0", "avatar": "a" * 32, "bot": user_id == BOT_ID},
+        "roles": [], "joined_at": "2024-01-01T00:00:00+00:00", "deaf": False, "mute": False, "nick": None, "flags": 0,
+    }
+
+
+def presence_payload(user_id: int) -> dict:
+    return {
+        "user": {"id": str(user_id)}, "status": "online", "client_status": {"desktop": "online"},
+        "activities": [{"name": "Some Game", "type": 0, "created_at": 0}],
+    }
+
+
+def guild_payload(guild_id: int, members: int, first_user: int, full: bool, presences: bool) -> dict:
+    ids = [BOT_ID] + (list(range(first_user, first_user + members - 1)) if full else [])
+    return {
+        "id": str(guild_id), "name": f"guild {guild_id}", "owner_id": str(first_user), "member_count": members,
+        "roles": [], "channels": [], "emojis": [], "stickers": [], "features": [], "large": True,
+        "members": [member_payload(i) for i in ids],
+        "presences": [presence_payload(i) for i in ids] if presences else [],
+    }
+
+
+def client_for(policy: str) -> discord.Client:
+    kwargs = build_client_kwargs([f"cogs.{f[:-3]}" for f in os.listdir("cogs") if f.endswith(".py")], load_policy())
+    if policy == "all":
+        kwargs = {"intents": discord.Intents.all()}
+    return discord.Client(**kwargs)
+
+
+def measure(policy: str, guilds: int, members: int):
+    client = client_for(policy)
+    state = client._connection
+    state.user = discord.ClientUser(state=state, data=member_payload(BOT_ID)["user"])
+    full = policy != "lazy"
+    presences = policy == "all"
+    # Payloads are built first and kept alive, so only the cached objects are counted
+    payloads = [guild_payload(g, members, 10_000 + g * members, full, presences) for g in range(1, guilds + 1)]
+    process = psutil.Process()
+    gc.collect()
+    before = process.memory_info().rss
+    started = time.perf_counter()
+    built = [discord.Guild(data=payload, state=state) for payload in payloads]
+    elapsed = time.perf_counter() - started
+    gc.collect()
+    grown = process.memory_info().rss - before
+    cached = sum(len(guild.members) for guild in built)
+    print(f"{grown} {elapsed} {cached}")
+
+
+def main(guilds: int, members: int):
+    total = guilds * members
+    print(f"{guilds} guilds x {members} members ({total} members total)")
+    for policy in POLICIES:
+        out = subprocess.run(
+            [sys.executable, "-m", "benchmarks.member_cache_rss", "--child", policy, str(guilds), str(members)],
+            capture_output=True, text=True, check=True,
+        ).stdout.split()
+        grown, elapsed, cached = int(out[0]), float(out[1]), int(out[2])
+        per_10k = grown / total * 10_000 / 2 ** 20
+        print(f"  {policy:<9} cached {cached:>8}   RSS +{grown / 2 ** 20:8.1f} MiB   "
+              f"{per_10k:6.2f} MiB / 10k members   build {elapsed * 1000:7.1f}ms")
+
+
+if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == "--child":
+        measure(sys.argv[2], int(sys.argv[3]), int(sys.argv[4]))
+    else:
+        guilds = int(sys.argv[1]) if len(sys.argv) > 1 else 20
+        members = int(sys.argv[2]) if len(sys.argv) > 2 else 5000
+        main(guilds, members)
@@ -0,0 +1,93 @@
+# Mod-log throughput: one send per action vs the batched dispatcher.
+# Run from the repo root: python -m benchmarks.modlog_dispatch [actions] [latency_ms]
+
+import asyncio
+import sys
+import time
+import discord
+from util.modlog import ModLogDispatcher
+
+CHANNEL_ID = 1
+
+
+class MockChannel:
+    """Stands in for the mod-log TextChannel; each send costs `latency` seconds, one at a time."""
+
+    def __init__(self, latency: float):
+        self.latency = latency
+        self.guild = self
+        self.me = None
+        self.messages = 0
+        self.embeds = 0
+        self._bucket = asyncio.Lock()  # one rate-limit bucket per channel
+
+    def permissions_for(self, member):
+        return discord.Permissions(send_messages=True)
+
+    async def send(self, embed=None, embeds=None):
+        async with self._bucket:
+            await asyncio.sleep(self.latency)
+        self.messages += 1
+        self.embeds += len(embeds) if embeds else 1
+
+
+class MockBot:
+    def __init__(self, channel):
+        self.channel = channel
+
+    def get_channel(self, channel_id):
+        return self.channel
+
+
+class MockDB:
+    def get_log_channel(self, guild_id):
+        return CHANNEL_ID
+
+    def get_log_webhook(self, guild_id):
+        return None
+
+
+def make_embed(i: int) -> discord.Embed:
+    return discord.Embed(title="⚠️ User Warned", description=f"**User:** <@{i}>\n**Reason:** spam\n**Timestamp:** <t:0:F>")
+
+
+async def inline(count: int, latency: float):
+    channel = MockChannel(latency)
+    started = time.perf_counter()
+    # Each command awaited its own send before responding
+    await asyncio.gather(*(channel.send(embed=make_embed(i)) for i in range(count)))
+    return time.perf_counter() - started, channel, None
+
+
+async def batched(count: int, latency: float, linger: float):
+    channel = MockChannel(latency)
+    dispatcher = ModLogDispatcher(MockBot(channel), linger=linger, db=MockDB())
+    guild = discord.Object(id=1)
+    started = time.perf_counter()
+    for i in range(count):
+        dispatcher.submit(guild, make_embed(i))
+    submitted = time.perf_counter() - started
+    await dispatcher.flush()
+    return time.perf_counter() - started, channel, (dispatcher, submitted)
+
+
+async def main(count: int, latency_ms: float):
+    latency = latency_ms / 1000
+    print(f"{count} mod-log actions, {latency_ms:.0f}ms per send")
+
+    elapsed, channel, _ = await inline(count, latency)
+    print(f"  one send per action   {elapsed:7.2f}s  {channel.messages:4d} messages")
+
+    for linger in (0.25, 1.0):
+        elapsed, channel, (dispatcher, submitted) = await batched(count, latency, linger)
+        assert channel.embeds == count
+        hist = dispatcher.flush_latency
+        print(f"  dispatcher (linger {linger:.2f}s) {elapsed:5.2f}s  {channel.messages:4d} messages"
+              f"  submit {submitted * 1000:5.1f}ms  flush p50/p99 {hist.percentile(0.5) * 1000:.0f}/{hist.percentile(0.99) * 1000:.0f}ms"
+              f"  peak depth {dispatcher.stats['max_depth']}")
+
+
+if __name__ == "__main__":
+    count = int(sys.argv[1]) if len(sys.argv) > 1 else 200
+    latency_ms = float(sys.argv[2]) if len(sys.argv) > 2 else 150
+    asyncio.run(main(count, latency_ms))
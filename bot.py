@@ -2,48 +2,72 @@
 # ──────────────────────────────────────────────
 # Terminal-only version styled like Watch_Dogs 2
 
+import time
+PROCESS_START = time.perf_counter()
+
 import discord
 import os
 import asyncio
+import logging
 from discord.ext import commands, tasks
 from dotenv import load_dotenv
-from colorama import Fore, Style, init
-from datetime import datetime
+from colorama import init
+from util.json_store import flush_all
+from util.instrumentation import InstrumentedBot
+from util.loop_watchdog import watchdog
+from util.startup import load_extensions, waterfall
+from util.command_sync import get_sync_manager
+from util.cluster import get_cluster
+from util.command_checks import share_config_changes
+from util.cache_policy import build_client_kwargs, describe
+from util.logs import setup_logging, SUCCESS
 
 init(autoreset=True)
 
 # ──────────────────────────────────────────────
 # Load environment
 load_dotenv()
+setup_logging()
 TOKEN = os.getenv("TOKEN")
+# Set by launcher.py in cluster mode; a plain `python bot.py` runs one shard
+SHARD_COUNT = int(os.getenv("SHARD_COUNT", "1"))
+SHARD_IDS = [int(i) for i in os.getenv("SHARD_IDS", "").split(",") if i.strip()] or None
 
 # ──────────────────────────────────────────────
 # Bot setup
-intents = discord.Intents.all()
-intents.members = True
-client = commands.AutoShardedBot(command_prefix="n!", shard_count=1, intents=intents)
+# Intents come from what the cogs declare; caches follow data/cache_policy.json
+EXTENSIONS = sorted(f"cogs.{filename[:-3]}" for filename in os.listdir("cogs") if filename.endswith(".py"))
+
+class Nari(InstrumentedBot, commands.AutoShardedBot):
+    pass
+
+client = Nari(command_prefix="n!", shard_count=SHARD_COUNT, shard_ids=SHARD_IDS, **build_client_kwargs(EXTENSIONS))
+get_cluster(client)
+share_config_changes(client)
 client.remove_command("help")
 
 # ──────────────────────────────────────────────
 # Terminal Style Helpers
-def terminal_banner():
-    print(f"""{Fore.MAGENTA}{Style.BRIGHT}
+BANNER = """
 ╔════════════════════════════════════════════════╗
 ║               NARI SYSTEM v0.7                 ║
-╚════════════════════════════════════════════════╝
-    """)
+╚════════════════════════════════════════════════╝"""
+
+def terminal_banner():
+    log(BANNER)
+
+# Console styling lives in util.logs.TerminalFormatter; records go through the log queue
+logger = logging.getLogger("nari")
+LOG_LEVELS = {
+    "info": logging.INFO,
+    "success": SUCCESS,
+    "warn": logging.WARNING,
+    "error": logging.ERROR,
+    "critical": logging.CRITICAL,
+}
 
 def log(msg: str, level: str = "info"):
-    time = datetime.now().strftime("%H:%M:%S")
-    levels = {
-        "info": Fore.CYAN + "[INFO]",
-        "success": Fore.GREEN + "[SUCCESS]",
-        "warn": Fore.YELLOW + "[WARN]",
-        "error": Fore.RED + "[ERROR]",
-        "critical": Fore.MAGENTA + "[CRITICAL]",
-    }
-    tag = levels.get(level, Fore.WHITE + "[LOG]")
-    print(f"{Fore.BLACK}[{time}]{Style.RESET_ALL} {tag} {Fore.WHITE}{msg}{Style.RESET_ALL}")
+    logger.log(LOG_LEVELS.get(level, logging.INFO), msg)
 
 # ──────────────────────────────────────────────
 # Status messages
@@ -55,7 +79,7 @@ status_messages = [
 @tasks.loop(seconds=10)
 async def update_status_loop():
     try:
-        guild_count = len(client.guilds)
+        guild_count = sum(await client.cluster.query("guild_count"))
         latency = round(client.latency * 1000)
         latency_message = "📡 | Ping: 999+ms" if latency > 999 else f"📡 | Ping: {latency}ms"
         all_statuses = status_messages + [latency_message]
@@ -73,13 +97,23 @@ async def update_status_loop():
 async def on_ready():
     terminal_banner()
     log(f"System online as {client.user} ({client.user.id})", "success")
+    if not getattr(client, "ready_logged", False):
+        client.ready_logged = True
+        log(f"Ready {time.perf_counter() - PROCESS_START:.2f}s after launch.", "info")
     log(f"Connected to {len(client.guilds)} guilds.", "info")
-
-    try:
-        synced = await client.tree.sync()
-        log(f"Slash commands synced: {len(synced)}", "success")
-    except Exception as e:
-        log(f"Command sync failed: {e}", "error")
+    if client.cluster.clustered:
+        log(f"Cluster {client.cluster.cluster_id + 1}/{client.cluster.cluster_count} · shards {SHARD_IDS}", "info")
+
+    # Commands are global; only one cluster needs to upload them
+    if client.cluster.is_primary:
+        try:
+            synced = await get_sync_manager(client).sync_global()
+            if synced is None:
+                log("Slash commands unchanged, sync skipped.", "info")
+            else:
+                log(f"Slash commands synced: {len(synced)}", "success")
+        except Exception as e:
+            log(f"Command sync failed: {e}", "error")
 
     if not update_status_loop.is_running():
         update_status_loop.start()
@@ -87,36 +121,31 @@ async def on_ready():
 # ──────────────────────────────────────────────
 # Cog loader
 async def load_cogs():
-    loaded = []
-    failed = []
-
-    for filename in os.listdir("cogs"):
-        if filename.endswith(".py"):
-            name = filename[:-3]
-            try:
-                await client.load_extension(f"cogs.{name}")
-                loaded.append(filename)
-            except Exception as e:
-                failed.append((filename, str(e)))
+    started = time.perf_counter()
+    timings = await load_extensions(client, EXTENSIONS)
+    loaded = [t for t in timings if t.error is None]
+    failed = [t for t in timings if t.error is not None]
 
     if loaded:
-        log("Loaded cogs:", "success")
-        for file in loaded:
-            print(Fore.GREEN + f"   → {file}")
+        rows = "\n".join(f"   {row}" for row in waterfall(timings))
+        log(f"Loaded {len(loaded)} cogs in {(time.perf_counter() - started) * 1000:.0f}ms "
+            f"({time.perf_counter() - PROCESS_START:.2f}s since launch):\n{rows}", "success")
     if failed:
-        log("Failed to load cogs:", "error")
-        for file, error in failed:
-            print(Fore.RED + f"   → {file}: {error}")
+        rows = "\n".join(f"   → {t.name}: {t.error}" for t in failed)
+        log(f"Failed to load cogs:\n{rows}", "error")
 
 # ──────────────────────────────────────────────
 # Main entry
 async def main():
+    watchdog.start()
+    client.cluster.start()
     try:
         await load_cogs()
     except Exception as e:
         log(f"Critical error loading cogs: {e}", "critical")
 
     try:
+        log(describe(client), "info")
         log("Starting Nari client...", "info")
         await client.start(TOKEN)
     except KeyboardInterrupt:
@@ -124,6 +153,10 @@ async def main():
         await client.close()
     except Exception as e:
         log(f"Failed to start bot: {e}", "critical")
+    finally:
+        watchdog.stop()
+        await flush_all()
+        log("Pending data flushed to disk.", "info")
 
 if __name__ == "__main__":
     asyncio.run(main())
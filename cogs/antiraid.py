@@ -1,12 +1,30 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-from datetime import timedelta
+from util.fanout import fan_out, ProgressReporter
+from util.raid_enforcer import RaidEnforcer
+
+INTENTS = ("guild_messages",)  # lockdown enforcement reads new messages
+
+LOCKDOWN_SLOWMODE = 5
+LOCKDOWN_CONCURRENCY = 10
 
 class AntiRaid(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
         self.antiraid_enabled = {}  # guild_id: bool
+        self.enforcer = RaidEnforcer(is_active=lambda guild_id: self.antiraid_enabled.get(guild_id, False))
+
+    def cog_unload(self):
+        self.enforcer.stop()
+
+    # === Reload handoff ===
+    def export_state(self):
+        return {"antiraid_enabled": self.antiraid_enabled, "timed_out": self.enforcer.timed_out}
+
+    def import_state(self, state):
+        self.antiraid_enabled = state["antiraid_enabled"]
+        self.enforcer.timed_out = state["timed_out"]
 
     def is_admin():
         async def predicate(interaction: discord.Interaction):
@@ -28,9 +46,27 @@ class AntiRaid(commands.Cog):
             app_commands.Choice(name="Off", value="off")
         ]
     )
-    @app_commands.describe(reason="Optional reason for the lockdown (only when enabling)")
+    @app_commands.choices(
+        notice=[
+            app_commands.Choice(name="Every channel", value="all"),
+            app_commands.Choice(name="This channel only", value="here"),
+            app_commands.Choice(name="No notice", value="none")
+        ]
+    )
+    @app_commands.describe(
+        reason="Optional reason for the lockdown (only when enabling)",
+        notice="Where to post the lockdown notice (slowmode still applies everywhere)",
+        notice_channel="Post the notice only in this channel"
+    )
     @is_admin()
-    async def antiraid(self, interaction: discord.Interaction, state: app_commands.Choice[str], reason: str = None):
+    async def antiraid(
+        self,
+        interaction: discord.Interaction,
+        state: app_commands.Choice[str],
+        reason: str = None,
+        notice: app_commands.Choice[str] = None,
+        notice_channel: discord.TextChannel = None
+    ):
         guild = interaction.guild
         guild_id = guild.id
 
@@ -60,14 +96,11 @@ class AntiRaid(commands.Cog):
             lockdown_embed.set_footer(text="Admins may still talk freely.")
 
             # Send lockdown message & enable slowmode
-            for channel in guild.text_channels:
-                try:
-                    if channel.permissions_for(guild.me).send_messages:
-                        await channel.send(embed=lockdown_embed)
-                    if channel.permissions_for(guild.me).manage_channels:
-                        await channel.edit(slowmode_delay=5)
-                except Exception:
-                    continue
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            notice_targets = self.notice_targets(interaction, notice, notice_channel)
+            result = await self.lockdown_fan_out(
+                interaction, LOCKDOWN_SLOWMODE, lockdown_embed, notice_targets, notice_first=True
+            )
 
             confirm = discord.Embed(
                 title="✅ Anti-Raid Enabled",
@@ -76,7 +109,8 @@ class AntiRaid(commands.Cog):
             )
             if reason:
                 confirm.add_field(name="Reason", value=reason, inline=False)
-            await interaction.response.send_message(embed=confirm, ephemeral=True, delete_after=18000)
+            self.add_result_field(confirm, result)
+            await interaction.edit_original_response(content=None, embed=confirm)
 
         # ===========================
         # DISABLE LOCKDOWN
@@ -92,6 +126,7 @@ class AntiRaid(commands.Cog):
                 return
 
             self.antiraid_enabled[guild_id] = False
+            self.enforcer.forget_guild(guild_id)
 
             unlock_embed = discord.Embed(
                 title="✅ Lockdown Lifted",
@@ -99,21 +134,63 @@ class AntiRaid(commands.Cog):
                 color=discord.Color.green()
             )
 
-            for channel in guild.text_channels:
-                try:
-                    if channel.permissions_for(guild.me).manage_channels:
-                        await channel.edit(slowmode_delay=0)
-                    if channel.permissions_for(guild.me).send_messages:
-                        await channel.send(embed=unlock_embed)
-                except Exception:
-                    continue
+            await interaction.response.defer(ephemeral=True, thinking=True)
+            notice_targets = self.notice_targets(interaction, notice, notice_channel)
+            result = await self.lockdown_fan_out(
+                interaction, 0, unlock_embed, notice_targets, notice_first=False
+            )
 
             confirm = discord.Embed(
                 title="✅ Anti-Raid Disabled",
                 description="Lockdown mode has been **deactivated**.",
                 color=discord.Color.green()
             )
-            await interaction.response.send_message(embed=confirm, ephemeral=True, delete_after=30)
+            self.add_result_field(confirm, result)
+            await interaction.edit_original_response(content=None, embed=confirm)
+
+    # ===========================
+    # LOCKDOWN FAN-OUT
+    # ===========================
+    def notice_targets(self, interaction: discord.Interaction, notice, notice_channel):
+        """Channel IDs that should receive the notice, or None for every channel."""
+        if notice_channel is not None:
+            return {notice_channel.id}
+        choice = notice.value if notice else "all"
+        if choice == "here":
+            return {interaction.channel_id}
+        if choice == "none":
+            return set()
+        return None
+
+    async def lockdown_fan_out(self, interaction, slowmode: int, embed, notice_targets, notice_first: bool):
+        """Apply slowmode and post the notice across all text channels, one rate-limit bucket per channel."""
+        guild = interaction.guild
+        buckets = {}
+        for channel in guild.text_channels:
+            perms = channel.permissions_for(guild.me)
+            calls = []
+            if perms.manage_channels and channel.slowmode_delay != slowmode:
+                calls.append(lambda c=channel: c.edit(slowmode_delay=slowmode))
+            if perms.send_messages and (notice_targets is None or channel.id in notice_targets):
+                send = lambda c=channel: c.send(embed=embed)
+                if notice_first:
+                    calls.insert(0, send)
+                else:
+                    calls.append(send)
+            if calls:
+                buckets[channel.id] = calls
+
+        async def show_progress(done, total):
+            await interaction.edit_original_response(content=f"⏳ Updating channels… **{done}/{total}**")
+
+        return await fan_out(buckets, concurrency=LOCKDOWN_CONCURRENCY, on_progress=ProgressReporter(show_progress))
+
+    def add_result_field(self, embed: discord.Embed, result):
+        value = f"Updated **{result.succeeded}/{result.total}** channels in **{result.elapsed:.1f}s**."
+        if result.failed:
+            failed = ", ".join(f"<#{channel_id}>" for channel_id in list(result.failed)[:10])
+            value += f"\n⚠️ Failed: {failed}"
+        embed.add_field(name="Channels", value=value, inline=False)
 
     # ===========================
     # MESSAGE ENFORCEMENT
@@ -132,29 +209,19 @@ class AntiRaid(commands.Cog):
         if message.author.guild_permissions.administrator:
             return
 
-        try:
-            await message.delete()
-            await message.author.timeout(
-                timedelta(hours=1),
-                reason="Spoke during Anti-Raid lockdown."
-            )
+        # Deletes, timeouts and DMs are batched by the enforcer
+        self.enforcer.submit(message)
 
-            # Optional DM notice to user
-            try:
-                dm_embed = discord.Embed(
-                    title="🚨 Lockdown Violation",
-                    description=f"You attempted to send a message in **{message.guild.name}** while the server was under lockdown.\n"
-                                "You have been **timed out for 1 hour**.",
-                    color=discord.Color.red()
-                )
-                await message.author.send(embed=dm_embed, delete_after=30)
-            except Exception:
-                pass
-
-        except discord.Forbidden:
-            pass  # Bot missing perms
-        except Exception:
-            pass
+    @app_commands.command(name="antiraid_stats", description="Show anti-raid enforcement throughput and queue pressure.")
+    @is_admin()
+    async def antiraid_stats(self, interaction: discord.Interaction):
+        stats = self.enforcer.stats()
+        embed = discord.Embed(title="📊 Anti-Raid Enforcement", color=discord.Color.orange())
+        embed.add_field(name="Queue", value=f"Depth: `{stats['depth']}`\nPeak: `{stats['max_depth']}`\nDropped: `{stats['dropped']}`", inline=True)
+        embed.add_field(name="Actions", value=f"Deleted: `{stats['deleted']}` in `{stats['bulk_calls']}` calls\nTimeouts: `{stats['timeouts']}` (deduped `{stats['deduped']}`)", inline=True)
+        embed.add_field(name="DMs", value=f"Sent: `{stats['dm_sent']}`\nSkipped: `{stats['dm_skipped']}`", inline=True)
+        embed.add_field(name="Last Batch", value=f"`{stats['last_batch_size']}` messages in `{stats['last_batch_seconds']}s`", inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(AntiRaid(bot))
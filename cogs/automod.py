@@ -1,3 +1,4 @@
+import logging
 import discord
 from discord import app_commands
 from discord.ext import commands, tasks
@@ -6,10 +7,33 @@ import hashlib
 import re
 from util.command_checks import command_enabled
 from util.automod import (
-    hash_preset, get_temp_data, load_json, save_json, apply_automod_rule
+    hash_preset, get_temp_data, load_json, apply_automod_rule,
+    sync_automod_rule, rollout_presets
 )
+from util.automod_engine import timed_scan
+from util.json_store import get_db_store
+
+log = logging.getLogger(__name__)
+
+PRESET_FILE = "data/ampres.json"
+_presets = None
+
+
+def get_applied():
+    """
+    Per-guild preset settings; one in-memory copy shared by the commands and the rollout task.
+    Each guild is its own row in SQLite and only the cluster that owns the guild changes it.
+    """
+    return get_db_store("applied_presets")
+
+
+def get_presets():
+    """ampres.json, read on first use instead of at import."""
+    global _presets
+    if _presets is None:
+        _presets = load_json(PRESET_FILE)
+    return _presets
 
-Presets = load_json("data/ampres.json")
 ID_EXTRACTOR = re.compile(r"<@&?(\d+)>|(\d+)")
 
 # --- Modal Inputs ---
@@ -60,7 +84,7 @@ class AutoModPresetSelector(discord.ui.Select):
     def __init__(self):
         options = [
             discord.SelectOption(label=name, description=data.get("description", "No description"))
-            for name, data in Presets.items()
+            for name, data in get_presets().items()
         ]
         super().__init__(placeholder="Choose a security level...", options=options)
 
@@ -68,7 +92,7 @@ class AutoModPresetSelector(discord.ui.Select):
         data = get_temp_data(interaction.client, interaction.user.id)
         selected = self.values[0]
         data["preset"] = selected
-        data["config"] = Presets.get(selected, {})
+        data["config"] = get_presets().get(selected, {})
         await interaction.response.send_message(f"✅ Preset **{selected}** selected!", ephemeral=True)
 
 class ExemptSelector(discord.ui.Select):
@@ -110,7 +134,7 @@ class SaveConfigButton(discord.ui.Button):
         roles = data.get("exempt_roles", [])
         channels = data.get("exempt_channels", [])
 
-        await apply_automod_rule(interaction.guild, self.log_channel, rule_data, roles, channels)
+        rule = await apply_automod_rule(interaction.guild, self.log_channel, rule_data, roles, channels)
 
         embed = discord.Embed(title="✅ AutoMod Settings Applied",
                               description=f"Using **{data.get('preset')}** preset.",
@@ -127,9 +151,14 @@ class SaveConfigButton(discord.ui.Button):
 
         await interaction.followup.send(embed=embed)
 
-        applied = load_json("data/applied_presets.json")
-        applied[str(interaction.guild.id)] = {"preset": data.get("preset"), "hash": hash_preset(rule_data)}
-        save_json("data/applied_presets.json", applied)
+        applied = get_applied()
+        applied.data[str(interaction.guild.id)] = {
+            "preset": data.get("preset"),
+            "hash": hash_preset(rule_data),
+            "rule_id": rule.id,
+            "log_channel_id": self.log_channel.id,
+        }
+        applied.mark_dirty(str(interaction.guild.id))
 
 # --- View ---
 
@@ -164,32 +193,17 @@ class AutoModManager(commands.Cog):
     async def update_presets_task(self):
         await self.bot.wait_until_ready()
         try:
-            applied = load_json("data/applied_presets.json")
-            current = load_json("data/ampres.json")
+            current = load_json(PRESET_FILE)
         except Exception as e:
-            print(f"Error reading preset files: {e}")
+            log.error("Error reading preset files: %s", e)
             return
 
-        for guild in self.bot.guilds:
-            data = applied.get(str(guild.id))
-            if not data:
-                continue
-            preset_name = data.get("preset")
-            current_data = current.get(preset_name)
-            if not current_data:
-                continue
-
-            new_hash = hash_preset(current_data)
-            if new_hash != data.get("hash"):
-                try:
-                    await guild.owner.send(
-                        f"🔄 AutoMod preset '{preset_name}' has changed and was auto-updated on {guild.name}."
-                    )
-                    applied[str(guild.id)]["hash"] = new_hash
-                except Exception as e:
-                    print(f"Failed to DM owner of {guild.name}: {e}")
-
-        save_json("data/applied_presets.json", applied)
+        # Results are written onto the live entries as each guild finishes, so
+        # /setup, /force_update or /clear_config during a rollout aren't undone
+        applied = get_applied()
+        summary = await rollout_presets(self.bot, applied.data, current, on_done=applied.mark_dirty)
+        if summary:
+            log.info("Preset rollout: %s", ", ".join(f"{k}={v}" for k, v in sorted(summary.items())))
 
     # Setup command with modal-enabled UI
     @app_commands.command(name="setup", description="Interactively set up AutoMod for your server.")
@@ -207,34 +221,44 @@ class AutoModManager(commands.Cog):
     @app_commands.checks.has_permissions(manage_guild=True)
     @command_enabled()
     async def force_update(self, interaction: discord.Interaction):
+        guild = interaction.guild
+        applied = get_applied()
+        current = load_json(PRESET_FILE)
+
+        settings = applied.data.get(str(guild.id))
+        if not settings:
+            await interaction.response.send_message("❌ No preset applied yet.", ephemeral=True)
+            return
+
+        preset_name = settings["preset"]
+        rule_data = current.get(preset_name)
+        if not rule_data:
+            await interaction.response.send_message(f"❌ Preset **{preset_name}** no longer exists.", ephemeral=True)
+            return
+
+        await interaction.response.defer(ephemeral=True)
+        settings.setdefault("log_channel_id", interaction.channel.id)
         try:
-            guild = interaction.guild
-            applied = load_json("data/applied_presets.json")
-            current = load_json("data/ampres.json")
-
-            settings = applied.get(str(guild.id))
-            if not settings:
-                await interaction.response.send_message("❌ No preset applied yet.", ephemeral=True)
-                return
-
-            preset_name = settings["preset"]
-            rule_data = current.get(preset_name)
-            await apply_automod_rule(guild, interaction.channel, rule_data, [], [])
-
-            settings["hash"] = hash_preset(rule_data)
-            save_json("data/applied_presets.json", applied)
-            await interaction.response.send_message(f"✅ AutoMod preset **{preset_name}** manually updated!", ephemeral=True)
+            status = await sync_automod_rule(guild, settings, rule_data, reason="AutoMod manual update")
         except Exception as e:
-            await interaction.response.send_message(f"❌ Error: {e}", ephemeral=True)
+            await interaction.followup.send(f"❌ Error: {e}", ephemeral=True)
+            return
+
+        settings["hash"] = hash_preset(rule_data)
+        settings["last_status"] = status
+        applied.mark_dirty(str(guild.id))
+        if status == "unchanged":
+            await interaction.followup.send(f"✅ AutoMod preset **{preset_name}** is already up to date.", ephemeral=True)
+        else:
+            await interaction.followup.send(f"✅ AutoMod preset **{preset_name}** manually {status}!", ephemeral=True)
 
     # New command: show current AutoMod config summary
     @app_commands.command(name="show_config", description="Show current AutoMod configuration for this server.")
     @app_commands.checks.has_permissions(manage_guild=True)
     @command_enabled()
     async def show_config(self, interaction: discord.Interaction):
-        applied = load_json("data/applied_presets.json")
-        current = load_json("data/ampres.json")
-        data = applied.get(str(interaction.guild.id))
+        current = load_json(PRESET_FILE)
+        data = get_applied().data.get(str(interaction.guild.id))
 
         if not data:
             await interaction.response.send_message("❌ No AutoMod configuration found for this server.", ephemeral=True)
@@ -295,17 +319,64 @@ class AutoModManager(commands.Cog):
             inline=True
         )
 
+        if data.get("last_sync"):
+            status = data.get("last_status", "unknown")
+            if data.get("last_error"):
+                status += f" ({data['last_error']})"
+            embed.set_footer(text=f"Last preset sync: {data['last_sync'][:16].replace('T', ' ')} UTC — {status}")
+
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    # Dry-run a preset locally against sample text
+    @app_commands.command(name="automod_test", description="Test an AutoMod preset against sample text without sending it.")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    @command_enabled()
+    @app_commands.describe(text="The message to test", preset="Preset to test against (defaults to this server's preset)")
+    async def automod_test(self, interaction: discord.Interaction, text: str, preset: str = None):
+        if preset is None:
+            preset = get_applied().data.get(str(interaction.guild.id), {}).get("preset")
+        rule_data = get_presets().get(preset) if preset else None
+        if not rule_data:
+            await interaction.response.send_message(
+                f"❌ Unknown preset. Choose one of: {', '.join(f'`{name}`' for name in get_presets())}", ephemeral=True
+            )
+            return
+
+        hits, compiled, elapsed_us = timed_scan(rule_data, text)
+        embed = discord.Embed(
+            title="🚫 Would be blocked" if hits else "✅ Would be allowed",
+            description=f"Preset: **{preset}**",
+            color=discord.Color.red() if hits else discord.Color.green()
+        )
+        if hits:
+            lines = [f"`{hit.text[:40]}` — {hit.kind} `{hit.pattern[:60]}`" for hit in hits[:10]]
+            if len(hits) > 10:
+                lines.append(f"…and {len(hits) - 10} more")
+            embed.add_field(name="Matches", value="\n".join(lines), inline=False)
+        if compiled.skipped:
+            embed.add_field(
+                name="⚠️ Not evaluated locally",
+                value="\n".join(f"`{pattern[:80]}`" for pattern in compiled.skipped),
+                inline=False
+            )
+        embed.set_footer(text=f"Scanned in {elapsed_us:.0f}µs")
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
+    @automod_test.autocomplete("preset")
+    async def automod_test_preset(self, interaction: discord.Interaction, current: str):
+        return [
+            app_commands.Choice(name=name, value=name)
+            for name in get_presets() if current.lower() in name.lower()
+        ][:25]
+
     # New command: clear current AutoMod config for the guild
     @app_commands.command(name="clear_config", description="Clear the current AutoMod configuration.")
     @app_commands.checks.has_permissions(manage_guild=True)
     @command_enabled()
     async def clear_config(self, interaction: discord.Interaction):
-        applied = load_json("data/applied_presets.json")
-        if str(interaction.guild.id) in applied:
-            del applied[str(interaction.guild.id)]
-            save_json("data/applied_presets.json", applied)
+        applied = get_applied()
+        if applied.data.pop(str(interaction.guild.id), None) is not None:
+            applied.mark_dirty(str(interaction.guild.id))
             await interaction.response.send_message("✅ AutoMod configuration cleared for this server.", ephemeral=True)
         else:
             await interaction.response.send_message("❌ No AutoMod configuration found to clear.", ephemeral=True)
@@ -1,47 +1,58 @@
 import discord
-import traceback
+import asyncio
 import logging
-import requests
 import sys
-import os
 from discord import app_commands, Interaction
 from discord.ext import commands
-from colorama import Fore, Style, init
 from dotenv import load_dotenv
+from util.instrumentation import metrics
+from util.error_reporter import get_reporter
 
 load_dotenv()
-WEBHOOK_URL = os.getenv('WEBHOOK')
-# Initialize colorama for colored terminal output
-init(autoreset=True)
+DEV_ROLE_ID = 1435135698146426890
+
+log = logging.getLogger(__name__)
+
+
+def _is_sampled(count: int) -> bool:
+    """Print repeats of a known error at 2, 4, 8, ... occurrences only."""
+    return count & (count - 1) == 0
+
 
 class ERROR(commands.Cog):
     def __init__(self, bot: commands.Bot, error_channel_id: int):
         self.bot = bot
         self.error_channel_id = error_channel_id
+        self.reporter = get_reporter()
+        self._previous_tree_error = self.bot.tree.on_error
+        self._previous_loop_handler = None
 
         # Assign global slash command error handler
         self.bot.tree.on_error = self.global_app_command_error
 
-        # Setup logging
-        logging.basicConfig(
-            level=logging.INFO,
-            format="%(asctime)s [%(levelname)s] %(message)s",
-            datefmt="%Y-%m-%d %H:%M:%S",
-            handlers=[
-                logging.FileHandler("bot_errors.log", encoding="utf-8"),
-                logging.StreamHandler(sys.__stdout__)  # use original stdout
-            ]
-        )
-
         # Global exception hook
         sys.excepthook = self.handle_uncaught_exception
 
+    async def cog_load(self):
+        self.reporter.start()
+        # Exceptions nobody awaited (background tasks, callbacks) and listener errors
+        loop = asyncio.get_running_loop()
+        self._previous_loop_handler = loop.get_exception_handler()
+        loop.set_exception_handler(self.handle_loop_exception)
+        self.bot.on_error = self.on_event_error
+
+    async def cog_unload(self):
+        self.bot.tree.on_error = self._previous_tree_error
+        asyncio.get_running_loop().set_exception_handler(self._previous_loop_handler)
+        self.bot.__dict__.pop("on_error", None)
+        sys.excepthook = sys.__excepthook__
+        await self.reporter.close()
+
     async def global_app_command_error(self, interaction: Interaction, error: Exception):
         """
         Handles errors from slash commands (app_commands).
         """
-        error_type = type(error).__name__
-        trace = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+        metrics.interaction_finished(interaction, failed=True)
 
         # ✅ User-friendly messages
         if isinstance(error, app_commands.CommandOnCooldown):
@@ -71,49 +82,85 @@ class ERROR(commands.Cog):
         except discord.HTTPException:
             pass
 
-        # 🖨️ Pretty error printout in console
+        # Expected failures (cooldowns, permissions, checks) aren't bugs
+        if isinstance(error, app_commands.CheckFailure):
+            return
+
+        # 🖨️ Counted and queued for the webhook; full trace in the log only the first time
         user = interaction.user
         command = interaction.command.name if interaction.command else "Unknown"
         guild = interaction.guild.name if interaction.guild else "DMs"
+        original = getattr(error, "original", error)
+        entry = self.reporter.record(original, context=f"/{command} · {guild}")
 
-        formatted_error = (
-            f"\n{Fore.RED}{Style.BRIGHT}[SLASH ERROR] {Fore.YELLOW}{error_type}\n"
-            f"{Fore.CYAN}Command: {Fore.WHITE}/{command}\n"
-            f"{Fore.CYAN}User: {Fore.WHITE}{user} ({user.id})\n"
-            f"{Fore.CYAN}Guild: {Fore.WHITE}{guild}\n"
-            f"{Fore.MAGENTA}Traceback:\n{Fore.WHITE}{trace}"
-        )
+        if entry["count"] == 1:
+            log.error(
+                "Slash error %s (%s) in /%s by %s (%s) in %s\n%s",
+                entry["type"], entry["fingerprint"], command, user, user.id, guild, entry["trace"],
+            )
+        elif _is_sampled(entry["count"]):
+            log.error("Slash error %s (%s) in /%s ×%d", entry["type"], entry["fingerprint"], command, entry["count"])
 
-        print(formatted_error)
-        logging.error(f"[SLASH ERROR] {error_type} in /{command}\n{trace}")
+    async def on_event_error(self, event_method: str, *args, **kwargs):
+        error = sys.exc_info()[1]
+        if error is None:
+            return
+        entry = self.reporter.record(error, context=f"event {event_method}")
+        if entry["count"] == 1:
+            log.error("Event error %s (%s) in %s\n%s", entry["type"], entry["fingerprint"], event_method, entry["trace"])
+        elif _is_sampled(entry["count"]):
+            log.error("Event error %s (%s) in %s ×%d", entry["type"], entry["fingerprint"], event_method, entry["count"])
+
+    def handle_loop_exception(self, loop, context: dict):
+        error = context.get("exception")
+        if error is None:
+            return loop.default_exception_handler(context)
+        entry = self.reporter.record(error, context=context.get("message"))
+        # Let the previous handler print the first one; repeats are only counted
+        if entry["count"] == 1:
+            if self._previous_loop_handler is not None:
+                self._previous_loop_handler(loop, context)
+            else:
+                loop.default_exception_handler(context)
 
     def handle_uncaught_exception(self, exctype, value, tb):
         if exctype is KeyboardInterrupt:
-            print(f"{Fore.YELLOW}[!] KeyboardInterrupt detected. Exiting gracefully.")
+            log.warning("KeyboardInterrupt detected. Exiting gracefully.")
             return
 
-        trace = "".join(traceback.format_exception(exctype, value, tb))
-        formatted_trace = (
-            f"\n{Fore.RED}{Style.BRIGHT}[CRITICAL ERROR] {Fore.YELLOW}{exctype.__name__}\n"
-            f"{Fore.MAGENTA}Traceback:\n{Fore.WHITE}{trace}"
-        )
-
-        print(formatted_trace)
-        logging.critical(f"Uncaught Exception:\n{trace}")
-        self.send_to_webhook(f"**[CRITICAL ERROR]** `{exctype.__name__}`\n```py\n{trace[:1900]}\n```")
-        
-    def send_to_webhook(self, message: str):
-        #Sends formatted message to Discord webhook.
-        payload = {
-            "content": message,
-            "username": "Melli Console",
-            "avatar_url": "https://www.setra.com/hubfs/Sajni/crc_error.jpg"
-        }
-        try:
-            response = requests.post(WEBHOOK_URL, json=payload)
-            response.raise_for_status()
-        except requests.exceptions.RequestException as e:
-            logging.error(f"Failed to send log to webhook: {e}")
+        entry = self.reporter.record(value.with_traceback(tb), context="uncaught (process exiting)")
+        log.critical("Uncaught %s (%s)\n%s", exctype.__name__, entry["fingerprint"], entry["trace"])
+        # The loop is gone by now, so report and save the index synchronously
+        self.reporter.flush_sync()
+
+    async def _is_dev(self, interaction: discord.Interaction):
+        if DEV_ROLE_ID == 0:
+            return True
+        return any(role.id == DEV_ROLE_ID for role in getattr(interaction.user, "roles", []))
+
+    @app_commands.command(name="errors", description="Search recorded errors (developers only).")
+    @app_commands.describe(query="Fingerprint, exception type, command or text from the traceback")
+    async def errors(self, interaction: discord.Interaction, query: str = None):
+        if not await self._is_dev(interaction):
+            return await interaction.response.send_message("You are not authorized to run this command.", ephemeral=True)
+
+        found = self.reporter.search(query, limit=10)
+        embed = discord.Embed(title="🧯 Recorded Errors", color=discord.Color.red())
+        if len(found) == 1:
+            entry = found[0]
+            embed.description = f"**{entry['type']}**: {entry['message']}\n```py\n{entry['trace'][-1500:]}\n```"
+            embed.add_field(name="Seen", value=f"`{entry['count']}`× · first <t:{int(entry['first_seen'])}:R> · last <t:{int(entry['last_seen'])}:R>", inline=False)
+            embed.add_field(name="Context", value=entry.get("last_context") or entry.get("context") or "—", inline=False)
+        else:
+            lines = [
+                f"`{entry['fingerprint']}` **{entry['type']}** ×{entry['count']} · {entry.get('context') or '—'} · <t:{int(entry['last_seen'])}:R>"
+                for entry in found
+            ]
+            embed.description = "\n".join(lines) or "Nothing recorded."
+        stats = self.reporter.stats
+        embed.set_footer(text=f"{len(self.reporter.index.data)} groups · {stats['recorded']} recorded · {stats['posts']} webhook posts · {stats['rate_limited']} rate limited")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
 
 async def setup(bot: commands.Bot):
     await bot.add_cog(ERROR(bot, error_channel_id=1431065718920839170))
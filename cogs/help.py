@@ -27,7 +27,8 @@ class HelpCommand(commands.Cog):
                     "• `/kick <user> [reason]` — Kick a member.\n"
                     "• `/ban <user> [reason]` — Ban a member.\n"
                     "• `/unban <user>` — Unban a previously banned user.\n"
-                    "• `/setlogs <channel_id>` — Set Nari’s moderation logs channel."
+                    "• `/setlogs <channel_id> [webhook]` — Set Nari’s moderation logs channel.\n"
+                    "• `/warnretention <days>` — Set how long warnings are kept (0 = forever)."
                 ),
                 inline=False
             )
@@ -1,13 +1,18 @@
+import logging
 import discord
-import json
-import aiofiles
-import os
-import re
+import asyncio
+import time
 from discord.ext import commands, tasks
-from datetime import datetime, timedelta, timezone
+from util.database import get_db
+from util.modlog import get_modlog
 
-WARN_FILE = "data/warns.json"
-LOG_FILE = "data/modlogs.json"
+log = logging.getLogger(__name__)
+
+EXPIRY_BATCH = 500
+EXPIRY_MAX_SLEEP = 3600  # re-check at least hourly even if nothing is due
+EXPIRY_HOLD = 600        # retry interval for guilds that are unavailable (outage)
+EXPIRY_ERROR_BACKOFF = 60
+SUMMARY_MAX_USERS = 25
 
 
 class Helpers(commands.Cog):
@@ -15,118 +20,114 @@ class Helpers(commands.Cog):
 
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.warnings = self.load_json_sync(WARN_FILE)
-        self.log_channels = self.load_json_sync(LOG_FILE)
-        self.auto_warn_cleanup.start()
-
-    # === JSON Handling ===
-
-    def load_json_sync(self, path: str) -> dict:
-        """Load a JSON file synchronously with safe defaults."""
-        os.makedirs(os.path.dirname(path), exist_ok=True)
-        if not os.path.exists(path):
-            with open(path, "w", encoding="utf-8") as f:
-                json.dump({}, f)
-            return {}
-
-        try:
-            with open(path, "r", encoding="utf-8") as file:
-                return json.load(file)
-        except (json.JSONDecodeError, FileNotFoundError):
-            return {}
-
-    async def save_json(self, path: str, data: dict):
-        """Save data to JSON asynchronously."""
-        async with aiofiles.open(path, "w", encoding="utf-8") as f:
-            await f.write(json.dumps(data, indent=4, ensure_ascii=False))
+        self.db = get_db()
+        self.modlog = get_modlog(bot)
+        self._wake = asyncio.Event()
+        self._held = {}  # guild_id -> when to try its expired warnings again
+        self.warn_expiry.start()
 
     # === Logging Helpers ===
 
-    async def send_mod_log(self, guild: discord.Guild, embed: discord.Embed):
-        """Send an embed to the guild’s mod log channel if configured."""
-        channel_id = self.log_channels.get(str(guild.id))
-        if not channel_id:
-            return
-
-        channel = guild.get_channel(channel_id)
-        if channel and channel.permissions_for(guild.me).send_messages:
-            await channel.send(embed=embed)
+    def expiry_summary(self, guild_id: int, warns: list) -> discord.Embed:
+        """One embed listing every member whose warnings expired in this run."""
+        per_user = {}
+        for warn in warns:
+            per_user[warn["user_id"]] = per_user.get(warn["user_id"], 0) + 1
+
+        lines = [f"<@{user_id}> (`{user_id}`) — `{count}` warning(s)"
+                 for user_id, count in list(per_user.items())[:SUMMARY_MAX_USERS]]
+        if len(per_user) > SUMMARY_MAX_USERS:
+            lines.append(f"…and `{len(per_user) - SUMMARY_MAX_USERS}` more member(s)")
+
+        days = self.db.get_warn_retention(guild_id)
+        embed = discord.Embed(
+            title="🗑️ Warnings Expired",
+            description="\n".join(lines),
+            color=discord.Color.orange(),
+        )
+        embed.add_field(name="Removed", value=f"`{len(warns)}` warning(s) from `{len(per_user)}` member(s)", inline=True)
+        embed.add_field(name="Retention", value=f"`{days}` days", inline=True)
+        embed.add_field(name="Time", value=f"<t:{int(discord.utils.utcnow().timestamp())}:F>", inline=False)
+        return embed
 
     # === Background Task ===
 
-    @tasks.loop(hours=24)
-    async def auto_warn_cleanup(self):
-        """Runs every 24 hours to remove warnings older than 30 days."""
-        print("[AutoWarnDel] Running daily cleanup task...")
-
-        month_ago = datetime.now(timezone.utc) - timedelta(days=30)
-        removed_count = 0
-
-        for guild_id, members in list(self.warnings.items()):
-            guild = self.bot.get_guild(int(guild_id))
-            if not guild:
-                continue
-
-            for member_id, warns in list(members.items()):
-                valid_warns = []
-
-                for warn in warns:
-                    try:
-                        raw_time = warn["timestamp"].replace("Z", "+00:00")
-
-                        # Fix non-padded months/days (e.g. 2024-1-9 → 2024-01-09)
-                        if re.match(r"^\d{4}-\d{1,2}-\d{1,2}T", raw_time):
-                            parts = raw_time.split("T")
-                            date_parts = parts[0].split("-")
-                            if len(date_parts) == 3:
-                                year, month, day = date_parts
-                                raw_time = f"{int(year):04d}-{int(month):02d}-{int(day):02d}T{parts[1]}"
-
-                        warn_time = datetime.fromisoformat(raw_time)
-                        if warn_time.tzinfo is None:
-                            warn_time = warn_time.replace(tzinfo=timezone.utc)
-
-                        if warn_time > month_ago:
-                            valid_warns.append(warn)
-
-                    except (KeyError, ValueError):
-                        # If timestamp invalid or missing, keep it (safe fallback)
-                        valid_warns.append(warn)
-
-                if len(valid_warns) < len(warns):
-                    diff = len(warns) - len(valid_warns)
-                    removed_count += diff
-                    self.warnings[guild_id][member_id] = valid_warns
-
-                    member = guild.get_member(int(member_id))
-                    if member:
-                        embed = discord.Embed(
-                            title="🗑️ Warning Auto-Deleted",
-                            description=(
-                                f"**User:** {member.mention} (`{member.id}`)\n"
-                                f"**Reason:** Warning expired (30+ days old)\n"
-                                f"**Removed:** `{diff}` warning(s)\n"
-                                f"**Time:** <t:{int(discord.utils.utcnow().timestamp())}:F>"
-                            ),
-                            color=discord.Color.orange(),
-                        )
-                        embed.set_thumbnail(url=member.display_avatar.url)
-                        await self.send_mod_log(guild, embed)
-
-        if removed_count > 0:
-            await self.save_json(WARN_FILE, self.warnings)
-            print(f"[AutoWarnDel] Removed {removed_count} expired warnings.")
-        else:
-            print("[AutoWarnDel] No expired warnings found.")
-
-    @auto_warn_cleanup.before_loop
+    def wake_expiry(self):
+        """Re-check the next due warning now, e.g. after a guild shortened its retention."""
+        self._wake.set()
+
+    def _shards(self) -> dict:
+        return {"shard_count": self.bot.shard_count or 1, "shard_ids": self.bot.shard_ids}
+
+    def _deletable(self, guild_id: int) -> bool:
+        """Hold warnings of guilds in an outage so they're logged later; anything else can go now."""
+        guild = self.bot.get_guild(guild_id)
+        if guild is None or not guild.unavailable:
+            return True  # a guild we left has nowhere to log to, so its warnings go silently
+        if guild_id not in self._held:
+            log.info("Guild %s is unavailable; holding its expired warnings for %ds.", guild_id, EXPIRY_HOLD)
+        self._held[guild_id] = time.time() + EXPIRY_HOLD
+        return False
+
+    @commands.Cog.listener()
+    async def on_guild_available(self, guild: discord.Guild):
+        if self._held.pop(guild.id, None) is not None:
+            self.wake_expiry()
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        if self._held.pop(guild.id, None) is not None:
+            self.wake_expiry()
+
+    @tasks.loop(seconds=0)
+    async def warn_expiry(self):
+        """Delete warnings as they fall due, then sleep until the next one."""
+        self._wake.clear()
+        try:
+            delay = self._expire_due()
+        except Exception:
+            log.exception("Warning expiry failed; retrying in %ds.", EXPIRY_ERROR_BACKOFF)
+            delay = EXPIRY_ERROR_BACKOFF
+        if delay <= 0:
+            return  # more are due; go again straight away
+        try:
+            await asyncio.wait_for(self._wake.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+    def _expire_due(self) -> float:
+        """Expire one batch; returns how long to sleep before the next."""
+        now = time.time()
+        self._held = {guild_id: retry for guild_id, retry in self._held.items() if retry > now}
+        expired = self.db.pop_expired_warnings(
+            now, EXPIRY_BATCH, **self._shards(), exclude_guilds=tuple(self._held), keep=self._deletable
+        )
+        if expired:
+            by_guild = {}
+            for warn in expired:
+                by_guild.setdefault(warn["guild_id"], []).append(warn)
+            for guild_id, warns in by_guild.items():
+                guild = self.bot.get_guild(guild_id)
+                if guild is not None:
+                    self.modlog.submit(guild, self.expiry_summary(guild_id, warns))
+            log.info("Removed %d expired warnings across %d guild(s).", len(expired), len(by_guild))
+            if len(expired) == EXPIRY_BATCH:
+                return 0
+
+        next_due = self.db.next_warning_expiry(**self._shards(), exclude_guilds=tuple(self._held))
+        delay = EXPIRY_MAX_SLEEP if next_due is None else max(0, next_due - time.time())
+        if self._held:
+            delay = min(delay, min(self._held.values()) - time.time())
+        return min(EXPIRY_MAX_SLEEP, delay)
+
+    @warn_expiry.before_loop
     async def before_cleanup(self):
         """Wait until the bot is ready before starting the task."""
         await self.bot.wait_until_ready()
 
     def cog_unload(self):
         """Ensure background task stops when cog unloads."""
-        self.auto_warn_cleanup.cancel()
+        self.warn_expiry.cancel()
 
 
 async def setup(bot: commands.Bot):
@@ -1,14 +1,111 @@
+import logging
 import discord
 import aiohttp
+import asyncio
+import json
+import os
+import random
+from collections import deque
 from discord.ext import commands
 from discord import app_commands
 
+log = logging.getLogger(__name__)
+
 ANIME_API = "https://nekos.best/api/v2"
+LOCAL_GIFS_FILE = "data/interactions.json"
+ENDPOINTS = ["kiss", "hug", "pat", "cuddle", "poke", "blush", "highfive", "slap"]
+PREFETCH_SIZE = 6       # GIFs kept ready per endpoint
+FETCH_TIMEOUT = 2.5     # seconds to wait on the API before using a local GIF
+FETCH_ERRORS = (asyncio.TimeoutError, aiohttp.ClientError, aiohttp.ContentTypeError, ValueError)
+
+
+class GifPool:
+    """Per-endpoint buffers of GIF URLs, refilled in the background over one shared session."""
+
+    def __init__(self, session: aiohttp.ClientSession, fallback: dict, base_url: str = ANIME_API, size: int = PREFETCH_SIZE):
+        self.session = session
+        self.fallback = fallback
+        self.base_url = base_url
+        self.size = size
+        self.buffers = {}
+        self.refills = {}
+        self.served = {"buffer": 0, "api": 0, "local": 0, "none": 0}
+
+    async def fetch(self, endpoint: str, amount: int = 1) -> list:
+        async with self.session.get(f"{self.base_url}/{endpoint}", params={"amount": amount}) as resp:
+            if resp.status != 200:
+                return []
+            data = await resp.json()
+            if not isinstance(data, dict):
+                return []
+            return [result["url"] for result in data.get("results", []) if result.get("url")]
+
+    async def get(self, endpoint: str, fallback_key: str = None):
+        buffer = self.buffers.setdefault(endpoint, deque())
+        url, source = None, "none"
+        if buffer:
+            url, source = buffer.popleft(), "buffer"
+        else:
+            # One request serves this caller and refills the buffer; callers that
+            # arrive meanwhile wait on the same request. On timeout it keeps
+            # running in the background and the caller gets a local GIF.
+            task = self.refill(endpoint, extra=1)
+            if task is not None:
+                try:
+                    await asyncio.wait_for(asyncio.shield(task), timeout=FETCH_TIMEOUT)
+                except asyncio.TimeoutError:
+                    pass
+            if buffer:
+                url, source = buffer.popleft(), "api"
+            else:
+                local = self.fallback.get(endpoint) or self.fallback.get(fallback_key) or []
+                if local:
+                    url, source = random.choice(local), "local"
+
+        self.served[source] += 1
+        self.refill(endpoint)
+        return url
+
+    def refill(self, endpoint: str, extra: int = 0):
+        """Top the endpoint's buffer back up; returns the running refill, if any."""
+        task = self.refills.get(endpoint)
+        if task and not task.done():
+            return task
+        if len(self.buffers.setdefault(endpoint, deque())) >= self.size + extra:
+            return None
+        task = self.refills[endpoint] = asyncio.create_task(self._refill(endpoint, extra))
+        return task
+
+    async def _refill(self, endpoint: str, extra: int = 0):
+        buffer = self.buffers[endpoint]
+        missing = self.size + extra - len(buffer)
+        if missing <= 0:
+            return
+        try:
+            buffer.extend(await self.fetch(endpoint, missing))
+        except FETCH_ERRORS as e:
+            log.warning("Prefetch for %s failed: %s", endpoint, e)
+
+    def close(self):
+        for task in self.refills.values():
+            task.cancel()
+        self.refills.clear()
+
+
+def load_local_gifs() -> dict:
+    if not os.path.exists(LOCAL_GIFS_FILE):
+        return {}
+    try:
+        with open(LOCAL_GIFS_FILE, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError):
+        return {}
+
 
 class ReplyButton(discord.ui.View):
-    def __init__(self, bot, action_name, endpoint, author, target):
+    def __init__(self, cog, action_name, endpoint, author, target):
         super().__init__(timeout=300)  # 5 minutes
-        self.bot = bot
+        self.cog = cog
         self.action_name = action_name
         self.endpoint = endpoint
         self.author = author
@@ -20,7 +117,7 @@ class ReplyButton(discord.ui.View):
         if interaction.user.id != self.target.id:
             return await interaction.response.send_message("❌ Only the mentioned user can reply back!", ephemeral=True)
 
-        gif = await self.fetch_gif(self.endpoint)
+        gif = await self.cog.fetch_gif(self.endpoint, self.action_name)
         if not gif:
             return await interaction.response.send_message("⚠️ Couldn't fetch a GIF right now.", ephemeral=True)
 
@@ -33,32 +130,46 @@ class ReplyButton(discord.ui.View):
         await interaction.response.send_message(embed=embed)
         self.stop()
 
-    async def fetch_gif(self, endpoint):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ANIME_API}/{endpoint}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data["results"][0]["url"]
-                return None
-
 
 class Social(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.session = None
+        self.gifs = None
+
+    async def cog_load(self):
+        self.session = aiohttp.ClientSession(
+            timeout=aiohttp.ClientTimeout(total=10),
+            connector=aiohttp.TCPConnector(limit=20, ttl_dns_cache=300)
+        )
+        self.gifs = GifPool(self.session, load_local_gifs())
+        for endpoint in ENDPOINTS:
+            self.gifs.refill(endpoint)
+
+    async def cog_unload(self):
+        if self.gifs:
+            self.gifs.close()
+        if self.session:
+            await self.session.close()
+
+    # === Reload handoff ===
+    def export_state(self):
+        return {"buffers": self.gifs.buffers, "served": self.gifs.served}
+
+    def import_state(self, state):
+        # Keep the prefetched URLs; the new pool's refills top them up
+        for endpoint, urls in state["buffers"].items():
+            self.gifs.buffers.setdefault(endpoint, deque()).extendleft(reversed(urls))
+        self.gifs.served = state["served"]
 
-    async def fetch_gif(self, endpoint):
-        async with aiohttp.ClientSession() as session:
-            async with session.get(f"{ANIME_API}/{endpoint}") as resp:
-                if resp.status == 200:
-                    data = await resp.json()
-                    return data["results"][0]["url"]
-                return None
+    async def fetch_gif(self, endpoint, action=None):
+        return await self.gifs.get(endpoint, fallback_key=action)
 
     async def send_interaction(self, interaction, target, action, endpoint, description):
         # Detect self-target
         if target == interaction.user:
             # Fetch gif normally
-            gif = await self.fetch_gif(endpoint)
+            gif = await self.fetch_gif(endpoint, action)
             if not gif:
                 return await interaction.response.send_message("⚠️ Couldn't fetch a GIF right now.", ephemeral=True)
 
@@ -84,7 +195,7 @@ class Social(commands.Cog):
             return await interaction.response.send_message(embed=embed)
 
         # ————— Normal interaction for two users ————— #
-        gif = await self.fetch_gif(endpoint)
+        gif = await self.fetch_gif(endpoint, action)
         if not gif:
             return await interaction.response.send_message("⚠️ Couldn't fetch a GIF right now.", ephemeral=True)
 
@@ -92,7 +203,7 @@ class Social(commands.Cog):
         embed.set_image(url=gif)
         embed.set_footer(text=f"Requested by {interaction.user}", icon_url=interaction.user.display_avatar.url)
 
-        view = ReplyButton(self.bot, action, endpoint, interaction.user, target)
+        view = ReplyButton(self, action, endpoint, interaction.user, target)
         await interaction.response.send_message(embed=embed, view=view)
 
 
@@ -1,16 +1,24 @@
 # royale.py
-import discord, random, asyncio, json, os
+import discord, random, asyncio, json, logging, os
 from discord.ext import commands, tasks
 from discord import app_commands
-from datetime import datetime, timedelta
+from datetime import timedelta
 from util.command_checks import command_enabled
 from util.booster_cooldown import BoosterCooldownManager
+from util.database import get_db
+from util.deathlog import DeathLog
+from util.target_sampler import TargetSampler
+from util.royale_players import get_player_repo
+from util.cache_policy import ensure_chunked
+
+log = logging.getLogger(__name__)
+
+# Random targeting samples the member list; activity comes from messages
+INTENTS = ("members", "guild_messages")
 
 # === Configuration ===
 CONFIG_FILE = "data/royale_config.json"
-STATS_FILE = "data/royal_stats.json"
 WEAPON_FILE = "data/weapons.json"
-DEATHLOG_FILE = "data/deathlog.json"
 
 # === Default Config Template ===
 DEFAULT_CONFIG = {
@@ -18,122 +26,70 @@ DEFAULT_CONFIG = {
     "revive_cooldown": 600
 }
 
-# Load or create config
-if not os.path.exists(CONFIG_FILE):
-    os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(DEFAULT_CONFIG, f, indent=4)
+COOLDOWN_FALLBACKS = {"knockout": 900, "revive": 600}
+
+_config = None
+_cooldowns = {}
+
 
-with open(CONFIG_FILE, "r") as f:
-    config = json.load(f)
+# Config and cooldowns are loaded on first use, not at import
+def get_config():
+    global _config
+    if _config is None:
+        if not os.path.exists(CONFIG_FILE):
+            os.makedirs(os.path.dirname(CONFIG_FILE), exist_ok=True)
+            with open(CONFIG_FILE, "w") as f:
+                json.dump(DEFAULT_CONFIG, f, indent=4)
+        with open(CONFIG_FILE, "r") as f:
+            _config = json.load(f)
+    return _config
 
-# Cooldowns
-cooldown_knockout = BoosterCooldownManager(rate=1, per=config.get("knockout_cooldown", 900), bucket_type="user")
-cooldown_revive = BoosterCooldownManager(rate=1, per=config.get("revive_cooldown", 600), bucket_type="user")
+
+def get_cooldown(kind: str) -> BoosterCooldownManager:
+    manager = _cooldowns.get(kind)
+    if manager is None:
+        per = get_config().get(f"{kind}_cooldown", COOLDOWN_FALLBACKS[kind])
+        manager = _cooldowns[kind] = BoosterCooldownManager(rate=1, per=per, bucket_type="user", persist_as=kind)
+    return manager
 
 
 class Royale(commands.Cog):
     """⚔️ Knockout Royale — weaponized chaos & resurrection"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.stats = self.load_stats()
+        self.players = get_player_repo(bot)
         self.weapons = self.load_weapons()
-        self.deathlog = self.load_deathlog()
+        self.deathlog = DeathLog(get_db())
+        self.targets = TargetSampler()
+        self._reviving = set()  # (guild_id, member_id) with a revive in flight
         self.cleanup_task.start()
 
-    # === File Handling ===
-    def load_stats(self):
-        os.makedirs(os.path.dirname(STATS_FILE), exist_ok=True)
-        if not os.path.exists(STATS_FILE):
-            with open(STATS_FILE, "w") as f: json.dump({}, f)
-        with open(STATS_FILE, "r") as f:
-            return json.load(f)
+    async def cog_unload(self):
+        self.cleanup_task.cancel()
+
+    # === Reload handoff ===
+    # The deathlog and cooldowns live in SQLite; only the target index is in memory
+    def export_state(self):
+        return {"targets": self.targets}
 
-    def save_stats(self):
-        with open(STATS_FILE, "w") as f:
-            json.dump(self.stats, f, indent=4)
+    def import_state(self, state):
+        # Objects built from an older version of their util module are rebuilt instead
+        if isinstance(state["targets"], TargetSampler):
+            self.targets = state["targets"]
 
+    # === File Handling ===
     def load_weapons(self):
         if not os.path.exists(WEAPON_FILE):
             raise FileNotFoundError(f"Weapon file missing: {WEAPON_FILE}")
         with open(WEAPON_FILE, "r") as f:
             return json.load(f)
 
-    def load_deathlog(self):
-        os.makedirs(os.path.dirname(DEATHLOG_FILE), exist_ok=True)
-        if not os.path.exists(DEATHLOG_FILE):
-            with open(DEATHLOG_FILE, "w") as f: json.dump({}, f)
-        with open(DEATHLOG_FILE, "r") as f:
-            return json.load(f)
-
-    def save_deathlog(self):
-        with open(DEATHLOG_FILE, "w") as f:
-            json.dump(self.deathlog, f, indent=4)
-
-    # === Stats Management ===
-    def get_user(self, user_id: str):
-        if str(user_id) not in self.stats:
-            self.stats[str(user_id)] = {
-                "kills": 0, "deaths": 0, "revives": 0, "failed_revives": 0,
-                "xp": 0, "level": 1, "prestige": 0
-            }
-        return self.stats[str(user_id)]
-
-    def xp_needed(self, level: int):
-        return 100 + (level * 25)
-
-    def add_xp(self, user_id: str, amount: int):
-        user = self.get_user(user_id)
-        user["xp"] += amount
-        leveled_up = False
-        while user["xp"] >= self.xp_needed(user["level"]):
-            user["xp"] -= self.xp_needed(user["level"])
-            user["level"] += 1
-            if user["level"] > 15:
-                user["level"] = 15
-            leveled_up = True
-        self.save_stats()
-        return leveled_up
-
-    def add_kill(self, user_id: str):
-        self.get_user(user_id)["kills"] += 1
-        self.save_stats()
-
-    def add_death(self, user_id: str):
-        self.get_user(user_id)["deaths"] += 1
-        self.save_stats()
-
-    def add_revive(self, user_id: str, success: bool):
-        user = self.get_user(user_id)
-        if success:
-            user["revives"] += 1
-            xp_gain = random.randint(15, 30)
-            leveled_up = self.add_xp(user_id, xp_gain)
-            return xp_gain, leveled_up
-        else:
-            user["failed_revives"] += 1
-            self.save_stats()
-            return 0, False
-
     # === Background Cleanup ===
     @tasks.loop(minutes=5)
     async def cleanup_task(self):
-        removed = []
-        for guild in self.bot.guilds:
-            for user_id in list(self.deathlog.keys()):
-                try:
-                    member = guild.get_member(int(user_id))
-                    if not member:
-                        continue
-                    timeout_end = datetime.fromisoformat(self.deathlog[user_id]["timeout_end"])
-                    if member.timed_out_until is None or member.timed_out_until < discord.utils.utcnow() or timeout_end < discord.utils.utcnow():
-                        self.deathlog.pop(user_id, None)
-                        removed.append(user_id)
-                except Exception as e:
-                    print(f"[Royale] Cleanup error for {user_id}: {e}")
+        removed = self.deathlog.pop_expired()
         if removed:
-            self.save_deathlog()
-            print(f"[Royale] Cleaned {len(removed)} entries from deathlog.")
+            log.info("Cleaned %d entries from deathlog.", len(removed))
 
     # --- Safe Timeout Helper ---
     async def safe_timeout(self, member: discord.Member, until, reason, delay=1.15):
@@ -160,26 +116,56 @@ class Royale(commands.Cog):
     async def before_cleanup(self):
         await self.bot.wait_until_ready()
 
+    # === Target Index ===
+    @commands.Cog.listener()
+    async def on_member_join(self, member: discord.Member):
+        self.targets.update(member)
+
+    @commands.Cog.listener()
+    async def on_member_remove(self, member: discord.Member):
+        self.targets.remove(member)
+
+    @commands.Cog.listener()
+    async def on_member_update(self, before: discord.Member, after: discord.Member):
+        self.targets.update(after)
+
+    @commands.Cog.listener()
+    async def on_guild_remove(self, guild: discord.Guild):
+        self.targets.forget_guild(guild.id)
+
+    @commands.Cog.listener()
+    async def on_message(self, message: discord.Message):
+        self.targets.record_activity(message)
+
     @app_commands.command(name="knockout", description="Knock someone out with a random weapon!")
+    @app_commands.describe(
+        member="Who to knock out (random if empty)",
+        active_only="When picking at random, only pick people who chatted here recently"
+    )
     @command_enabled()
-    async def knockoutcmd(self, interaction: discord.Interaction, member: discord.Member = None):
+    async def knockoutcmd(self, interaction: discord.Interaction, member: discord.Member = None, active_only: bool = False):
         # Defer immediately to avoid interaction timeout (prevents 404)
         await interaction.response.defer(thinking=True, ephemeral=False)
 
-        remaining = await cooldown_knockout.get_remaining(interaction)
+        remaining = await get_cooldown("knockout").get_remaining(interaction)
         if remaining > 0:
             return await interaction.followup.send(
                 f"⏳ Slow down! Try again in **{round(remaining, 1)}s**.",
                 ephemeral=True
             )
-        await cooldown_knockout.trigger(interaction)
+        await get_cooldown("knockout").trigger(interaction)
 
         # Pick a random target if none provided
         if member is None:
-            candidates = [m for m in interaction.guild.members if not m.bot and m != interaction.user]
-            if not candidates:
+            # Both pickers resolve ids through the member cache, which starts empty
+            await ensure_chunked(self.bot, interaction.guild)
+            member = self.targets.pick(
+                interaction.guild,
+                exclude={interaction.user.id},
+                channel=interaction.channel if active_only else None
+            )
+            if member is None:
                 return await interaction.followup.send("No valid targets found.", ephemeral=True)
-            member = random.choice(candidates)
 
         # Prevent self or bot targeting
         if member == interaction.user:
@@ -227,7 +213,7 @@ class Royale(commands.Cog):
         # --- Miss outcome ---
         if outcome == "miss":
             embed.description = f"😅 {interaction.user.mention} missed {member.mention}!\n> {random.choice(weapon.get('miss_lines', ['They missed!']))}"
-            embed.set_footer(text=f"🕐 Cooldown: {config.get('knockout_cooldown', 1800)//60} min")
+            embed.set_footer(text=f"🕐 Cooldown: {get_config().get('knockout_cooldown', 1800)//60} min")
             return await interaction.followup.send(embed=embed)
 
         crit = (outcome == "crit")
@@ -259,24 +245,23 @@ class Royale(commands.Cog):
             if not ok:
                 embed.title = "🚫 Target Protected!"
                 embed.description = f"{member.mention} resisted the attack!"
-                self.add_kill(interaction.user.id)
-                self.add_death(member.id)
+                self.players.add_kill(interaction.user.id, interaction.guild_id)
+                self.players.add_death(member.id, interaction.guild_id)
                 embed.set_image(url="https://media.discordapp.net/attachments/1308048258337345609/1435509129136439428/nope-anime.gif")
-                embed.set_footer(text=f"🕐 Cooldown: {config.get('knockout_cooldown', 900)//60} min")
+                embed.set_footer(text=f"🕐 Cooldown: {get_config().get('knockout_cooldown', 900)//60} min")
                 return await interaction.followup.send(embed=embed)
 
             # record stats
             xp_gain = int(random.randint(20 if crit else 10, 35 if crit else 25) * xp_multi)
-            leveled = self.add_xp(interaction.user.id, xp_gain)
-            self.add_kill(interaction.user.id)
-            self.add_death(member.id)
-            self.deathlog[str(member.id)] = {
+            leveled = self.players.add_xp(interaction.user.id, xp_gain, interaction.guild_id)
+            self.players.add_kill(interaction.user.id, interaction.guild_id)
+            self.players.add_death(member.id, interaction.guild_id)
+            self.deathlog.add(interaction.guild_id, member.id, {
                 "by": interaction.user.id,
                 "weapon": weapon_key,
                 "timeout_end": (now + timedelta(seconds=duration)).isoformat(),
                 "crit": crit
-            }
-            self.save_deathlog()
+            })
 
             # embed
             embed.description = (
@@ -286,13 +271,13 @@ class Royale(commands.Cog):
             )
             embed.add_field(name="🏅 XP Gained", value=f"**+{xp_gain} XP**", inline=False)
             if leveled:
-                embed.add_field(name="🆙 Level Up!", value=f"{interaction.user.mention} reached **Level {self.get_user(interaction.user.id)['level']}!**", inline=False)
+                embed.add_field(name="🆙 Level Up!", value=f"{interaction.user.mention} reached **Level {self.players.get(interaction.user.id)['level']}!**", inline=False)
 
-            embed.set_footer(text=f"🕐 Cooldown: {config.get('knockout_cooldown', 900)//60} min")
+            embed.set_footer(text=f"🕐 Cooldown: {get_config().get('knockout_cooldown', 900)//60} min")
             await interaction.followup.send(embed=embed)
 
         except Exception as e:
-            print(f"[Royale] knockout error: {e}")
+            log.exception("Knockout failed: %s", e)
             try:
                 await interaction.followup.send("⚠️ Something went wrong while performing the knockout.", ephemeral=True)
             except Exception:
@@ -306,61 +291,70 @@ class Royale(commands.Cog):
     @app_commands.command(name="revive", description="Attempt to bring a timed-out user back to life!")
     @command_enabled()
     async def revivecmd(self, interaction: discord.Interaction, member: discord.Member):
-        remaining = await cooldown_revive.get_remaining(interaction)
+        remaining = await get_cooldown("revive").get_remaining(interaction)
         if remaining > 0:
             return await interaction.response.send_message(
                 f"⏳ Your healing hands need to rest! Try again in **{round(remaining,1)}s**.",
                 ephemeral=True
             )
-        await cooldown_revive.trigger(interaction)
+        await get_cooldown("revive").trigger(interaction)
 
         if member == interaction.user:
             return await interaction.response.send_message("🪞 You can't revive yourself!", ephemeral=True)
 
-        # Ensure deathlog is current
-        await self.cleanup_task()
-
-        entry = self.deathlog.get(str(member.id))
-        if not entry:
-            return await interaction.response.send_message(
-                "⚖️ Only those knocked out by the bot can be revived!", ephemeral=True
-            )
+        # One revive per target at a time, so two healers can't both bring back
+        # (and both get XP for) the same member while the first edit is in flight
+        key = (interaction.guild_id, member.id)
+        if key in self._reviving:
+            return await interaction.response.send_message("🙏 Someone is already reviving them!", ephemeral=True)
+        self._reviving.add(key)
+        try:
+            entry = self.deathlog.get(interaction.guild_id, member.id)
+            if entry and not member.is_timed_out():
+                # Timeout already ended or was lifted by hand
+                self.deathlog.remove(interaction.guild_id, member.id)
+                entry = None
+            if not entry:
+                return await interaction.response.send_message(
+                    "⚖️ Only those knocked out by the bot can be revived!", ephemeral=True
+                )
         
-        if member.timeout > 1800:
-            return await interaction.response.send_message(
-                "⏳ That user isn't ready to be revived yet!", ephemeral=True
-            )
+            if (member.timed_out_until - discord.utils.utcnow()).total_seconds() > 1800:
+                return await interaction.response.send_message(
+                    "⏳ That user isn't ready to be revived yet!", ephemeral=True
+                )
         
-        outcome = random.choices(["fail","success","miracle"], weights=[0.3,0.6,0.1])[0]
-        embed = discord.Embed(color=discord.Color.blurple())
-        embed.set_footer(text=f"🕐 Cooldown: {config.get('revive_cooldown',600)//60} min")
-
-        if outcome=="fail":
-            embed.title = "💀 Revival Failed!"
-            embed.description = f"{interaction.user.mention} tried to revive {member.mention}, but the light flickered out."
-            embed.set_image(url="https://cdn.discordapp.com/attachments/1183985896039661658/1326217477395953726/revive-fail.gif")
-            self.add_revive(interaction.user.id, success=False)
-        else:
-            embed.title = "✨ Resurrection Complete!" if outcome=="success" else "🌈 Miracle Revival!"
-            embed.description = f"{interaction.user.mention} revived {member.mention}!" if outcome=="success" else f"✨ Miracle revival! {member.mention} rises!"
-            embed.set_image(url="https://cdn.discordapp.com/attachments/1183985896039661658/1308808048030126162/love-live-static.gif")
-            try:
-                await member.edit(timed_out_until=None)
-                xp_gain, leveled = self.add_revive(interaction.user.id, success=True)
-                self.deathlog.pop(str(member.id), None)
-                self.save_deathlog()
-                if xp_gain>0:
-                    embed.add_field(name="🏅 XP Gained", value=f"**+{xp_gain} XP**", inline=False)
-                if leveled:
-                    embed.add_field(name="🆙 Level Up!", value="📈 You leveled up!", inline=False)
-            except discord.Forbidden:
-                embed.description += "\n⚠️ Missing permission."
-                self.add_revive(interaction.user.id, success=False)
-            except discord.HTTPException:
-                embed.description += "\n👻 Something went wrong."
-                self.add_revive(interaction.user.id, success=False)
-
-        await interaction.response.send_message(embed=embed)
+            outcome = random.choices(["fail","success","miracle"], weights=[0.3,0.6,0.1])[0]
+            embed = discord.Embed(color=discord.Color.blurple())
+            embed.set_footer(text=f"🕐 Cooldown: {get_config().get('revive_cooldown',600)//60} min")
+
+            if outcome=="fail":
+                embed.title = "💀 Revival Failed!"
+                embed.description = f"{interaction.user.mention} tried to revive {member.mention}, but the light flickered out."
+                embed.set_image(url="https://cdn.discordapp.com/attachments/1183985896039661658/1326217477395953726/revive-fail.gif")
+                self.players.add_revive(interaction.user.id, success=False, guild_id=interaction.guild_id)
+            else:
+                embed.title = "✨ Resurrection Complete!" if outcome=="success" else "🌈 Miracle Revival!"
+                embed.description = f"{interaction.user.mention} revived {member.mention}!" if outcome=="success" else f"✨ Miracle revival! {member.mention} rises!"
+                embed.set_image(url="https://cdn.discordapp.com/attachments/1183985896039661658/1308808048030126162/love-live-static.gif")
+                try:
+                    await member.edit(timed_out_until=None)
+                    xp_gain, leveled = self.players.add_revive(interaction.user.id, success=True, xp_gain=random.randint(15, 30), guild_id=interaction.guild_id)
+                    self.deathlog.remove(interaction.guild_id, member.id)
+                    if xp_gain>0:
+                        embed.add_field(name="🏅 XP Gained", value=f"**+{xp_gain} XP**", inline=False)
+                    if leveled:
+                        embed.add_field(name="🆙 Level Up!", value="📈 You leveled up!", inline=False)
+                except discord.Forbidden:
+                    embed.description += "\n⚠️ Missing permission."
+                    self.players.add_revive(interaction.user.id, success=False, guild_id=interaction.guild_id)
+                except discord.HTTPException:
+                    embed.description += "\n👻 Something went wrong."
+                    self.players.add_revive(interaction.user.id, success=False, guild_id=interaction.guild_id)
+
+            await interaction.response.send_message(embed=embed)
+        finally:
+            self._reviving.discard(key)
 
 
 async def setup(bot: commands.Bot):
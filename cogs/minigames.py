@@ -2,6 +2,9 @@ import discord, random, asyncio
 from discord.ext import commands
 from discord import app_commands
 
+# Trivia and guessnumber read the player's next message
+INTENTS = ("messages", "message_content")
+
 class MiniGames(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -1,57 +1,28 @@
 import discord
-import json
-import aiofiles
-import os
 from discord import app_commands
 from discord.ext import commands
 from datetime import timedelta
 from util.command_checks import command_enabled
+from util.database import get_db
+from util.modlog import get_modlog
 import asyncio
 
-WARN_FILE = 'data/warns.json'
-LOG_FILE = 'data/modlogs.json'
-
 
 class Moderation(commands.Cog):
     """🛠️ Nari's Moderation Tools"""
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.warnings = self.load_json_sync(WARN_FILE)
-        self.log_channels = self.load_json_sync(LOG_FILE)
+        self.db = get_db()
+        self.modlog = get_modlog(bot)
 
     # ───────────────────────────────────────────────
     # Utility methods
     # ───────────────────────────────────────────────
-    def load_json_sync(self, path: str):
-        if os.path.exists(path):
-            with open(path, 'r', encoding='utf-8') as file:
-                try:
-                    return json.load(file)
-                except json.JSONDecodeError:
-                    return {}
-        return {}
-
-    async def save_json(self, path: str, data: dict):
-        async with aiofiles.open(path, 'w', encoding='utf-8') as file:
-            await file.write(json.dumps(data, indent=4))
-
-    def ensure_guild_user(self, guild_id: str, user_id: str):
-        self.warnings.setdefault(guild_id, {}).setdefault(user_id, [])
-
     def build_embed(self, title: str, description: str = None, color: discord.Color = discord.Color.blurple()):
         embed = discord.Embed(title=title, description=description, color=color)
         embed.set_footer(text="Nari Moderation System")
         return embed
 
-    async def send_mod_log(self, guild: discord.Guild, embed: discord.Embed):
-        guild_id = str(guild.id)
-        if guild_id not in self.log_channels:
-            return
-        channel_id = self.log_channels[guild_id]
-        channel = guild.get_channel(channel_id)
-        if channel:
-            await channel.send(embed=embed)
-
     async def dm_user(self, member: discord.Member, embed: discord.Embed):
         try:
             await member.send(embed=embed)
@@ -87,15 +58,45 @@ class Moderation(commands.Cog):
     # Configuration command
     # ───────────────────────────────────────────────
     @app_commands.command(name="setlogs", description="Set the channel for moderation logs.")
+    @app_commands.describe(webhook="Post logs through a webhook in that channel (needs Manage Webhooks)")
     @app_commands.checks.has_permissions(manage_guild=True)
-    async def setlogs_cmd(self, interaction: discord.Interaction, channel: discord.TextChannel):
-        guild_id = str(interaction.guild.id)
-        self.log_channels[guild_id] = channel.id
-        await self.save_json(LOG_FILE, self.log_channels)
+    async def setlogs_cmd(self, interaction: discord.Interaction, channel: discord.TextChannel, webhook: bool = False):
+        old_webhook = self.db.get_log_webhook(interaction.guild.id)
+        if old_webhook:
+            try:
+                await discord.Webhook.from_url(old_webhook, client=self.bot).delete(reason="Mod-log channel changed")
+            except (discord.HTTPException, ValueError):
+                pass
+
+        webhook_url, note = None, ""
+        if webhook:
+            try:
+                created = await channel.create_webhook(name="Nari Mod Log", reason="Mod-log delivery")
+                webhook_url = created.url
+                note = "\nDelivered through a webhook."
+            except discord.HTTPException as e:
+                note = f"\n⚠️ Couldn't create a webhook, posting as the bot instead.\n`{e}`"
+        self.db.set_log_channel(interaction.guild.id, channel.id, webhook_url)
 
         embed = self.build_embed(
             "📝 Mod-Log Channel Set",
-            f"Logs will now be sent to {channel.mention}.",
+            f"Logs will now be sent to {channel.mention}.{note}",
+            discord.Color.green()
+        )
+        await self.respond_and_delete(interaction, embed=embed)
+
+    @app_commands.command(name="warnretention", description="Set how many days warnings are kept (0 = forever).")
+    @app_commands.checks.has_permissions(manage_guild=True)
+    async def warnretention_cmd(self, interaction: discord.Interaction, days: app_commands.Range[int, 0, 3650]):
+        redated = self.db.set_warn_retention(interaction.guild.id, days)
+        helpers = self.bot.get_cog("Helpers")
+        if helpers:
+            helpers.wake_expiry()  # a shorter retention may make warnings due right now
+
+        kept = "forever" if days == 0 else f"for {days} days"
+        embed = self.build_embed(
+            "🗓️ Warning Retention Updated",
+            f"Warnings are now kept {kept}.\nExisting warnings updated: `{redated}`",
             discord.Color.green()
         )
         await self.respond_and_delete(interaction, embed=embed)
@@ -106,18 +107,21 @@ class Moderation(commands.Cog):
     @app_commands.command(name="warnings", description="Check all warnings for a user.")
     @app_commands.checks.has_permissions(manage_messages=True)
     async def warnings_cmd(self, interaction: discord.Interaction, member: discord.Member):
-        guild_id, user_id = str(interaction.guild.id), str(member.id)
-        self.ensure_guild_user(guild_id, user_id)
-
-        warns = self.warnings[guild_id][user_id]
+        warns = self.db.get_warnings(interaction.guild.id, member.id)
         if not warns:
             return await self.respond_and_delete(
                 interaction,
                 embed=self.build_embed("✅ No Warnings", f"{member.mention} has no warnings.")
             )
 
+        def dates(w):
+            if w["created_at"] is None:
+                return f"**Date:** {w['timestamp'] or 'Unknown'}"
+            expiry = f"<t:{w['expires_at']}:R>" if w["expires_at"] else "Never"
+            return f"**Date:** <t:{w['created_at']}:F>\n**Expires:** {expiry}"
+
         description = "\n\n".join(
-            [f"**#{i+1}** — **Reason:** {w['reason']}\n**Moderator:** {w['moderator']}\n**Date:** <t:{int(discord.utils.parse_time(w['timestamp']).timestamp())}:F>"
+            [f"**#{i+1}** — **Reason:** {w['reason']}\n**Moderator:** {w['moderator']}\n{dates(w)}"
              for i, w in enumerate(warns)]
         )
 
@@ -127,18 +131,15 @@ class Moderation(commands.Cog):
     @app_commands.command(name="delwarn", description="Delete a specific warning from a user.")
     @app_commands.checks.has_permissions(manage_messages=True)
     async def delwarn_cmd(self, interaction: discord.Interaction, member: discord.Member, index: int):
-        guild_id, user_id = str(interaction.guild.id), str(member.id)
-        self.ensure_guild_user(guild_id, user_id)
-
-        warns = self.warnings[guild_id][user_id]
+        warns = self.db.get_warnings(interaction.guild.id, member.id)
         if not warns:
             return await self.respond_and_delete(interaction, content=f"{member.mention} has no warnings.")
 
         if index < 1 or index > len(warns):
             return await self.respond_and_delete(interaction, content=f"Invalid warning number. They have {len(warns)} warnings.")
 
-        removed = warns.pop(index - 1)
-        await self.save_json(WARN_FILE, self.warnings)
+        removed = warns[index - 1]
+        self.db.delete_warnings([removed["id"]])
 
         log_embed = self.build_embed(
             "🗑️ Warning Deleted",
@@ -149,23 +150,17 @@ class Moderation(commands.Cog):
             discord.Color.orange()
         )
         log_embed.set_thumbnail(url=member.display_avatar.url)
-        await self.send_mod_log(interaction.guild, log_embed)
+        self.modlog.submit(interaction.guild, log_embed)
 
         await self.respond_and_delete(interaction, embed=self.build_embed(f"🗑️ Removed warning #{index} from {member.display_name}.", color=discord.Color.orange()))
 
     @app_commands.command(name="clearwarns", description="Clear all warnings from a user.")
     @app_commands.checks.has_permissions(manage_messages=True)
     async def clearwarns_cmd(self, interaction: discord.Interaction, member: discord.Member):
-        guild_id, user_id = str(interaction.guild.id), str(member.id)
-        self.ensure_guild_user(guild_id, user_id)
-
-        if not self.warnings[guild_id][user_id]:
+        count = self.db.clear_warnings(interaction.guild.id, member.id)
+        if not count:
             return await self.respond_and_delete(interaction, content=f"{member.mention} has no warnings.")
 
-        count = len(self.warnings[guild_id][user_id])
-        self.warnings[guild_id][user_id] = []
-        await self.save_json(WARN_FILE, self.warnings)
-
         log_embed = self.build_embed(
             "🧹 Warnings Cleared",
             f"**User:** {member.mention} (`{member.id}`)\n"
@@ -175,7 +170,7 @@ class Moderation(commands.Cog):
             discord.Color.green()
         )
         log_embed.set_thumbnail(url=member.display_avatar.url)
-        await self.send_mod_log(interaction.guild, log_embed)
+        self.modlog.submit(interaction.guild, log_embed)
 
         await self.respond_and_delete(interaction, embed=self.build_embed(f"🧹 Cleared {count} warnings from {member.display_name}.", color=discord.Color.green()))
 
@@ -201,7 +196,7 @@ class Moderation(commands.Cog):
                 discord.Color.blue()
             )
             log_embed.set_thumbnail(url=member.display_avatar.url)
-            await self.send_mod_log(interaction.guild, log_embed)
+            self.modlog.submit(interaction.guild, log_embed)
 
             await self.respond_and_delete(interaction, embed=self.build_embed(f"🤐 {member.display_name} muted!", f"Duration: {minutes} minutes", discord.Color.blue()))
         except Exception as e:
@@ -213,14 +208,12 @@ class Moderation(commands.Cog):
         if member.bot:
             return await self.respond_and_delete(interaction, content="You cannot warn a bot.")
 
-        guild_id, user_id = str(interaction.guild.id), str(member.id)
-        self.ensure_guild_user(guild_id, user_id)
-        self.warnings[guild_id][user_id].append({
-            "reason": reason,
-            "moderator": str(interaction.user),
-            "timestamp": discord.utils.utcnow().isoformat()
-        })
-        await self.save_json(WARN_FILE, self.warnings)
+        self.db.add_warning(
+            interaction.guild.id,
+            member.id,
+            reason=reason,
+            moderator=str(interaction.user)
+        )
 
         await self.respond_and_delete(interaction, embed=self.build_embed(f"⚠️ Warned {member.display_name}", f"Reason: {reason}", discord.Color.yellow()))
 
@@ -236,7 +229,7 @@ class Moderation(commands.Cog):
             discord.Color.yellow()
         )
         log_embed.set_thumbnail(url=member.display_avatar.url)
-        await self.send_mod_log(interaction.guild, log_embed)
+        self.modlog.submit(interaction.guild, log_embed)
 
     @app_commands.command(name="kick", description="Kick a user from the server.")
     @app_commands.checks.has_permissions(kick_members=True)
@@ -258,7 +251,7 @@ class Moderation(commands.Cog):
                 discord.Color.orange()
             )
             log_embed.set_thumbnail(url=member.display_avatar.url)
-            await self.send_mod_log(interaction.guild, log_embed)
+            self.modlog.submit(interaction.guild, log_embed)
 
             await self.respond_and_delete(interaction, embed=self.build_embed(f"🥾 {member.display_name} kicked!", f"Reason: {reason}", discord.Color.orange()))
         except Exception as e:
@@ -284,7 +277,7 @@ class Moderation(commands.Cog):
                 discord.Color.red
             )
             log_embed.set_thumbnail(url=member.display_avatar.url)
-            await self.send_mod_log(interaction.guild, log_embed)
+            self.modlog.submit(interaction.guild, log_embed)
 
             await self.respond_and_delete(interaction, embed=self.build_embed(f"🔨 {member.display_name} banned!", f"Reason: {reason}", discord.Color.red()))
         except Exception as e:
@@ -304,7 +297,7 @@ class Moderation(commands.Cog):
                 f"**Timestamp:** <t:{int(discord.utils.utcnow().timestamp())}:F>",
                 discord.Color.green()
             )
-            await self.send_mod_log(interaction.guild, log_embed)
+            self.modlog.submit(interaction.guild, log_embed)
 
             await self.respond_and_delete(interaction, embed=self.build_embed(f"✨ {user.name} unbanned!", "Let's hope they behave this time.", discord.Color.green()))
         except Exception as e:
@@ -0,0 +1,145 @@
+import logging
+import os
+import time
+import discord
+from aiohttp import web
+from discord import app_commands
+from discord.ext import commands
+from util.instrumentation import metrics, install
+from util.logs import stats as logging_stats
+from util.loop_watchdog import watchdog
+from util.modlog import get_modlog
+
+log = logging.getLogger(__name__)
+
+DEV_ROLE_ID = 1435135698146426890
+METRICS_HOST = "127.0.0.1"
+METRICS_PORT = int(os.getenv("METRICS_PORT", "9108"))  # 0 disables the endpoint
+FIELD_CHARS = 1024    # Discord's cap on one embed field value
+EMBED_CHARS = 5200    # of the 6000 character total; leaves room for the mod-log/logging fields and footer
+
+
+def _ms(seconds: float) -> str:
+    return f"{seconds * 1000:.0f}"
+
+
+def _add_rows(embed: discord.Embed, name: str, lines: list, empty: str = None):
+    """Add `lines` as one field, continued across more fields when it would exceed FIELD_CHARS."""
+    if not lines:
+        if empty:
+            embed.add_field(name=name, value=empty, inline=False)
+        return
+    chunks, current = [], ""
+    for line in lines:
+        line = line[:FIELD_CHARS]
+        if current and len(current) + 1 + len(line) > FIELD_CHARS:
+            chunks.append(current)
+            current = line
+        else:
+            current = f"{current}\n{line}" if current else line
+    chunks.append(current)
+    for i, chunk in enumerate(chunks):
+        title = name if i == 0 else f"{name} (cont.)"
+        if len(embed) + len(title) + len(chunk) > EMBED_CHARS:
+            embed.add_field(name=title, value="…more rows than fit; lower `limit`", inline=False)
+            return
+        embed.add_field(name=title, value=chunk, inline=False)
+
+
+class Perf(commands.Cog):
+    """📈 Latency numbers for commands and listeners."""
+    def __init__(self, bot):
+        self.bot = bot
+        self.runner = None
+
+    async def cog_load(self):
+        install(self.bot)
+        if METRICS_PORT:
+            app = web.Application()
+            app.router.add_get("/metrics", self.serve_metrics)
+            self.runner = web.AppRunner(app, access_log=None)
+            await self.runner.setup()
+            try:
+                await web.TCPSite(self.runner, METRICS_HOST, METRICS_PORT).start()
+            except OSError as e:
+                log.warning("Metrics endpoint unavailable on port %d: %s", METRICS_PORT, e)
+                await self.runner.cleanup()
+                self.runner = None
+
+    async def cog_unload(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+    async def serve_metrics(self, request):
+        text = metrics.prometheus() + (
+            "# TYPE nari_loop_stalls_total counter\n"
+            f"nari_loop_stalls_total {watchdog.stalls}\n"
+            f"nari_loop_stalled_seconds_total {watchdog.stalled_seconds:.3f}\n"
+        ) + "".join(
+            f"nari_log_records_{key}{'' if key == 'queued' else '_total'} {value}\n" for key, value in logging_stats().items()
+        ) + get_modlog(self.bot).prometheus()
+        return web.Response(text=text, content_type="text/plain", charset="utf-8")
+
+    async def _is_dev(self, interaction: discord.Interaction):
+        if DEV_ROLE_ID == 0:
+            return True
+        return any(role.id == DEV_ROLE_ID for role in getattr(interaction.user, "roles", []))
+
+    @app_commands.command(name="perf", description="Show command and listener latency (developers only).")
+    @app_commands.describe(limit="How many rows to show per section")
+    async def perf(self, interaction: discord.Interaction, limit: app_commands.Range[int, 1, 20] = 8):
+        if not await self._is_dev(interaction):
+            return await interaction.response.send_message("You are not authorized to run this command.", ephemeral=True)
+
+        embed = discord.Embed(title="📈 Performance", color=discord.Color.blurple())
+
+        commands_by_p95 = sorted(metrics.commands.items(), key=lambda item: item[1].latency.percentile(0.95), reverse=True)
+        lines = []
+        for name, stats in commands_by_p95[:limit]:
+            hist = stats.latency
+            acks = " ".join(f"{kind}:{count}" for kind, count in sorted(stats.acks.items()))
+            lines.append(
+                f"`/{name}` ×{hist.count} — {_ms(hist.percentile(0.5))}/{_ms(hist.percentile(0.95))}/{_ms(hist.percentile(0.99))}ms"
+                f" · ack p95 {_ms(stats.ack.percentile(0.95))}ms · err {stats.errors}" + (f"\n  ↳ {acks}" if acks else "")
+            )
+        _add_rows(embed, "Commands (p50/p95/p99)", lines, empty="No data yet.")
+
+        listeners_by_p99 = sorted(metrics.listeners.items(), key=lambda item: item[1].percentile(0.99), reverse=True)
+        lines = [
+            f"`{name}` ×{hist.count} — p99 {_ms(hist.percentile(0.99))}ms · max {_ms(hist.max / 1_000_000)}ms"
+            for name, hist in listeners_by_p99[:limit]
+        ]
+        _add_rows(embed, "Listeners (slowest p99)", lines, empty="No data yet.")
+
+        if watchdog.stalls:
+            lines = [f"`{caller}` ×{count}" for caller, count in watchdog.culprits.most_common(limit)]
+            _add_rows(embed, f"Loop stalls ({watchdog.summary()})", lines)
+
+        modlog = get_modlog(self.bot)
+        if modlog.stats["submitted"]:
+            stats, hist = modlog.stats, modlog.flush_latency
+            embed.add_field(
+                name="Mod log",
+                value=f"Queued {modlog.depth()} (peak {stats['max_depth']}) · {stats['embeds']} embeds in {stats['messages']} messages"
+                      f" ({stats['webhook_messages']} via webhook)\nFlush p50/p95 {_ms(hist.percentile(0.5))}/{_ms(hist.percentile(0.95))}ms"
+                      f" · dropped {stats['dropped']} · errors {stats['errors']}",
+                inline=False
+            )
+
+        log_stats = logging_stats()
+        if log_stats["dropped"] or log_stats["suppressed"]:
+            embed.add_field(
+                name="Logging",
+                value=f"Queued {log_stats['queued']} · dropped {log_stats['dropped']} · debug suppressed {log_stats['suppressed']}",
+                inline=False
+            )
+
+        uptime = int(time.time() - metrics.started)
+        endpoint = f"http://{METRICS_HOST}:{METRICS_PORT}/metrics" if self.runner else "disabled"
+        embed.set_footer(text=f"Gateway {round(self.bot.latency * 1000)}ms · tracking {uptime // 60} min · {endpoint}")
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+
+async def setup(bot):
+    await bot.add_cog(Perf(bot))
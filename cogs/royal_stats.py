@@ -1,20 +1,10 @@
-import discord, json, os, random
+import asyncio
+import discord
 from discord.ext import commands
 from discord import app_commands
+from util.royale_players import get_player_repo, xp_needed, MAX_LEVEL, SORT_KEYS
 
-DATA_FILE = "data/royal_stats.json"
-
-def load_data():
-    os.makedirs(os.path.dirname(DATA_FILE), exist_ok=True)
-    if not os.path.exists(DATA_FILE):
-        with open(DATA_FILE, "w") as f:
-            json.dump({}, f)
-    with open(DATA_FILE, "r") as f:
-        return json.load(f)
-
-def save_data(data):
-    with open(DATA_FILE, "w") as f:
-        json.dump(data, f, indent=4)
+LEADERBOARD_SIZE = 10
 
 
 # === Prestige System ===
@@ -40,15 +30,13 @@ class PrestigeButton(discord.ui.View):
             await interaction.response.send_message("This isn’t your prestige menu!", ephemeral=True)
             return
 
-        user = self.cog.get_user(self.user_id)
-        if user["level"] < self.cog.max_level:
+        players = self.cog.players
+        prestiged = players.prestige(self.user_id, interaction.guild_id)
+        if not prestiged:
             await interaction.response.send_message("You haven’t reached max level yet!", ephemeral=True)
             return
 
-        user["prestige"] += 1
-        user["level"] = 1
-        user["xp"] = 0
-        save_data(self.cog.data)
+        user = players.get(self.user_id)
 
         stars = "★" * user["prestige"]
         title, emoji, _ = self.cog.get_prestige_tier(user["prestige"])
@@ -64,46 +52,10 @@ class PrestigeButton(discord.ui.View):
 class RoyalStats(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
-        self.data = load_data()
-        self.max_level = 15
-        self.global_xp_multiplier = 1.5  # make leveling easier
+        self.players = get_player_repo(bot)
+        self.max_level = MAX_LEVEL
 
     # --- Helpers ---
-    def get_user(self, user_id: int):
-        uid = str(user_id)
-        if uid not in self.data:
-            self.data[uid] = {
-                "kills": 0,
-                "deaths": 0,
-                "revives": 0,
-                "xp": 0,
-                "level": 1,
-                "prestige": 0
-            }
-        return self.data[uid]
-
-    def add_xp(self, user_id: int, amount: int):
-        user = self.get_user(user_id)
-        amount = int(amount * self.global_xp_multiplier)  # easier leveling
-        user["xp"] += amount
-        msg = None
-
-        while user["xp"] >= self.xp_needed(user["level"]):
-            user["xp"] -= self.xp_needed(user["level"])
-            user["level"] += 1
-            if user["level"] >= self.max_level:
-                user["level"] = self.max_level
-                msg = f"🌟 You’ve reached **Level {self.max_level}!** Ready to Prestige!"
-                break
-            else:
-                msg = f"⬆️ Leveled up to **Level {user['level']}!**"
-
-        save_data(self.data)
-        return msg
-
-    def xp_needed(self, level: int):
-        return 60 + (level * 12)  # mild scaling — easier leveling
-
     def get_prestige_tier(self, prestige: int):
         """Return (title, emoji, color) based on prestige tier."""
         if prestige == 0:
@@ -119,7 +71,7 @@ class RoyalStats(commands.Cog):
     @app_commands.command(name="royalstats", description="Check your Royal stats and prestige progress.")
     async def royalstats(self, interaction: discord.Interaction, member: discord.Member = None):
         member = member or interaction.user
-        user = self.get_user(member.id)
+        user = self.players.get(member.id)
 
         kills, deaths, revives = user["kills"], user["deaths"], user["revives"]
         xp, level, prestige = user["xp"], user["level"], user["prestige"]
@@ -127,7 +79,7 @@ class RoyalStats(commands.Cog):
         prestige_stars = "★" * prestige
 
         title, emoji, color = self.get_prestige_tier(prestige)
-        progress_bar = self.xp_bar(xp, self.xp_needed(level))
+        progress_bar = self.xp_bar(xp, xp_needed(level))
 
         embed = discord.Embed(
             title=f"{emoji} {member.display_name}'s Royal Stats",
@@ -139,7 +91,7 @@ class RoyalStats(commands.Cog):
         embed.add_field(name="Revives", value=f"❤️ {revives}", inline=True)
         embed.add_field(name="K/D Ratio", value=f"⚔️ {kd_ratio}", inline=True)
         embed.add_field(name="Level", value=f"📈 {level}/{self.max_level}", inline=True)
-        embed.add_field(name="XP", value=f"✨ {xp}/{self.xp_needed(level)}\n`{progress_bar}`", inline=False)
+        embed.add_field(name="XP", value=f"✨ {xp}/{xp_needed(level)}\n`{progress_bar}`", inline=False)
 
         view = None
         if member.id == interaction.user.id and level >= self.max_level:
@@ -152,24 +104,42 @@ class RoyalStats(commands.Cog):
 
     # --- Leaderboard Command ---
     @app_commands.command(name="royalleaderboard", description="View the top Royal warriors.")
-    async def leaderboard(self, interaction: discord.Interaction, sort_by: str = "kills"):
+    @app_commands.choices(scope=[
+        app_commands.Choice(name="This server", value="server"),
+        app_commands.Choice(name="Global", value="global"),
+    ])
+    async def leaderboard(self, interaction: discord.Interaction, sort_by: str = "kills", scope: str = "global"):
         """Display top players sorted by kills, level, or prestige."""
-        valid = ["kills", "level", "prestige", "xp"]
-        if sort_by not in valid:
+        if sort_by not in SORT_KEYS:
             return await interaction.response.send_message(
-                f"Invalid sort key! Choose one of: `{', '.join(valid)}`", ephemeral=True
+                f"Invalid sort key! Choose one of: `{', '.join(SORT_KEYS)}`", ephemeral=True
             )
 
-        sorted_users = sorted(self.data.items(), key=lambda x: x[1].get(sort_by, 0), reverse=True)
-        top = sorted_users[:10]
+        # Global reads the table every cluster writes to, so it covers players from all of them
+        partition = None if scope == "global" or interaction.guild is None else interaction.guild
+        top = self.players.top(sort_by, LEADERBOARD_SIZE, partition)
+        rank, ranked = self.players.rank(sort_by, interaction.user.id, partition)
+        rank_text = f"Your rank: #{rank} of {ranked}" if rank else None
 
         if not top:
             return await interaction.response.send_message("No stats recorded yet!", ephemeral=True)
 
+        send = interaction.response.send_message
+        guild = interaction.guild
+        missing = [uid for uid, _ in top if guild is not None and guild.get_member(uid) is None]
+        if missing and self.bot.intents.members:
+            # Member lists aren't cached up front; ask the gateway for just these rows
+            await interaction.response.defer()
+            send = interaction.followup.send
+            try:
+                await guild.query_members(user_ids=missing, limit=len(missing), cache=True)
+            except (asyncio.TimeoutError, discord.ClientException):
+                pass
+
         desc = []
         for i, (uid, stats) in enumerate(top, 1):
-            user = interaction.guild.get_member(int(uid))
-            name = user.display_name if user else f"User {uid}"
+            user = (guild.get_member(uid) if guild else None) or self.bot.get_user(uid)
+            name = user.display_name if user else f"<@{uid}>"
             title, emoji, _ = self.get_prestige_tier(stats.get("prestige", 0))
             desc.append(
                 f"**#{i}** — {name} {emoji}\n"
@@ -181,7 +151,9 @@ class RoyalStats(commands.Cog):
             description="\n\n".join(desc),
             color=discord.Color.gold()
         )
-        await interaction.response.send_message(embed=embed)
+        if rank_text:
+            embed.set_footer(text=rank_text)
+        await send(embed=embed)
 
 
 async def setup(bot: commands.Bot):
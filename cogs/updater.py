@@ -1,12 +1,16 @@
+import logging
 import discord
-import subprocess
-import os
-import sys
-import asyncio
 import traceback
 from datetime import datetime
 from discord import app_commands
 from discord.ext import commands
+from util.git_info import git_info, run_git
+from util.instrumentation import install
+from util.restart import graceful_restart
+from util.reloader import get_reloader
+from util.command_sync import get_sync_manager
+
+log = logging.getLogger(__name__)
 
 GITHUB_REPO = "https://github.com/unclemelo/Nari"
 DEV_ROLE_ID = 1435135698146426890
@@ -15,6 +19,14 @@ class Updater(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
 
+    async def cog_load(self):
+        # Restart draining relies on in-flight interactions being tracked
+        install(self.bot)
+        self.reloader = get_reloader(self.bot)
+
+    def commits_block(self, commits, limit=5):
+        return f"```\n{chr(10).join(commits[:limit]) or 'No commits found.'}\n```"
+
     # -------------------------------------------------
     # Helper: Check for developer role
     # -------------------------------------------------
@@ -38,7 +50,7 @@ class Updater(commands.Cog):
         embed.add_field(name="Error Message", value=f"```{str(error)[:500]}```", inline=False)
         embed.set_footer(text="Check console for traceback details.")
         await interaction.followup.send(embed=embed)
-        print(f"[Updater Error] {command_name} failed:\n{tb}")
+        log.error("%s failed:\n%s", command_name, tb)
 
     # -------------------------------------------------
     # /update - main update + restart
@@ -50,9 +62,11 @@ class Updater(commands.Cog):
 
         await interaction.response.defer(thinking=True)
         try:
-            process = subprocess.run(["git", "pull"], capture_output=True, text=True)
-            output = process.stdout.strip() or process.stderr.strip()
+            result = await run_git("pull", "--ff-only", timeout=60)
+            output = result.output
 
+            if result.returncode != 0:
+                raise RuntimeError(output[:500] or "git pull failed")
             if "Already up to date" in output:
                 return await interaction.followup.send("✅ No updates available. The bot is already up to date.")
 
@@ -65,9 +79,8 @@ class Updater(commands.Cog):
             embed.add_field(name="GitHub Status", value=f"Updates applied successfully. [View on GitHub]({GITHUB_REPO})", inline=False)
 
             try:
-                commits = subprocess.run(["git", "log", "-5", "--pretty=format:• %s (%an)"], capture_output=True, text=True)
-                commit_list = commits.stdout.strip()
-                embed.add_field(name="Recent Commits", value=f"```\n{commit_list}\n```", inline=False)
+                meta = await git_info.get()
+                embed.add_field(name="Recent Commits", value=self.commits_block(meta.commits), inline=False)
             except Exception as e:
                 embed.add_field(name="Recent Commits", value=f"Could not retrieve commit log.\nError: {e}", inline=False)
 
@@ -75,8 +88,7 @@ class Updater(commands.Cog):
             embed.set_footer(text=f"Today at your local time • <t:{now}:t> | <t:{now}:R>")
             await interaction.followup.send(embed=embed)
 
-            await asyncio.sleep(3)
-            os.execv(sys.executable, ["python"] + sys.argv)
+            await graceful_restart(self.bot, keep={interaction.id})
 
         except Exception as e:
             await self.send_error_embed(interaction, e, "update")
@@ -91,9 +103,8 @@ class Updater(commands.Cog):
 
         await interaction.response.defer()
         try:
-            process = subprocess.run(["git", "log", "-5", "--pretty=format:• %s (%an)"], capture_output=True, text=True)
-            commits = process.stdout.strip() or "No commits found."
-            embed = discord.Embed(title="📝 Recent Commits", description=f"```\n{commits}\n```", color=discord.Color.blurple())
+            meta = await git_info.get()
+            embed = discord.Embed(title="📝 Recent Commits", description=self.commits_block(meta.commits), color=discord.Color.blurple())
             await interaction.followup.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(interaction, e, "update_commits")
@@ -108,11 +119,11 @@ class Updater(commands.Cog):
 
         await interaction.response.defer()
         try:
-            process = subprocess.run(["git", "fetch"], capture_output=True, text=True)
-            ahead_check = subprocess.run(["git", "status", "-uno"], capture_output=True, text=True)
+            fetch = await run_git("fetch", timeout=60)
+            ahead_check = await run_git("status", "-uno")
             embed = discord.Embed(title="🧪 Update Test", color=discord.Color.orange())
-            embed.add_field(name="Git Fetch Output", value=f"```\n{process.stdout.strip()[:500]}\n```", inline=False)
-            embed.add_field(name="Status", value=f"```\n{ahead_check.stdout.strip()[:500]}\n```", inline=False)
+            embed.add_field(name="Git Fetch Output", value=f"```\n{fetch.output[:500] or 'Nothing new.'}\n```", inline=False)
+            embed.add_field(name="Status", value=f"```\n{ahead_check.stdout[:500]}\n```", inline=False)
             await interaction.followup.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(interaction, e, "update_test")
@@ -120,44 +131,70 @@ class Updater(commands.Cog):
     # -------------------------------------------------
     # /update reload
     # -------------------------------------------------
-    @app_commands.command(name="update_reload", description="Reload all cogs without a full restart.")
-    async def reload_cogs(self, interaction: discord.Interaction):
+    @app_commands.command(name="update_reload", description="Reload changed cogs without a full restart.")
+    @app_commands.describe(everything="Reload every cog and util module, not just the ones that changed")
+    async def reload_cogs(self, interaction: discord.Interaction, everything: bool = False):
         if not await self._is_dev(interaction):
             return await interaction.response.send_message("You are not authorized to run this command.", ephemeral=True)
 
+        await interaction.response.defer()
         try:
-            reloaded = []
-            failed = []
-            for ext in list(self.bot.extensions.keys()):
-                try:
-                    await self.bot.reload_extension(ext)
-                    reloaded.append(ext)
-                except Exception as e:
-                    failed.append(f"{ext}: {e}")
-                    print(f"Failed to reload {ext}: {e}")
-
-            embed = discord.Embed(title="♻️ Reloaded Cogs", color=discord.Color.green())
-            embed.add_field(name="Reloaded", value=f"```\n{chr(10).join(reloaded) or 'None'}\n```", inline=False)
-            if failed:
+            report = await self.reloader.reload(everything=everything)
+            for name, error in report.failed:
+                log.error("Failed to reload %s: %s", name, error)
+            synced = await get_sync_manager(self.bot).sync_global() if report.reloaded or report.loaded else None
+
+            if not report.changed:
+                return await interaction.followup.send("✅ Nothing changed since the last reload.")
+
+            embed = discord.Embed(title="♻️ Reloaded Cogs", color=discord.Color.orange() if report.failed else discord.Color.green())
+            embed.add_field(name="Changed", value=f"```\n{chr(10).join(report.changed)[:1000]}\n```", inline=False)
+            embed.add_field(name="Reloaded", value=f"```\n{chr(10).join(report.modules + report.reloaded + report.loaded)[:1000] or 'None'}\n```", inline=False)
+            if report.handed_off:
+                embed.add_field(name="State Kept", value=", ".join(report.handed_off), inline=False)
+            if report.failed:
+                failed = [f"{name}: {error}" for name, error in report.failed]
                 embed.add_field(name="Failed", value=f"```\n{chr(10).join(failed)[:1000]}\n```", inline=False)
-            await interaction.response.send_message(embed=embed)
+            embed.set_footer(text=f"Took {report.elapsed * 1000:.0f}ms · " + ("commands re-synced" if synced is not None else "commands unchanged"))
+            await interaction.followup.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(interaction, e, "update_reload")
 
+    # -------------------------------------------------
+    # /update sync
+    # -------------------------------------------------
+    @app_commands.command(name="update_sync", description="Sync slash commands with Discord if they changed.")
+    @app_commands.describe(force="Upload even if the command tree looks unchanged")
+    async def sync_commands(self, interaction: discord.Interaction, force: bool = False):
+        if not await self._is_dev(interaction):
+            return await interaction.response.send_message("You are not authorized to run this command.", ephemeral=True)
+
+        await interaction.response.defer()
+        try:
+            manager = get_sync_manager(self.bot)
+            synced = await manager.sync_global(force=force)
+            if synced is None:
+                msg = "✅ Command tree unchanged, nothing uploaded."
+            else:
+                msg = f"✅ Synced {len(synced)} commands."
+            await interaction.followup.send(f"{msg}\n-# {manager.synced} syncs, {manager.skipped} skipped since start")
+        except Exception as e:
+            await self.send_error_embed(interaction, e, "update_sync")
+
     # -------------------------------------------------
     # /update status
     # -------------------------------------------------
     @app_commands.command(name="update_status", description="Show current version, branch, and uptime.")
     async def update_status(self, interaction: discord.Interaction):
+        await interaction.response.defer()
         try:
-            branch = subprocess.run(["git", "rev-parse", "--abbrev-ref", "HEAD"], capture_output=True, text=True).stdout.strip()
-            commit = subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip()
+            meta = await git_info.get()
 
             embed = discord.Embed(title="📊 Bot Status", color=discord.Color.blue())
-            embed.add_field(name="Branch", value=branch or "Unknown")
-            embed.add_field(name="Commit", value=commit or "Unknown")
+            embed.add_field(name="Branch", value=meta.branch)
+            embed.add_field(name="Commit", value=meta.short)
             embed.add_field(name="GitHub", value=f"[View Repository]({GITHUB_REPO})", inline=False)
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(interaction, e, "update_status")
 
@@ -166,17 +203,18 @@ class Updater(commands.Cog):
     # -------------------------------------------------
     @app_commands.command(name="update_info", description="Display bot update info and recent activity.")
     async def update_info(self, interaction: discord.Interaction):
+        await interaction.response.defer()
         try:
-            process = subprocess.run(["git", "log", "-3", "--pretty=format:• %s (%an)"], capture_output=True, text=True)
+            meta = await git_info.get()
             embed = discord.Embed(
                 title="ℹ️ Bot Update Info",
                 description="Quick summary of recent updates and version info.",
                 color=discord.Color.purple()
             )
-            embed.add_field(name="Current Commit", value=subprocess.run(["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True).stdout.strip())
-            embed.add_field(name="Recent Commits", value=f"```\n{process.stdout.strip()}\n```", inline=False)
+            embed.add_field(name="Current Commit", value=meta.short)
+            embed.add_field(name="Recent Commits", value=self.commits_block(meta.commits, limit=3), inline=False)
             embed.add_field(name="GitHub Repo", value=f"[View Repository]({GITHUB_REPO})", inline=False)
-            await interaction.response.send_message(embed=embed)
+            await interaction.followup.send(embed=embed)
         except Exception as e:
             await self.send_error_embed(interaction, e, "update_info")
 
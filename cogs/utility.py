@@ -1,6 +1,24 @@
 import discord, platform, psutil, datetime, time
 from discord.ext import commands
 from discord import app_commands
+from util.loop_watchdog import watchdog
+from util.cluster import cluster_query, get_cluster
+from util.cache_policy import ensure_chunked
+
+INTENTS = ("members",)  # /whois and mutual server counts
+
+
+@cluster_query("mutual_guilds")
+def mutual_guild_count(bot, user_id: int):
+    """[servers the user is cached in, unchunked servers that might also have them]"""
+    found = unknown = 0
+    for g in bot.guilds:
+        if g.get_member(user_id):
+            found += 1
+        elif not g.chunked:
+            unknown += 1
+    return [found, unknown]
+
 
 class Utility(commands.Cog):
     def __init__(self, bot):
@@ -53,7 +71,8 @@ class Utility(commands.Cog):
         embed.add_field(name="Python", value=f"`{platform.python_version()}`", inline=True)
         embed.add_field(name="CPU Usage", value=f"`{cpu}%`", inline=True)
         embed.add_field(name="RAM Usage", value=f"`{mem.percent}%`", inline=True)
-        embed.add_field(name="Uptime", value=f"`{uptime}`", inline=False)
+        embed.add_field(name="Uptime", value=f"`{uptime}`", inline=True)
+        embed.add_field(name="Loop Stalls", value=f"`{watchdog.summary()}`", inline=True)
         embed.add_field(name="Servers", value=f"`{len(self.bot.guilds)}`", inline=True)
         embed.add_field(name="Users", value=f"`{len(self.bot.users)}`", inline=True)
         embed.add_field(name="Commands", value=f"`{len(self.bot.tree.get_commands())}`", inline=True)
@@ -64,7 +83,8 @@ class Utility(commands.Cog):
     # === /whois ===
     @app_commands.command(name="whois", description="View detailed info about a member.")
     async def whois(self, interaction: discord.Interaction, user: discord.User):
-        member = interaction.guild.get_member(user.id)
+        # Slash options arrive as a resolved Member, so this works for uncached members too
+        member = user if isinstance(user, discord.Member) else interaction.guild.get_member(user.id)
         embed = discord.Embed(
             title=f"🔍 Who is {user.name}?",
             color=discord.Color.magenta(),
@@ -87,7 +107,10 @@ class Utility(commands.Cog):
     # === /userinfo ===
     @app_commands.command(name="userinfo", description="Display user stats, mutual servers, etc.")
     async def userinfo(self, interaction: discord.Interaction, user: discord.User):
-        mutual_guilds = len([g for g in self.bot.guilds if g.get_member(user.id)])
+        counts = await get_cluster(self.bot).query("mutual_guilds", user_id=user.id)
+        mutual_guilds = sum(found for found, _ in counts)
+        # Member lists are loaded on demand, so unchunked servers can only be ruled in, not out
+        unknown = sum(unknown for _, unknown in counts)
         embed = discord.Embed(
             title=f"🧾 User Info — {user.name}",
             color=discord.Color.blurple()
@@ -96,7 +119,7 @@ class Utility(commands.Cog):
         embed.add_field(name="Username", value=f"{user}", inline=True)
         embed.add_field(name="ID", value=f"`{user.id}`", inline=True)
         embed.add_field(name="Account Created", value=discord.utils.format_dt(user.created_at, style='F'), inline=False)
-        embed.add_field(name="Mutual Servers", value=f"`{mutual_guilds}`", inline=True)
+        embed.add_field(name="Mutual Servers", value=f"`{mutual_guilds}+`" if unknown else f"`{mutual_guilds}`", inline=True)
         embed.set_footer(text="Requested by " + interaction.user.name)
         await interaction.response.send_message(embed=embed)
 
@@ -115,19 +138,23 @@ class Utility(commands.Cog):
     @app_commands.command(name="serverinfo", description="Show info about the current server.")
     async def serverinfo(self, interaction: discord.Interaction):
         guild = interaction.guild
+        # Members aren't cached up front; fetch this guild's list the first time it's asked for
+        await interaction.response.defer()
+        await ensure_chunked(self.bot, guild)
+        owner = guild.owner
         embed = discord.Embed(
             title=f"🏰 Server Info — {guild.name}",
             color=discord.Color.gold()
         )
         embed.set_thumbnail(url=guild.icon.url if guild.icon else discord.Embed.Empty)
         embed.add_field(name="Server ID", value=f"`{guild.id}`", inline=True)
-        embed.add_field(name="Owner", value=f"{guild.owner.mention}", inline=True)
+        embed.add_field(name="Owner", value=owner.mention if owner else f"<@{guild.owner_id}>", inline=True)
         embed.add_field(name="Members", value=f"`{guild.member_count}`", inline=True)
         embed.add_field(name="Channels", value=f"`{len(guild.channels)}`", inline=True)
         embed.add_field(name="Roles", value=f"`{len(guild.roles)}`", inline=True)
         embed.add_field(name="Created", value=discord.utils.format_dt(guild.created_at, style='F'), inline=False)
         embed.set_footer(text=f"Requested by {interaction.user}")
-        await interaction.response.send_message(embed=embed)
+        await interaction.followup.send(embed=embed)
 
 
 async def setup(bot):
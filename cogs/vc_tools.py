@@ -3,6 +3,8 @@ from discord.ext import commands
 from discord import app_commands
 from util.command_checks import command_enabled
 
+INTENTS = ("voice_states",)  # member.voice
+
 class VCTools(commands.Cog):
     def __init__(self, bot: commands.Bot):
         self.bot = bot
@@ -0,0 +1,122 @@
+# launcher.py — run Nari as several processes, each owning a range of shards
+# ──────────────────────────────────────────────
+# Usage: python launcher.py --clusters 4 [--shards 16] [--ipc-port 7650]
+#
+# Each cluster is a normal `python bot.py` with SHARD_COUNT, SHARD_IDS,
+# CLUSTER_ID, CLUSTER_COUNT and CLUSTER_IPC_PORT set; the launcher hosts the
+# IPC hub (util/cluster.py) and restarts clusters that exit.
+#
+# Shared state lives in data/nari.db (util/database.py): moderation data,
+# guild settings, royal stats, the deathlog, cooldowns, applied presets and
+# command sync hashes. The launcher opens it once before starting clusters so
+# the one-shot migrations run in a single process. Guild settings are cached
+# per cluster and re-read when another cluster announces a change over IPC.
+# Only the error index stays per process, as data/errors-<cluster>.json.
+
+import argparse
+import asyncio
+import logging
+import os
+import signal
+import sys
+import aiohttp
+from dotenv import load_dotenv
+from util.cluster import ClusterHub
+from util.database import get_db
+from util.logs import setup_logging
+
+log = logging.getLogger(__name__)
+
+GATEWAY_URL = "https://discord.com/api/v10/gateway/bot"
+RESTART_BACKOFF = (5, 15, 60)
+
+
+async def recommended_shards(token: str) -> int:
+    async with aiohttp.ClientSession(headers={"Authorization": f"Bot {token}"}) as session:
+        async with session.get(GATEWAY_URL) as resp:
+            resp.raise_for_status()
+            data = await resp.json()
+            return data["shards"]
+
+
+def shard_ranges(shards: int, clusters: int) -> list:
+    """Split shard ids 0..shards-1 into `clusters` contiguous, near-equal ranges."""
+    base, extra = divmod(shards, clusters)
+    ranges, start = [], 0
+    for i in range(clusters):
+        size = base + (1 if i < extra else 0)
+        ranges.append(list(range(start, start + size)))
+        start += size
+    return ranges
+
+
+async def run_cluster(cluster_id: int, env: dict, stopping: asyncio.Event):
+    failures = 0
+    while not stopping.is_set():
+        process = await asyncio.create_subprocess_exec(sys.executable, "bot.py", env=env)
+        log.info("Cluster %d started (pid %d, shards %s)", cluster_id, process.pid, env["SHARD_IDS"])
+        stop_wait = asyncio.create_task(stopping.wait())
+        exit_wait = asyncio.create_task(process.wait())
+        await asyncio.wait({stop_wait, exit_wait}, return_when=asyncio.FIRST_COMPLETED)
+        if stopping.is_set():
+            if process.returncode is None:
+                process.terminate()
+                await process.wait()
+            return
+        stop_wait.cancel()
+        delay = RESTART_BACKOFF[min(failures, len(RESTART_BACKOFF) - 1)]
+        failures += 1
+        log.warning("Cluster %d exited with %s; restarting in %ds", cluster_id, process.returncode, delay)
+        try:
+            await asyncio.wait_for(stopping.wait(), timeout=delay)
+        except asyncio.TimeoutError:
+            pass
+
+
+async def main():
+    parser = argparse.ArgumentParser(description="Run Nari as a multi-process shard cluster.")
+    parser.add_argument("--clusters", type=int, default=2)
+    parser.add_argument("--shards", type=int, default=None, help="total shards (default: Discord's recommendation)")
+    parser.add_argument("--ipc-port", type=int, default=7650)
+    args = parser.parse_args()
+
+    load_dotenv()
+    setup_logging()
+    get_db().close()  # create, upgrade and migrate the shared database before any cluster opens it
+    shards = args.shards or await recommended_shards(os.getenv("TOKEN"))
+    clusters = max(1, min(args.clusters, shards))
+    ranges = shard_ranges(shards, clusters)
+    log.info("%d shards across %d clusters", shards, clusters)
+
+    hub = ClusterHub(args.ipc_port)
+    await hub.start()
+
+    stopping = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        try:
+            loop.add_signal_handler(sig, stopping.set)
+        except NotImplementedError:
+            pass  # Windows: Ctrl+C still reaches the children directly
+
+    metrics_port = int(os.getenv("METRICS_PORT", "9108"))
+    workers = []
+    for cluster_id, shard_ids in enumerate(ranges):
+        env = dict(
+            os.environ,
+            SHARD_COUNT=str(shards),
+            SHARD_IDS=",".join(map(str, shard_ids)),
+            CLUSTER_ID=str(cluster_id),
+            CLUSTER_COUNT=str(clusters),
+            CLUSTER_IPC_PORT=str(args.ipc_port),
+            METRICS_PORT=str(metrics_port + cluster_id if metrics_port else 0),
+        )
+        workers.append(asyncio.create_task(run_cluster(cluster_id, env, stopping)))
+
+    await asyncio.gather(*workers)
+    await hub.close()
+    log.info("All clusters stopped.")
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
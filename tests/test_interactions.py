@@ -0,0 +1,111 @@
+import asyncio
+import unittest
+from unittest import mock
+import aiohttp
+from aiohttp import web
+from cogs import interactions
+from cogs.interactions import GifPool
+
+
+class StubApi:
+    """Local stand-in for nekos.best: answers /{endpoint}?amount=N and counts requests."""
+
+    def __init__(self):
+        self.requests = []
+        self.mode = "ok"   # "ok", "html", "badjson" or "slow"
+        self.served = 0
+
+    async def handle(self, request):
+        amount = int(request.query.get("amount", 1))
+        self.requests.append((request.match_info["endpoint"], amount))
+        if self.mode == "html":
+            return web.Response(text="<html>502 Bad Gateway</html>", content_type="text/html")
+        if self.mode == "badjson":
+            return web.Response(text="<html>502 Bad Gateway</html>", content_type="application/json")
+        if self.mode == "slow":
+            await asyncio.sleep(0.5)
+        results = []
+        for _ in range(amount):
+            self.served += 1
+            results.append({"url": f"https://gifs.test/{self.served}.gif"})
+        return web.json_response({"results": results})
+
+    async def start(self):
+        app = web.Application()
+        app.router.add_get("/{endpoint}", self.handle)
+        self.runner = web.AppRunner(app)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, "127.0.0.1", 0)
+        await site.start()
+        port = self.runner.addresses[0][1]
+        return f"http://127.0.0.1:{port}"
+
+    async def close(self):
+        await self.runner.cleanup()
+
+
+class GifPoolTest(unittest.IsolatedAsyncioTestCase):
+    async def asyncSetUp(self):
+        self.api = StubApi()
+        base_url = await self.api.start()
+        self.session = aiohttp.ClientSession()
+        self.pool = GifPool(self.session, {"hug": ["https://local.test/hug.gif"]}, base_url=base_url, size=3)
+
+    async def asyncTearDown(self):
+        self.pool.close()
+        await self.session.close()
+        await self.api.close()
+
+    async def settle(self):
+        await asyncio.gather(*self.pool.refills.values(), return_exceptions=True)
+
+    async def test_prefetch_serves_from_buffer_and_refills(self):
+        await self.pool.refill("hug")
+        self.assertEqual(len(self.pool.buffers["hug"]), 3)
+
+        url = await self.pool.get("hug")
+        self.assertEqual(url, "https://gifs.test/1.gif")
+        self.assertEqual(self.pool.served["buffer"], 1)
+
+        await self.settle()
+        self.assertEqual(len(self.pool.buffers["hug"]), 3)
+        self.assertEqual(self.api.requests, [("hug", 3), ("hug", 1)])
+
+    async def test_empty_buffer_makes_one_request(self):
+        urls = await asyncio.gather(self.pool.get("pat"), self.pool.get("pat"))
+        await self.settle()
+
+        self.assertEqual(len(set(urls)), 2)
+        self.assertEqual(self.pool.served["api"], 2)
+        self.assertEqual(self.api.requests[0], ("pat", 4))
+        self.assertEqual(len(self.pool.buffers["pat"]), 3)
+
+    async def test_html_error_page_falls_back_to_local(self):
+        self.api.mode = "html"
+        url = await self.pool.get("hug")
+        self.assertEqual(url, "https://local.test/hug.gif")
+        self.assertEqual(self.pool.served["local"], 1)
+
+    async def test_undecodable_json_falls_back_to_local(self):
+        self.api.mode = "badjson"
+        self.assertEqual(await self.pool.get("hug"), "https://local.test/hug.gif")
+
+    async def test_slow_api_falls_back_and_keeps_the_request(self):
+        self.api.mode = "slow"
+        with mock.patch.object(interactions, "FETCH_TIMEOUT", 0.05):
+            url = await self.pool.get("hug")
+        self.assertEqual(url, "https://local.test/hug.gif")
+
+        await self.settle()
+        self.assertEqual(len(self.api.requests), 1)
+        self.assertEqual(len(self.pool.buffers["hug"]), 4)
+        self.assertEqual(await self.pool.get("hug"), "https://gifs.test/1.gif")
+
+    async def test_unknown_endpoint_without_fallback(self):
+        self.api.mode = "html"
+        self.assertIsNone(await self.pool.get("slap"))
+        self.assertEqual(self.pool.served["none"], 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,10 @@
 import json
 import hashlib
 import discord
+from datetime import datetime, timezone
+from util.fanout import fan_out
+
+ROLLOUT_CONCURRENCY = 8
 
 def hash_preset(preset_data):
     return hashlib.sha256(json.dumps(preset_data, sort_keys=True).encode()).hexdigest()
@@ -40,9 +44,9 @@ async def apply_automod_rule(guild, log_channel, rule_data, exempt_roles, exempt
     )
 
     if existing:
-        await existing.edit(trigger=trigger, actions=actions, enabled=True, exempt_roles=exempt_roles, exempt_channels=exempt_channels, reason=reason)
+        return await existing.edit(trigger=trigger, actions=actions, enabled=True, exempt_roles=exempt_roles, exempt_channels=exempt_channels, reason=reason)
     else:
-        await guild.create_automod_rule(
+        return await guild.create_automod_rule(
             name=rule_name,
             event_type=discord.AutoModRuleEventType.message_send,
             trigger=trigger,
@@ -52,3 +56,111 @@ async def apply_automod_rule(guild, log_channel, rule_data, exempt_roles, exempt
             exempt_channels=exempt_channels,
             reason=reason
         )
+
+# === Diff-based rollout ===
+
+def build_trigger(rule_data):
+    return discord.AutoModTrigger(
+        type=discord.AutoModRuleTriggerType.keyword,
+        keyword_filter=rule_data.get("keyword_filter", []),
+        allow_list=rule_data.get("allowed_keywords", []),
+        regex_patterns=rule_data.get("regex_patterns", []),
+    )
+
+def rule_diff(rule, rule_data):
+    """Return only the edit() kwargs that would change `rule`; empty means nothing to do."""
+    changes = {}
+    trigger = rule.trigger
+    if (
+        sorted(trigger.keyword_filter) != sorted(rule_data.get("keyword_filter", []))
+        or sorted(trigger.regex_patterns) != sorted(rule_data.get("regex_patterns", []))
+        or sorted(trigger.allow_list) != sorted(rule_data.get("allowed_keywords", []))
+    ):
+        changes["trigger"] = build_trigger(rule_data)
+    name = rule_data.get("rule_name", "AutoMod Rule")
+    if rule.name != name:
+        changes["name"] = name
+    if not rule.enabled and rule_data.get("enabled", True):
+        changes["enabled"] = True
+    return changes
+
+async def find_rule(guild, settings, rule_data):
+    rule_id = settings.get("rule_id")
+    if rule_id:
+        try:
+            return await guild.fetch_automod_rule(int(rule_id))
+        except discord.NotFound:
+            pass
+    rules = await guild.fetch_automod_rules()
+    return discord.utils.get(rules, name=rule_data.get("rule_name", "AutoMod Rule"))
+
+async def sync_automod_rule(guild, settings, rule_data, reason="AutoMod preset update"):
+    """
+    Bring the guild's rule in line with `rule_data`, editing only the fields that differ.
+    Exemptions and alert actions already on the rule are left untouched.
+    Returns "unchanged", "updated", "created" or "missing".
+    """
+    rule = await find_rule(guild, settings, rule_data)
+    if rule is None:
+        log_channel = guild.get_channel(settings.get("log_channel_id") or 0)
+        if log_channel is None:
+            return "missing"
+        rule = await apply_automod_rule(guild, log_channel, rule_data, [], [], reason=reason)
+        settings["rule_id"] = rule.id
+        return "created"
+
+    settings["rule_id"] = rule.id
+    changes = rule_diff(rule, rule_data)
+    if not changes:
+        return "unchanged"
+    await rule.edit(**changes, reason=reason)
+    return "updated"
+
+async def rollout_presets(bot, applied, current, concurrency=ROLLOUT_CONCURRENCY, on_done=None):
+    """
+    Push changed presets to every guild that uses them. Each guild is its own
+    rate-limit bucket; results are recorded on the guild's entry in `applied`
+    and `on_done(guild_key)` is called as each guild finishes.
+    Returns {status: count}.
+    """
+    summary = {}
+    buckets = {}
+    targets = {}
+
+    for guild in bot.guilds:
+        settings = applied.get(str(guild.id))
+        if not settings:
+            continue
+        rule_data = current.get(settings.get("preset"))
+        if not rule_data:
+            continue
+        new_hash = hash_preset(rule_data)
+        if new_hash == settings.get("hash"):
+            continue
+
+        async def sync(guild=guild, settings=settings, rule_data=rule_data, new_hash=new_hash):
+            try:
+                status = await sync_automod_rule(guild, settings, rule_data)
+            except discord.Forbidden:
+                status = "forbidden"
+            settings["last_sync"] = datetime.now(timezone.utc).isoformat()
+            settings["last_status"] = status
+            summary[status] = summary.get(status, 0) + 1
+            if status in ("unchanged", "updated", "created"):
+                settings["hash"] = new_hash
+                settings.pop("last_error", None)
+            if on_done is not None:
+                on_done(str(guild.id))
+
+        buckets[guild.id] = [sync]
+        targets[guild.id] = settings
+
+    result = await fan_out(buckets, concurrency=concurrency)
+    for guild_id, error in result.failed.items():
+        settings = targets[guild_id]
+        settings["last_status"] = "error"
+        settings["last_error"] = str(error)[:200]
+        summary["error"] = summary.get("error", 0) + 1
+        if on_done is not None:
+            on_done(str(guild_id))
+    return summary
@@ -0,0 +1,187 @@
+import re
+import time
+from collections import deque
+from dataclasses import dataclass
+from util.automod import hash_preset
+
+# === Local AutoMod matching engine ===
+# Compiles an ampres.json preset into one Aho-Corasick automaton (blocked and
+# allowed keywords) plus one alternation regex (regex_patterns), so a preset
+# can be evaluated locally with a single pass per message.
+#
+# Keyword wildcards follow Discord's rules: `word` matches the whole word,
+# `word*` a prefix, `*word` a suffix and `*word*` anywhere. Asterisks inside a
+# keyword are literal. Regexes are written for Discord's (Rust) engine and are
+# translated where Python's `re` has an equivalent; the rest are reported as
+# skipped instead of failing the whole preset.
+
+BLOCK = "keyword"
+ALLOW = "allow"
+MAX_CACHED = 32
+
+_cache = {}
+
+
+@dataclass
+class Hit:
+    kind: str
+    pattern: str
+    start: int
+    end: int
+    text: str
+
+
+def _is_word(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+class AhoCorasick:
+    def __init__(self, entries):
+        """`entries` is an iterable of (literal, payload); literals should already be lowercased."""
+        self.goto = [{}]
+        self.fail = [0]
+        self.out = [[]]
+        for literal, payload in entries:
+            if not literal:
+                continue
+            state = 0
+            for ch in literal:
+                nxt = self.goto[state].get(ch)
+                if nxt is None:
+                    nxt = len(self.goto)
+                    self.goto[state][ch] = nxt
+                    self.goto.append({})
+                    self.fail.append(0)
+                    self.out.append([])
+                state = nxt
+            self.out[state].append((len(literal), payload))
+
+        queue = deque(self.goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in self.goto[state].items():
+                queue.append(nxt)
+                fallback = self.fail[state]
+                while fallback and ch not in self.goto[fallback]:
+                    fallback = self.fail[fallback]
+                self.fail[nxt] = self.goto[fallback].get(ch, 0)
+                self.out[nxt] = self.out[nxt] + self.out[self.fail[nxt]]
+
+    def iter(self, text: str):
+        """Yield (start, end, payload) for every occurrence in `text`."""
+        goto, fail, out = self.goto, self.fail, self.out
+        state = 0
+        for i, ch in enumerate(text):
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            for length, payload in out[state]:
+                yield i - length + 1, i + 1, payload
+
+
+# === Pattern translation ===
+def parse_keyword(keyword: str):
+    """Split a Discord keyword into (literal, prefix_wildcard, suffix_wildcard)."""
+    keyword = keyword.strip().lower()
+    leading = keyword.startswith("*")
+    trailing = keyword.endswith("*") and len(keyword) > 1
+    literal = keyword[1 if leading else 0:len(keyword) - 1 if trailing else len(keyword)]
+    return literal, leading, trailing
+
+
+def translate_regex(pattern: str) -> str:
+    """Rewrite Rust-regex syntax that Python's `re` spells differently."""
+    pattern = re.sub(r"\\u\{([0-9a-fA-F]{1,6})\}", lambda m: f"\\U{int(m.group(1), 16):08x}", pattern)
+    flags = ""
+    match = re.match(r"^\(\?([a-zA-Z]+)\)", pattern)
+    while match:
+        flags += match.group(1)
+        pattern = pattern[match.end():]
+        match = re.match(r"^\(\?([a-zA-Z]+)\)", pattern)
+    # Global flags have to lead the whole expression in Python, so scope them instead
+    return f"(?{flags}:{pattern})" if flags else pattern
+
+
+def combine_regex(patterns: list):
+    """Return (compiled alternation or None, kept patterns, {pattern: error} for skipped ones)."""
+    kept, skipped = [], {}
+    for pattern in patterns:
+        translated = translate_regex(pattern)
+        try:
+            re.compile(translated)
+        except re.error as e:
+            skipped[pattern] = str(e)
+            continue
+        kept.append((pattern, translated))
+    if not kept:
+        return None, [], skipped
+    combined = "|".join(f"(?P<r{i}>{translated})" for i, (_, translated) in enumerate(kept))
+    return re.compile(combined, re.IGNORECASE), [pattern for pattern, _ in kept], skipped
+
+
+# === Compiled preset ===
+class CompiledPreset:
+    def __init__(self, preset: dict):
+        entries = []
+        for kind, keywords in ((BLOCK, preset.get("keyword_filter", [])), (ALLOW, preset.get("allowed_keywords", []))):
+            for keyword in keywords:
+                literal, leading, trailing = parse_keyword(keyword)
+                entries.append((literal, (kind, keyword, leading, trailing)))
+        self.automaton = AhoCorasick(entries)
+        self.regex, self.regex_patterns, self.skipped = combine_regex(preset.get("regex_patterns", []))
+        self.keyword_count = len(entries)
+
+    def scan(self, text: str) -> list:
+        """Return every blocking Hit in `text`, after the allow list is applied."""
+        lowered = text.lower()
+        size = len(lowered)
+        hits, allowed = [], []
+
+        for start, end, (kind, keyword, leading, trailing) in self.automaton.iter(lowered):
+            # A side without a wildcard must sit on a word boundary
+            if not leading and start > 0 and _is_word(lowered[start - 1]):
+                continue
+            if not trailing and end < size and _is_word(lowered[end]):
+                continue
+            if kind == ALLOW:
+                # Wildcards in the allow list cover the rest of the token
+                if leading:
+                    while start > 0 and not lowered[start - 1].isspace():
+                        start -= 1
+                if trailing:
+                    while end < size and not lowered[end].isspace():
+                        end += 1
+                allowed.append((start, end))
+            else:
+                hits.append(Hit(BLOCK, keyword, start, end, lowered[start:end]))
+
+        if self.regex is not None:
+            for match in self.regex.finditer(text):
+                pattern = self.regex_patterns[int(match.lastgroup[1:])]
+                hits.append(Hit("regex", pattern, match.start(), match.end(), match.group(0)))
+
+        if allowed:
+            hits = [h for h in hits if not any(a <= h.start and h.end <= b for a, b in allowed)]
+        return hits
+
+    def matches(self, text: str) -> bool:
+        return bool(self.scan(text))
+
+
+def compile_preset(preset: dict) -> CompiledPreset:
+    """Compiled engine for `preset`, cached by the preset's content hash."""
+    key = hash_preset(preset)
+    compiled = _cache.get(key)
+    if compiled is None:
+        if len(_cache) >= MAX_CACHED:
+            _cache.pop(next(iter(_cache)))
+        compiled = _cache[key] = CompiledPreset(preset)
+    return compiled
+
+
+def timed_scan(preset: dict, text: str):
+    """Scan `text` and return (hits, compiled preset, elapsed microseconds)."""
+    started = time.perf_counter()
+    compiled = compile_preset(preset)
+    hits = compiled.scan(text)
+    return hits, compiled, (time.perf_counter() - started) * 1_000_000
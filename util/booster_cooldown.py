@@ -1,45 +1,147 @@
+import asyncio
 import discord
 from discord.ext import commands
 import time
+from collections import OrderedDict, deque
 from typing import Literal
+from util.database import get_db
 
 SUPPORT_SERVER_ID = 1290420853926002789
+BOOSTER_DISCOUNT = 0.7
 
 BUCKET_TYPES = {
     "user": lambda interaction: interaction.user.id,
     "guild": lambda interaction: interaction.guild.id if interaction.guild else interaction.user.id,
 }
 
+# === Booster status cache ===
+# Support-server boost status, cached per user. Members missing from the
+# cache are fetched one at a time over REST rather than chunking the whole
+# support server inline; the fetch is capped at BOOSTER_FETCH_TIMEOUT so the
+# commands that check it still answer within Discord's 3 second deadline.
+# Entries are dropped when the member changes in the support server, and
+# expire after BOOSTER_TTL anyway in case an event was missed.
+
+BOOSTER_TTL = 600
+BOOSTER_CACHE_SIZE = 10000
+BOOSTER_FETCH_TIMEOUT = 1.0
+
+
+class BoosterStatusCache:
+    def __init__(self, guild_id: int = SUPPORT_SERVER_ID):
+        self.guild_id = guild_id
+        self._cache = OrderedDict()  # user_id -> (is_booster, cached_at)
+        self._attached = set()
+
+    def attach(self, bot):
+        """Listen for member changes in the support server; safe to call repeatedly."""
+        if id(bot) in self._attached:
+            return
+        self._attached.add(id(bot))
+        bot.add_listener(self._on_member_update, "on_member_update")
+        bot.add_listener(self._on_member_change, "on_member_join")
+        bot.add_listener(self._on_member_change, "on_member_remove")
+
+    async def _on_member_update(self, before, after):
+        await self._on_member_change(after)
+
+    async def _on_member_change(self, member):
+        if member.guild.id == self.guild_id:
+            self._cache.pop(member.id, None)
+
+    async def is_booster(self, client, user_id: int) -> bool:
+        now = time.monotonic()
+        cached = self._cache.get(user_id)
+        if cached is not None and now - cached[1] < BOOSTER_TTL:
+            return cached[0]
+
+        guild = client.get_guild(self.guild_id)
+        if guild is None:
+            return False
+        member = guild.get_member(user_id)
+        if member is None:
+            try:
+                member = await asyncio.wait_for(guild.fetch_member(user_id), timeout=BOOSTER_FETCH_TIMEOUT)
+            except discord.NotFound:
+                member = None  # not in the support server
+            except (discord.HTTPException, asyncio.TimeoutError):
+                return False  # not cached; ask again next time
+        boosting = bool(member and member.premium_since)
+        self._cache[user_id] = (boosting, now)
+        self._cache.move_to_end(user_id)
+        if len(self._cache) > BOOSTER_CACHE_SIZE:
+            self._cache.popitem(last=False)
+        return boosting
+
+
+booster_status = BoosterStatusCache()
+RELOAD_KEEP = ("booster_status",)
+
+
+# === Cooldowns ===
+# Each key holds a ring buffer of its last `rate` uses (deque with maxlen), so
+# a check is O(1) and never rebuilds a list. Keys are kept in last-use order;
+# once the oldest key has been idle longer than `per` it can no longer limit
+# anyone and is evicted, which keeps memory proportional to recently active
+# users rather than everyone ever seen.
+#
+# With `persist_as`, the buffers live in the shared database instead, keyed by
+# that name: they survive restarts and a user's cooldown holds in every
+# cluster. Idle keys are evicted there the same way.
+
 class BoosterCooldownManager:
-    def __init__(self, rate: int, per: float, bucket_type: Literal["user", "guild"] = "user"):
+    def __init__(self, rate: int, per: float, bucket_type: Literal["user", "guild"] = "user", persist_as: str = None):
         self.rate = rate
         self.per = per
         self.bucket_type = bucket_type
-        self.cooldowns = {}  # key -> [timestamps]
+        self.cooldowns = OrderedDict()  # key -> deque of timestamps, least recently used first
+        self.persist_as = persist_as
+        self._db = get_db() if persist_as else None
 
     def _get_key(self, interaction: discord.Interaction):
         return BUCKET_TYPES[self.bucket_type](interaction)
 
-    async def get_remaining(self, interaction: discord.Interaction) -> float:
-        key = self._get_key(interaction)
-        now = time.time()
+    def _evict(self, now: float):
+        while self.cooldowns:
+            key, timestamps = next(iter(self.cooldowns.items()))
+            if timestamps and now - timestamps[-1] < self.per:
+                break
+            del self.cooldowns[key]
 
-        # Get member for booster check
-        guild = interaction.client.get_guild(SUPPORT_SERVER_ID)
-        member = guild.get_member(interaction.user.id) if guild else None
-        cooldown_period = self.per * 0.7 if member and member.premium_since else self.per
+    def remaining_for(self, key, cooldown_period: float, now: float = None) -> float:
+        now = time.time() if now is None else now
+        if self._db is not None:
+            timestamps = self._db.get_cooldown(self.persist_as, key)
+        else:
+            timestamps = self.cooldowns.get(key)
+        if timestamps is None or len(timestamps) < self.rate:
+            return 0.0
+        return max(0.0, cooldown_period - (now - timestamps[0]))
 
-        timestamps = self.cooldowns.get(key, [])
-        # Filter timestamps still within cooldown period
-        valid = [t for t in timestamps if now - t < cooldown_period]
-        self.cooldowns[key] = valid
+    async def get_remaining(self, interaction: discord.Interaction) -> float:
+        booster_status.attach(interaction.client)
+        cooldown_period = self.per
+        if await booster_status.is_booster(interaction.client, interaction.user.id):
+            cooldown_period *= BOOSTER_DISCOUNT
+        return self.remaining_for(self._get_key(interaction), cooldown_period)
 
-        if len(valid) >= self.rate:
-            return cooldown_period - (now - valid[0])
+    def record(self, key, now: float = None):
+        now = time.time() if now is None else now
+        if self._db is not None:
+            self._db.record_cooldown(self.persist_as, key, now, self.rate, self.per)
+            return
+        timestamps = self.cooldowns.get(key)
+        if timestamps is None:
+            timestamps = self.cooldowns[key] = deque(maxlen=self.rate)
         else:
-            return 0.0
+            self.cooldowns.move_to_end(key)
+        timestamps.append(now)
+        self._evict(now)
 
     async def trigger(self, interaction: discord.Interaction):
-        key = self._get_key(interaction)
-        now = time.time()
-        self.cooldowns.setdefault(key, []).append(now)
+        self.record(self._get_key(interaction))
+
+    def __len__(self):
+        if self._db is not None:
+            return self._db.count_cooldowns(self.persist_as)
+        return len(self.cooldowns)
@@ -0,0 +1,119 @@
+import ast
+import asyncio
+import json
+import os
+import discord
+
+# === Intents and cache policy ===
+# Instead of Intents.all(), the bot asks for `guilds` plus whatever the cogs
+# declare in a module-level `INTENTS = ("members", ...)`. Declarations are read
+# from the source with ast, so nothing is imported before the client exists.
+# data/cache_policy.json can force intents on or off, switch member-cache
+# flags off, and size the message cache:
+#
+#   {"intents": {"presences": false}, "member_cache": {"voice": false},
+#    "max_messages": null, "chunk_guilds_at_startup": false}
+#
+# Guilds are not chunked at startup. Code that needs a guild's full member
+# list calls `ensure_chunked(bot, guild)` first; the chunk is requested once
+# and the cache is then kept current by member events. Code that only needs a
+# handful of members (leaderboard names, one booster) asks for just those
+# with `guild.query_members(user_ids=...)` or `fetch_member` instead.
+
+POLICY_FILE = "data/cache_policy.json"
+BASE_INTENTS = ("guilds",)
+
+DEFAULT_POLICY = {
+    "intents": {},
+    "member_cache": {},
+    "max_messages": None,
+    "chunk_guilds_at_startup": False,
+}
+
+_chunk_locks = {}
+RELOAD_KEEP = ("_chunk_locks",)
+
+
+def load_policy(path: str = POLICY_FILE) -> dict:
+    policy = dict(DEFAULT_POLICY)
+    if os.path.exists(path):
+        with open(path, "r", encoding="utf-8") as f:
+            policy.update(json.load(f))
+    return policy
+
+
+def declared_intents(path: str) -> tuple:
+    """The `INTENTS` tuple assigned at module level in the file at `path`, or ()."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    for node in tree.body:
+        if isinstance(node, ast.Assign) and any(isinstance(t, ast.Name) and t.id == "INTENTS" for t in node.targets):
+            return tuple(ast.literal_eval(node.value))
+    return ()
+
+
+def build_intents(extensions: list, overrides: dict = None) -> tuple:
+    """Intents for `extensions` (dotted names) plus `overrides`; returns (intents, {flag: [who asked]})."""
+    wanted = {name: ["base"] for name in BASE_INTENTS}
+    for extension in extensions:
+        path = extension.replace(".", os.sep) + ".py"
+        try:
+            names = declared_intents(path)
+        except (OSError, SyntaxError, ValueError):
+            continue
+        for name in names:
+            wanted.setdefault(name, []).append(extension.split(".")[-1])
+
+    intents = discord.Intents.none()
+    for name in wanted:
+        setattr(intents, name, True)
+    for name, enabled in (overrides or {}).items():
+        setattr(intents, name, enabled)
+        if enabled:
+            wanted.setdefault(name, []).append("config")
+        else:
+            wanted.pop(name, None)
+    return intents, wanted
+
+
+def build_member_cache(intents: discord.Intents, overrides: dict = None) -> discord.MemberCacheFlags:
+    """Everything the intents allow, minus the flags switched off in `overrides`."""
+    flags = discord.MemberCacheFlags.from_intents(intents)
+    for name, enabled in (overrides or {}).items():
+        setattr(flags, name, enabled and getattr(flags, name))
+    return flags
+
+
+def build_client_kwargs(extensions: list, policy: dict = None) -> dict:
+    """Keyword arguments for the client constructor under the configured policy."""
+    policy = load_policy() if policy is None else policy
+    intents, _ = build_intents(extensions, policy["intents"])
+    return {
+        "intents": intents,
+        "member_cache_flags": build_member_cache(intents, policy["member_cache"]),
+        "max_messages": policy["max_messages"],
+        "chunk_guilds_at_startup": policy["chunk_guilds_at_startup"],
+    }
+
+
+def describe(client) -> str:
+    intents = [name for name, enabled in client.intents if enabled]
+    flags = [name for name, enabled in client._connection.member_cache_flags if enabled]
+    max_messages = client._connection.max_messages
+    return (f"Intents: {', '.join(intents)} · member cache: {', '.join(flags) or 'off'} · "
+            f"message cache: {max_messages if max_messages else 'off'}")
+
+
+# === On-demand chunking ===
+async def ensure_chunked(bot, guild) -> bool:
+    """Fetch `guild`'s full member list once. Returns False if the members intent is off."""
+    if guild is None or guild.chunked:
+        return guild is not None
+    if not bot.intents.members:
+        return False
+    lock = _chunk_locks.setdefault(guild.id, asyncio.Lock())
+    async with lock:
+        if not guild.chunked:
+            await guild.chunk(cache=True)
+    _chunk_locks.pop(guild.id, None)
+    return True
@@ -0,0 +1,206 @@
+import asyncio
+import itertools
+import json
+import logging
+import os
+
+log = logging.getLogger(__name__)
+
+# === Cluster IPC ===
+# In cluster mode (see launcher.py) every worker process owns a range of
+# shards and keeps a connection to the launcher's hub on localhost. A query is
+# sent to the hub, fanned out to every cluster (including the sender), and
+# the per-cluster answers come back as a list. Without a launcher, queries are
+# answered locally and still return a one-element list, so callers never need
+# to care which mode they're in.
+#
+# Wire format: one JSON object per line.
+#   worker -> hub   {"op": "hello", "cluster": 0}
+#   worker -> hub   {"op": "query", "id": 1, "name": "guild_count", "args": {}}
+#   hub -> worker   {"op": "ask", "id": 7, "name": "guild_count", "args": {}}
+#   worker -> hub   {"op": "answer", "id": 7, "result": 123}
+#   hub -> worker   {"op": "result", "id": 1, "results": [123, 456]}
+
+IPC_HOST = "127.0.0.1"
+QUERY_TIMEOUT = 3.0
+RECONNECT_DELAY = 5.0
+STREAM_LIMIT = 2 ** 22
+
+HANDLERS = {}
+
+
+def cluster_query(name: str):
+    """Register `func(bot, **args)` as the local answer to the cluster query `name`."""
+    def decorator(func):
+        HANDLERS[name] = func
+        return func
+    return decorator
+
+
+@cluster_query("guild_count")
+def _guild_count(bot):
+    return len(bot.guilds)
+
+
+@cluster_query("user_count")
+def _user_count(bot):
+    return len(bot.users)
+
+
+async def _send(writer, message: dict):
+    writer.write(json.dumps(message, separators=(",", ":")).encode() + b"\n")
+    await writer.drain()
+
+
+# === Worker side ===
+class ClusterClient:
+    def __init__(self, bot):
+        self.bot = bot
+        self.cluster_id = int(os.getenv("CLUSTER_ID", "0"))
+        self.cluster_count = int(os.getenv("CLUSTER_COUNT", "1"))
+        port = os.getenv("CLUSTER_IPC_PORT")
+        self.port = int(port) if port else None
+        self._writer = None
+        self._task = None
+        self._ids = itertools.count(1)
+        self._waiting = {}
+
+    @property
+    def clustered(self) -> bool:
+        return self.port is not None
+
+    @property
+    def is_primary(self) -> bool:
+        """Cluster 0 does once-per-application work such as the global command sync."""
+        return self.cluster_id == 0
+
+    def start(self):
+        if self.clustered and self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+
+    async def _run(self):
+        while True:
+            try:
+                reader, writer = await asyncio.open_connection(IPC_HOST, self.port, limit=STREAM_LIMIT)
+                self._writer = writer
+                await _send(writer, {"op": "hello", "cluster": self.cluster_id})
+                while line := await reader.readline():
+                    await self._handle(json.loads(line))
+            except (OSError, asyncio.IncompleteReadError, json.JSONDecodeError) as e:
+                log.warning("Cluster %d: IPC connection lost: %s", self.cluster_id, e)
+            self._writer = None
+            for future in self._waiting.values():
+                if not future.done():
+                    future.set_exception(ConnectionResetError("IPC connection lost"))
+            self._waiting.clear()
+            await asyncio.sleep(RECONNECT_DELAY)
+
+    async def _handle(self, message: dict):
+        if message["op"] == "ask":
+            try:
+                result = self.answer(message["name"], message.get("args", {}))
+            except Exception as e:
+                log.exception("Cluster %d: query %s failed: %s", self.cluster_id, message["name"], e)
+                result = None
+            await _send(self._writer, {"op": "answer", "id": message["id"], "result": result})
+        elif message["op"] == "result":
+            future = self._waiting.pop(message["id"], None)
+            if future is not None and not future.done():
+                future.set_result(message["results"])
+
+    def answer(self, name: str, args: dict):
+        return HANDLERS[name](self.bot, **args)
+
+    async def query(self, name: str, **args) -> list:
+        """Answers to `name` from every reachable cluster; just this one when standalone."""
+        if self._writer is None:
+            return [self.answer(name, args)]
+        query_id = next(self._ids)
+        future = self._waiting[query_id] = asyncio.get_running_loop().create_future()
+        try:
+            await _send(self._writer, {"op": "query", "id": query_id, "name": name, "args": args})
+            results = await asyncio.wait_for(future, timeout=QUERY_TIMEOUT)
+        except (OSError, asyncio.TimeoutError):
+            self._waiting.pop(query_id, None)
+            return [self.answer(name, args)]
+        return [result for result in results if result is not None]
+
+
+def get_cluster(bot) -> ClusterClient:
+    cluster = getattr(bot, "cluster", None)
+    if cluster is None:
+        cluster = bot.cluster = ClusterClient(bot)
+    return cluster
+
+
+# === Launcher side ===
+class ClusterHub:
+    def __init__(self, port: int):
+        self.port = port
+        self.clusters = {}   # cluster id -> writer
+        self._ids = itertools.count(1)
+        self._pending = {}   # ask id -> answers so far, expected count, done event
+        self._server = None
+
+    async def start(self):
+        self._server = await asyncio.start_server(self._serve, IPC_HOST, self.port, limit=STREAM_LIMIT)
+
+    async def close(self):
+        if self._server is not None:
+            self._server.close()
+            await self._server.wait_closed()
+
+    async def _serve(self, reader, writer):
+        cluster_id = None
+        try:
+            while line := await reader.readline():
+                message = json.loads(line)
+                op = message["op"]
+                if op == "hello":
+                    cluster_id = message["cluster"]
+                    self.clusters[cluster_id] = writer
+                elif op == "query":
+                    asyncio.create_task(self._broadcast(writer, message))
+                elif op == "answer":
+                    pending = self._pending.get(message["id"])
+                    if pending is not None:
+                        pending["results"][cluster_id] = message["result"]
+                        if len(pending["results"]) >= pending["expected"]:
+                            pending["done"].set()
+        except (OSError, asyncio.IncompleteReadError, json.JSONDecodeError):
+            pass
+        finally:
+            if cluster_id is not None and self.clusters.get(cluster_id) is writer:
+                del self.clusters[cluster_id]
+            writer.close()
+
+    async def _broadcast(self, origin, message: dict):
+        ask_id = next(self._ids)
+        targets = dict(self.clusters)
+        pending = self._pending[ask_id] = {"results": {}, "expected": len(targets), "done": asyncio.Event()}
+        ask = {"op": "ask", "id": ask_id, "name": message["name"], "args": message.get("args", {})}
+        for writer in targets.values():
+            try:
+                await _send(writer, ask)
+            except OSError:
+                pending["expected"] -= 1
+        if len(pending["results"]) >= pending["expected"]:
+            pending["done"].set()
+        try:
+            await asyncio.wait_for(pending["done"].wait(), timeout=QUERY_TIMEOUT - 0.5)
+        except asyncio.TimeoutError:
+            pass  # answer with whatever arrived
+        del self._pending[ask_id]
+        results = [pending["results"][cid] for cid in sorted(pending["results"])]
+        try:
+            await _send(origin, {"op": "result", "id": message["id"], "results": results})
+        except OSError:
+            pass
@@ -1,87 +1,144 @@
-import json
-import os
+import asyncio
 import discord
+import logging
+import time
+from collections import namedtuple
+from concurrent.futures import ThreadPoolExecutor
 from functools import wraps
+from util.database import get_db
+from util.command_sync import get_sync_manager
+from util.cluster import cluster_query, get_cluster
 
-CONFIG_FILE = "data/guildConf.json"
+log = logging.getLogger(__name__)
+
+CacheInfo = namedtuple("CacheInfo", ["hits", "misses", "guilds", "checks", "avg_check_us"])
 
 # -------------------------------
-# Core Configuration I/O
+# Process-wide Config Cache
 # -------------------------------
 
-def load_config():
-    """Loads or creates the guildConf.json file."""
-    if not os.path.exists(CONFIG_FILE):
-        with open(CONFIG_FILE, "w") as f:
-            json.dump({"Servers": {}}, f, indent=4)
-    with open(CONFIG_FILE, "r") as f:
-        return json.load(f)
-
-def save_config(config):
-    """Saves the current config to the file."""
-    with open(CONFIG_FILE, "w") as f:
-        json.dump(config, f, indent=4)
-
-def ensure_guild_config_structure(config: dict) -> dict:
-    """Ensures all guilds have DevOnly and UnderMaintenance keys."""
-    for guild_id, guild_conf in config["Servers"].items():
-        guild_conf.setdefault("DevOnly", {})
-        guild_conf.setdefault("UnderMaintenance", {})
-    return config
+class GuildConfigCache:
+    """Holds every guild's command settings in memory; writes go to SQLite in the background."""
+
+    def __init__(self):
+        self.configs = None
+        self.hits = 0
+        self.misses = 0
+        self.checks = 0
+        self.check_ns = 0
+        self._stale = set()  # guilds to re-read from SQLite (failed write, or changed by another cluster)
+        self.on_written = None  # called with the guild ID once a write is in SQLite
+        # One worker keeps writes in the order they were made
+        self._writer = ThreadPoolExecutor(max_workers=1, thread_name_prefix="guildconf-writer")
+
+    def get(self, guild_id: int) -> dict:
+        if self.configs is None:
+            self.configs = get_db().get_all_command_config()
+            self.misses += 1
+        if self._stale and int(guild_id) in self._stale:
+            self._stale.discard(int(guild_id))
+            self.configs[int(guild_id)] = get_db().get_command_config(guild_id)
+            self.misses += 1
+            return self.configs[int(guild_id)]
+        conf = self.configs.get(int(guild_id))
+        if conf is None:
+            conf = self.configs[int(guild_id)] = {"DevOnly": {}, "UnderMaintenance": {}}
+            self.misses += 1
+        else:
+            self.hits += 1
+        return conf
+
+    def set(self, guild_id: int, command_name: str, value: bool, category: str = "General"):
+        conf = self.get(guild_id)
+        if category in ("DevOnly", "UnderMaintenance"):
+            conf[category][command_name] = value
+        else:
+            category = "General"
+            conf[command_name] = value
+
+        db = get_db()
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            db.set_command_config(guild_id, command_name, value, category)
+            return
+        write = loop.run_in_executor(self._writer, db.set_command_config, guild_id, command_name, value, category)
+        write.add_done_callback(lambda future: self._written(future, guild_id, command_name))
+
+    def _written(self, future: asyncio.Future, guild_id: int, command_name: str):
+        error = "cancelled" if future.cancelled() else future.exception()
+        if error is None:
+            if self.on_written is not None:
+                self.on_written(guild_id)
+            return
+        # The cache already shows the change; drop it so the next check reads what SQLite really has
+        log.error("Saving %s for guild %s failed: %s", command_name, guild_id, error)
+        self.invalidate(guild_id)
+
+    def invalidate(self, guild_id: int):
+        """Re-read the guild's settings from SQLite on its next check."""
+        self._stale.add(int(guild_id))
+
+    def info(self) -> CacheInfo:
+        avg = (self.check_ns / self.checks / 1000) if self.checks else 0.0
+        return CacheInfo(self.hits, self.misses, len(self.configs or {}), self.checks, round(avg, 2))
+
+
+guild_config_cache = GuildConfigCache()
+_hidden = {}  # guild_id -> {name: command} pulled from that guild's tree while disabled
+RELOAD_KEEP = ("guild_config_cache", "_hidden")
+
+
+# Each cluster caches every guild's settings, so a change is announced to the others
+@cluster_query("guild_config_changed")
+def _guild_config_changed(bot, guild_id: int, origin: int):
+    if origin != get_cluster(bot).cluster_id:
+        guild_config_cache.invalidate(guild_id)
+    return True
+
+
+def share_config_changes(bot):
+    """In cluster mode, have every other cluster re-read a guild's settings once a change is saved."""
+    cluster = get_cluster(bot)
+    if cluster.clustered:
+        guild_config_cache.on_written = lambda guild_id: asyncio.create_task(
+            cluster.query("guild_config_changed", guild_id=int(guild_id), origin=cluster.cluster_id)
+        )
 
 # -------------------------------
 # Guild Config Accessors
 # -------------------------------
 
 def get_guild_config(guild_id: int):
-    """Returns the guild's command settings, initializes if missing."""
-    config = load_config()
-    config = ensure_guild_config_structure(config)
-
-    if str(guild_id) not in config["Servers"]:
-        config["Servers"][str(guild_id)] = {"DevOnly": {}, "UnderMaintenance": {}}
-        save_config(config)
-
-    return config["Servers"][str(guild_id)]
+    """Returns the guild's command settings (DevOnly, UnderMaintenance and per-command flags)."""
+    return guild_config_cache.get(guild_id)
 
 def is_command_enabled(guild_id: int, command_name: str) -> bool:
     """Checks if a command is enabled for the guild."""
     guild_config = get_guild_config(guild_id)
-    if command_name in guild_config.get("UnderMaintenance", {}):
+    if command_name in guild_config["UnderMaintenance"]:
         return False
     return guild_config.get(command_name, True)
 
 def toggle_command(guild_id: int, command_name: str, value: bool, category: str = "General"):
     """Enables or disables a command for the server with category handling."""
-    config = load_config()
-    config = ensure_guild_config_structure(config)
-
-    if str(guild_id) not in config["Servers"]:
-        config["Servers"][str(guild_id)] = {"DevOnly": {}, "UnderMaintenance": {}}
-
-    if category == "DevOnly":
-        config["Servers"][str(guild_id)]["DevOnly"][command_name] = value
-    elif category == "UnderMaintenance":
-        config["Servers"][str(guild_id)]["UnderMaintenance"][command_name] = value
-    else:
-        config["Servers"][str(guild_id)][command_name] = value
-
-    save_config(config)
+    guild_config_cache.set(guild_id, command_name, value, category)
 
 def update_commands_for_guild(bot: discord.Client, guild_id: int):
-    """Syncs the command tree with the server's settings."""
-    config = load_config()
-    config = ensure_guild_config_structure(config)
-    guild_config = get_guild_config(guild_id)
-
-    for cmd in bot.tree.get_commands():
+    """Applies the server's settings to its guild commands and queues a (debounced) guild sync.
+    Global commands stay registered everywhere; command_enabled() blocks them at runtime."""
+    guild = discord.Object(id=guild_id)
+    hidden = _hidden.setdefault(guild_id, {})
+    for cmd in bot.tree.get_commands(guild=guild):
         if not is_command_enabled(guild_id, cmd.name):
-            bot.tree.remove_command(cmd.name)
-        else:
-            if cmd.name not in [command.name for command in bot.tree.commands]:
-                bot.tree.add_command(cmd)
+            bot.tree.remove_command(cmd.name, guild=guild)
+            hidden[cmd.name] = cmd
+    for name, cmd in list(hidden.items()):
+        if is_command_enabled(guild_id, name):
+            bot.tree.add_command(cmd, guild=guild)
+            del hidden[name]
 
-    bot.tree.sync(guild=discord.Object(id=guild_id))
+    get_sync_manager(bot).schedule_guild(guild_id)
 
 # -------------------------------
 # Decorators
@@ -95,7 +152,11 @@ def command_enabled():
                 return await interaction.response.send_message(
                     "This command can only be used in a server.", ephemeral=True
                 )
-            if not is_command_enabled(interaction.guild_id, func.__name__):
+            started = time.perf_counter_ns()
+            enabled = is_command_enabled(interaction.guild_id, func.__name__)
+            guild_config_cache.checks += 1
+            guild_config_cache.check_ns += time.perf_counter_ns() - started
+            if not enabled:
                 return await interaction.response.send_message(
                     "❌ This command is disabled in this server.", ephemeral=True
                 )
@@ -103,6 +164,8 @@ def command_enabled():
         return wrapper
     return decorator
 
+command_enabled.cache_info = lambda: guild_config_cache.info()
+
 def dev_only_command():
     def decorator(func):
         @wraps(func)
@@ -0,0 +1,90 @@
+import asyncio
+import hashlib
+import json
+import discord
+from util.database import get_db
+
+# === Slash command sync ===
+# The tree is serialized the same way discord.py uploads it, hashed, and
+# compared with the hash stored for the last successful sync. Identical
+# payloads are never re-uploaded, so reconnects cost nothing. Guild syncs are
+# queued and flushed after a debounce, so a burst of toggles for one or many
+# guilds turns into one upload per guild. Hashes are read from the shared
+# database every time, so a sync done by one cluster is seen by the others.
+
+GUILD_DEBOUNCE = 5.0
+
+
+def tree_payload(tree, guild=None) -> list:
+    commands = tree.get_commands(guild=guild)
+    payload = [command.to_dict(tree) for command in commands]
+    return sorted(payload, key=lambda c: (c.get("type", 1), c["name"]))
+
+
+def payload_hash(payload: list) -> str:
+    return hashlib.sha256(json.dumps(payload, sort_keys=True, separators=(",", ":")).encode()).hexdigest()
+
+
+class CommandSyncManager:
+    def __init__(self, bot, debounce: float = GUILD_DEBOUNCE):
+        self.bot = bot
+        self.debounce = debounce
+        self.db = get_db()
+        self.skipped = 0
+        self.synced = 0
+        self._pending = set()
+        self._flush_task = None
+        self._lock = asyncio.Lock()
+
+    # === Global ===
+    async def sync_global(self, force: bool = False):
+        """Sync global commands if they changed. Returns the synced list, or None when skipped."""
+        async with self._lock:
+            digest = payload_hash(tree_payload(self.bot.tree))
+            if not force and self.db.get_sync_hash(self.bot.application_id) == digest:
+                self.skipped += 1
+                return None
+            synced = await self.bot.tree.sync()
+            self.db.set_sync_hash(self.bot.application_id, digest)
+            self.synced += 1
+            return synced
+
+    # === Per-guild ===
+    def schedule_guild(self, guild_id: int):
+        """Queue a guild sync; everything queued within `debounce` seconds goes out together."""
+        self._pending.add(guild_id)
+        if self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+
+    async def _flush_later(self):
+        await asyncio.sleep(self.debounce)
+        await self.flush_guilds()
+
+    async def flush_guilds(self) -> dict:
+        """Sync every queued guild whose payload changed; returns {guild_id: status}."""
+        pending, self._pending = self._pending, set()
+        results = {}
+        async with self._lock:
+            for guild_id in sorted(pending):
+                guild = discord.Object(id=guild_id)
+                digest = payload_hash(tree_payload(self.bot.tree, guild=guild))
+                if self.db.get_sync_hash(self.bot.application_id, guild_id) == digest:
+                    self.skipped += 1
+                    results[guild_id] = "unchanged"
+                    continue
+                try:
+                    await self.bot.tree.sync(guild=guild)
+                except discord.HTTPException as e:
+                    results[guild_id] = f"failed: {e}"
+                    continue
+                self.db.set_sync_hash(self.bot.application_id, digest, guild_id)
+                self.synced += 1
+                results[guild_id] = "synced"
+        return results
+
+
+def get_sync_manager(bot) -> CommandSyncManager:
+    manager = getattr(bot, "command_sync", None)
+    if manager is None:
+        manager = bot.command_sync = CommandSyncManager(bot)
+    return manager
@@ -0,0 +1,729 @@
+import json
+import logging
+import os
+import re
+import sqlite3
+import threading
+import time
+from contextlib import contextmanager
+from datetime import datetime, timezone
+
+log = logging.getLogger(__name__)
+
+# === SQLite storage for moderation data and guild command config ===
+# One WAL-mode database shared by the moderation, helper and command-check
+# code paths. Every lookup goes through an index keyed by guild (and user).
+#
+# Warnings carry epoch `created_at`/`expires_at` columns; `expires_at` is
+# indexed so the expiry worker only ever reads rows that are already due.
+# `expires_at` is NULL for warnings that never expire (retention 0, or a
+# legacy timestamp that couldn't be parsed).
+#
+# Royale stats, the knockout deathlog, persisted cooldowns, the command sync
+# hashes and the per-key stores (util/json_store.py) live here too, so every
+# cluster started by launcher.py reads and writes the same rows. Anything that
+# reads a row and writes it back does so inside transaction(), which takes
+# SQLite's write lock up front so two processes can't interleave.
+
+DB_FILE = "data/nari.db"
+LEGACY_WARN_FILE = "data/warns.json"
+LEGACY_LOG_FILE = "data/modlogs.json"
+LEGACY_CONFIG_FILE = "data/guildConf.json"
+LEGACY_STATS_FILE = "data/royal_stats.json"
+LEGACY_DEATHLOG_FILE = "data/deathlog.json"
+LEGACY_COOLDOWN_FILE = "data/cooldowns.json"
+LEGACY_SYNC_FILE = "data/command_sync.json"
+LEGACY_APPLIED_FILE = "data/applied_presets.json"
+DEFAULT_WARN_RETENTION_DAYS = 30
+DAY = 86400
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS meta (
+    key TEXT PRIMARY KEY,
+    value TEXT
+);
+CREATE TABLE IF NOT EXISTS warnings (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    reason TEXT NOT NULL,
+    moderator TEXT NOT NULL,
+    timestamp TEXT NOT NULL,
+    created_at INTEGER,
+    expires_at INTEGER
+);
+CREATE INDEX IF NOT EXISTS idx_warnings_member ON warnings (guild_id, user_id, id);
+CREATE TABLE IF NOT EXISTS warn_retention (
+    guild_id INTEGER PRIMARY KEY,
+    days INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS modlog_channels (
+    guild_id INTEGER PRIMARY KEY,
+    channel_id INTEGER NOT NULL,
+    webhook_url TEXT
+);
+CREATE TABLE IF NOT EXISTS command_config (
+    guild_id INTEGER NOT NULL,
+    category TEXT NOT NULL,
+    command_name TEXT NOT NULL,
+    value INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, category, command_name)
+);
+CREATE TABLE IF NOT EXISTS royale_players (
+    user_id INTEGER PRIMARY KEY,
+    kills INTEGER NOT NULL DEFAULT 0,
+    deaths INTEGER NOT NULL DEFAULT 0,
+    revives INTEGER NOT NULL DEFAULT 0,
+    failed_revives INTEGER NOT NULL DEFAULT 0,
+    xp INTEGER NOT NULL DEFAULT 0,
+    level INTEGER NOT NULL DEFAULT 1,
+    prestige INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS idx_royale_kills ON royale_players (kills DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_royale_level ON royale_players (level DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_royale_prestige ON royale_players (prestige DESC, user_id);
+CREATE INDEX IF NOT EXISTS idx_royale_xp ON royale_players (xp DESC, user_id);
+CREATE TABLE IF NOT EXISTS royale_guild_players (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE TABLE IF NOT EXISTS deathlog (
+    guild_id INTEGER NOT NULL,
+    user_id INTEGER NOT NULL,
+    entry TEXT NOT NULL,
+    expires_at REAL NOT NULL,
+    PRIMARY KEY (guild_id, user_id)
+);
+CREATE INDEX IF NOT EXISTS idx_deathlog_expiry ON deathlog (expires_at);
+CREATE TABLE IF NOT EXISTS cooldowns (
+    kind TEXT NOT NULL,
+    key INTEGER NOT NULL,
+    timestamps TEXT NOT NULL,
+    last_used REAL NOT NULL,
+    PRIMARY KEY (kind, key)
+);
+CREATE INDEX IF NOT EXISTS idx_cooldowns_idle ON cooldowns (kind, last_used);
+CREATE TABLE IF NOT EXISTS command_sync (
+    application_id INTEGER NOT NULL,
+    guild_id INTEGER NOT NULL,
+    hash TEXT NOT NULL,
+    PRIMARY KEY (application_id, guild_id)
+);
+CREATE TABLE IF NOT EXISTS store_entries (
+    namespace TEXT NOT NULL,
+    key TEXT NOT NULL,
+    value TEXT NOT NULL,
+    PRIMARY KEY (namespace, key)
+);
+"""
+
+CATEGORIES = ("General", "DevOnly", "UnderMaintenance")
+ROYALE_STATS = ("kills", "deaths", "revives", "failed_revives", "xp", "level", "prestige")
+ROYALE_SORT_KEYS = ("kills", "level", "prestige", "xp")
+
+_db = None
+_db_lock = threading.Lock()
+RELOAD_KEEP = ("_db", "_db_lock")
+
+
+class Database:
+    def __init__(self, path: str = DB_FILE):
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False, isolation_level=None)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.executescript(SCHEMA)
+        self._upgrade()
+        self.lock = threading.RLock()
+
+    def _upgrade(self):
+        """Add columns introduced after a database was first created."""
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(warnings)")}
+        for column in ("created_at", "expires_at"):
+            if column not in columns:
+                self.conn.execute(f"ALTER TABLE warnings ADD COLUMN {column} INTEGER")
+        columns = {row["name"] for row in self.conn.execute("PRAGMA table_info(modlog_channels)")}
+        if "webhook_url" not in columns:
+            self.conn.execute("ALTER TABLE modlog_channels ADD COLUMN webhook_url TEXT")
+        self.conn.execute("CREATE INDEX IF NOT EXISTS idx_warnings_expiry ON warnings (expires_at)")
+
+    def execute(self, sql: str, params=()):
+        with self.lock:
+            return self.conn.execute(sql, params)
+
+    @contextmanager
+    def transaction(self):
+        """BEGIN IMMEDIATE … COMMIT under the lock; rolls back if the block raises."""
+        with self.lock:
+            self.conn.execute("BEGIN IMMEDIATE")
+            try:
+                yield self.conn
+                self.conn.execute("COMMIT")
+            except BaseException:
+                self.conn.execute("ROLLBACK")
+                raise
+
+    def close(self):
+        with self.lock:
+            self.conn.close()
+
+    # === Meta ===
+    def get_meta(self, key: str, default=None):
+        row = self.execute("SELECT value FROM meta WHERE key = ?", (key,)).fetchone()
+        return row["value"] if row else default
+
+    def set_meta(self, key: str, value: str):
+        self.execute(
+            "INSERT INTO meta (key, value) VALUES (?, ?) ON CONFLICT(key) DO UPDATE SET value = excluded.value",
+            (key, value)
+        )
+
+    # === Warnings ===
+    def add_warning(self, guild_id: int, user_id: int, reason: str, moderator: str, created_at: float = None) -> int:
+        created_at = int(time.time() if created_at is None else created_at)
+        days = self.get_warn_retention(guild_id)
+        cur = self.execute(
+            "INSERT INTO warnings (guild_id, user_id, reason, moderator, timestamp, created_at, expires_at) "
+            "VALUES (?, ?, ?, ?, ?, ?, ?)",
+            (int(guild_id), int(user_id), reason, moderator,
+             datetime.fromtimestamp(created_at, timezone.utc).isoformat(), created_at,
+             created_at + days * DAY if days else None)
+        )
+        return cur.lastrowid
+
+    def get_warnings(self, guild_id: int, user_id: int) -> list:
+        rows = self.execute(
+            "SELECT * FROM warnings WHERE guild_id = ? AND user_id = ? ORDER BY id",
+            (int(guild_id), int(user_id))
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def get_guild_warnings(self, guild_id: int) -> list:
+        rows = self.execute(
+            "SELECT * FROM warnings WHERE guild_id = ? ORDER BY user_id, id", (int(guild_id),)
+        ).fetchall()
+        return [dict(row) for row in rows]
+
+    def delete_warnings(self, warning_ids) -> int:
+        ids = [(int(i),) for i in warning_ids]
+        if not ids:
+            return 0
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.executemany("DELETE FROM warnings WHERE id = ?", ids)
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return len(ids)
+
+    def clear_warnings(self, guild_id: int, user_id: int) -> int:
+        cur = self.execute(
+            "DELETE FROM warnings WHERE guild_id = ? AND user_id = ?", (int(guild_id), int(user_id))
+        )
+        return cur.rowcount
+
+    # === Warning expiry ===
+    def get_warn_retention(self, guild_id: int) -> int:
+        """Days a warning is kept in this guild; 0 means forever."""
+        row = self.execute("SELECT days FROM warn_retention WHERE guild_id = ?", (int(guild_id),)).fetchone()
+        return row["days"] if row else DEFAULT_WARN_RETENTION_DAYS
+
+    def set_warn_retention(self, guild_id: int, days: int) -> int:
+        """Store the guild's retention and re-date its existing warnings; returns how many were re-dated."""
+        with self.lock:
+            self.conn.execute("BEGIN")
+            try:
+                self.conn.execute(
+                    "INSERT INTO warn_retention (guild_id, days) VALUES (?, ?) "
+                    "ON CONFLICT(guild_id) DO UPDATE SET days = excluded.days",
+                    (int(guild_id), int(days))
+                )
+                cur = self.conn.execute(
+                    "UPDATE warnings SET expires_at = CASE WHEN ? > 0 THEN created_at + ? ELSE NULL END "
+                    "WHERE guild_id = ? AND created_at IS NOT NULL",
+                    (int(days), int(days) * DAY, int(guild_id))
+                )
+                self.conn.execute("COMMIT")
+            except Exception:
+                self.conn.execute("ROLLBACK")
+                raise
+        return cur.rowcount
+
+    def next_warning_expiry(self, shard_count: int = 1, shard_ids=None, exclude_guilds=()):
+        """Epoch of the earliest pending expiry in the given shards, or None."""
+        sql, params = "SELECT expires_at FROM warnings WHERE expires_at IS NOT NULL", []
+        sql, params = _shard_filter(sql, params, shard_count, shard_ids)
+        sql, params = _exclude_guilds(sql, params, exclude_guilds)
+        row = self.execute(sql + " ORDER BY expires_at LIMIT 1", params).fetchone()
+        return row["expires_at"] if row else None
+
+    def pop_expired_warnings(self, now: float, limit: int = 500, shard_count: int = 1, shard_ids=None,
+                             exclude_guilds=(), keep=None) -> list:
+        """
+        Delete and return up to `limit` warnings due at `now`, oldest expiry first.
+        With `keep`, rows whose guild_id it rejects are left in place.
+        """
+        sql, params = "SELECT * FROM warnings WHERE expires_at <= ?", [int(now)]
+        sql, params = _shard_filter(sql, params, shard_count, shard_ids)
+        sql, params = _exclude_guilds(sql, params, exclude_guilds)
+        with self.lock:
+            rows = [dict(row) for row in self.conn.execute(sql + " ORDER BY expires_at LIMIT ?", params + [limit])]
+            if keep is not None:
+                rows = [row for row in rows if keep(row["guild_id"])]
+            self.delete_warnings(row["id"] for row in rows)
+        return rows
+
+    # === Mod-log channels ===
+    def get_log_channel(self, guild_id: int):
+        row = self.execute(
+            "SELECT channel_id FROM modlog_channels WHERE guild_id = ?", (int(guild_id),)
+        ).fetchone()
+        return row["channel_id"] if row else None
+
+    def set_log_channel(self, guild_id: int, channel_id: int, webhook_url: str = None):
+        self.execute(
+            "INSERT INTO modlog_channels (guild_id, channel_id, webhook_url) VALUES (?, ?, ?) "
+            "ON CONFLICT(guild_id) DO UPDATE SET channel_id = excluded.channel_id, webhook_url = excluded.webhook_url",
+            (int(guild_id), int(channel_id), webhook_url)
+        )
+
+    def get_log_webhook(self, guild_id: int):
+        row = self.execute(
+            "SELECT webhook_url FROM modlog_channels WHERE guild_id = ?", (int(guild_id),)
+        ).fetchone()
+        return row["webhook_url"] if row else None
+
+    def set_log_webhook(self, guild_id: int, webhook_url: str = None):
+        self.execute(
+            "UPDATE modlog_channels SET webhook_url = ? WHERE guild_id = ?", (webhook_url, int(guild_id))
+        )
+
+    # === Guild command config ===
+    def get_command_config(self, guild_id: int) -> dict:
+        """Return the guild's settings in the legacy guildConf.json shape."""
+        conf = {"DevOnly": {}, "UnderMaintenance": {}}
+        rows = self.execute(
+            "SELECT category, command_name, value FROM command_config WHERE guild_id = ?", (int(guild_id),)
+        ).fetchall()
+        for row in rows:
+            if row["category"] == "General":
+                conf[row["command_name"]] = bool(row["value"])
+            else:
+                conf[row["category"]][row["command_name"]] = bool(row["value"])
+        return conf
+
+    def get_all_command_config(self) -> dict:
+        """Return every guild's settings keyed by guild ID."""
+        configs = {}
+        rows = self.execute("SELECT guild_id, category, command_name, value FROM command_config").fetchall()
+        for row in rows:
+            conf = configs.setdefault(row["guild_id"], {"DevOnly": {}, "UnderMaintenance": {}})
+            if row["category"] == "General":
+                conf[row["command_name"]] = bool(row["value"])
+            else:
+                conf[row["category"]][row["command_name"]] = bool(row["value"])
+        return configs
+
+    def set_command_config(self, guild_id: int, command_name: str, value: bool, category: str = "General"):
+        if category not in CATEGORIES:
+            category = "General"
+        self.execute(
+            "INSERT INTO command_config (guild_id, category, command_name, value) VALUES (?, ?, ?, ?) "
+            "ON CONFLICT(guild_id, category, command_name) DO UPDATE SET value = excluded.value",
+            (int(guild_id), category, command_name, int(bool(value)))
+        )
+
+    # === Royale players ===
+    def get_royale_player(self, user_id: int):
+        row = self.execute("SELECT * FROM royale_players WHERE user_id = ?", (int(user_id),)).fetchone()
+        return _player(row) if row else None
+
+    def update_royale_player(self, user_id: int, change, guild_id: int = None) -> dict:
+        """Apply `change(player)` to the stored player atomically and return the result."""
+        columns = ", ".join(ROYALE_STATS)
+        with self.transaction() as conn:
+            # New players start from the column defaults
+            conn.execute("INSERT OR IGNORE INTO royale_players (user_id) VALUES (?)", (int(user_id),))
+            player = _player(conn.execute("SELECT * FROM royale_players WHERE user_id = ?", (int(user_id),)).fetchone())
+            change(player)
+            conn.execute(
+                f"INSERT OR REPLACE INTO royale_players (user_id, {columns}) VALUES (?{', ?' * len(ROYALE_STATS)})",
+                (int(user_id), *(player[key] for key in ROYALE_STATS))
+            )
+            if guild_id is not None:
+                conn.execute(
+                    "INSERT OR IGNORE INTO royale_guild_players (guild_id, user_id) VALUES (?, ?)",
+                    (int(guild_id), int(user_id))
+                )
+        return player
+
+    def join_royale_guild(self, guild_id: int, user_ids) -> int:
+        """Record that the players among `user_ids` belong to `guild_id`; returns how many were new."""
+        cur = self.execute(
+            "INSERT OR IGNORE INTO royale_guild_players (guild_id, user_id) "
+            "SELECT ?, user_id FROM royale_players WHERE user_id IN (SELECT value FROM json_each(?))",
+            (int(guild_id), json.dumps([int(user_id) for user_id in user_ids]))
+        )
+        return cur.rowcount
+
+    def royale_top(self, sort_by: str, limit: int = 10, guild_id: int = None) -> list:
+        """(user_id, stats) for the best `limit` players by `sort_by`, globally or among the guild's players."""
+        sql, params = _royale_scope(guild_id)
+        rows = self.execute(
+            f"SELECT p.* FROM {sql} ORDER BY p.{_sort_key(sort_by)} DESC, p.user_id LIMIT ?", params + [int(limit)]
+        ).fetchall()
+        return [(row["user_id"], _player(row)) for row in rows]
+
+    def royale_rank(self, sort_by: str, user_id: int, guild_id: int = None):
+        """(1-based rank or None if unranked, number of ranked players) in the same ordering as royale_top."""
+        key = _sort_key(sort_by)
+        sql, params = _royale_scope(guild_id)
+        total = self.execute(f"SELECT COUNT(*) FROM {sql}", params).fetchone()[0]
+        row = self.execute(f"SELECT p.{key} FROM {sql} AND p.user_id = ?", params + [int(user_id)]).fetchone()
+        if row is None:
+            return None, total
+        ahead = self.execute(
+            f"SELECT COUNT(*) FROM {sql} AND (p.{key} > ? OR (p.{key} = ? AND p.user_id < ?))",
+            params + [row[0], row[0], int(user_id)]
+        ).fetchone()[0]
+        return ahead + 1, total
+
+    # === Knockout deathlog ===
+    def get_deathlog_entry(self, guild_id: int, user_id: int):
+        row = self.execute(
+            "SELECT entry FROM deathlog WHERE guild_id = ? AND user_id = ?", (int(guild_id), int(user_id))
+        ).fetchone()
+        return json.loads(row["entry"]) if row else None
+
+    def set_deathlog_entry(self, guild_id: int, user_id: int, entry: dict, expires_at: float):
+        self.execute(
+            "INSERT OR REPLACE INTO deathlog (guild_id, user_id, entry, expires_at) VALUES (?, ?, ?, ?)",
+            (int(guild_id), int(user_id), json.dumps(entry), float(expires_at))
+        )
+
+    def delete_deathlog_entry(self, guild_id: int, user_id: int) -> bool:
+        cur = self.execute("DELETE FROM deathlog WHERE guild_id = ? AND user_id = ?", (int(guild_id), int(user_id)))
+        return cur.rowcount > 0
+
+    def pop_expired_deathlog(self, now: float) -> list:
+        """Delete and return (guild_id, user_id, entry) for every entry whose timeout has ended."""
+        with self.transaction() as conn:
+            rows = conn.execute(
+                "SELECT guild_id, user_id, entry FROM deathlog WHERE expires_at <= ?", (float(now),)
+            ).fetchall()
+            conn.execute("DELETE FROM deathlog WHERE expires_at <= ?", (float(now),))
+        return [(row["guild_id"], row["user_id"], json.loads(row["entry"])) for row in rows]
+
+    def count_deathlog(self) -> int:
+        return self.execute("SELECT COUNT(*) FROM deathlog").fetchone()[0]
+
+    # === Cooldowns ===
+    def get_cooldown(self, kind: str, key: int) -> list:
+        row = self.execute("SELECT timestamps FROM cooldowns WHERE kind = ? AND key = ?", (kind, int(key))).fetchone()
+        return json.loads(row["timestamps"]) if row else []
+
+    def record_cooldown(self, kind: str, key: int, now: float, rate: int, per: float) -> list:
+        """Append a use to the key's last `rate` uses and drop keys idle for longer than `per`."""
+        with self.transaction() as conn:
+            row = conn.execute(
+                "SELECT timestamps FROM cooldowns WHERE kind = ? AND key = ?", (kind, int(key))
+            ).fetchone()
+            timestamps = (json.loads(row["timestamps"]) if row else []) + [now]
+            timestamps = sorted(timestamps)[-rate:]
+            conn.execute(
+                "INSERT OR REPLACE INTO cooldowns (kind, key, timestamps, last_used) VALUES (?, ?, ?, ?)",
+                (kind, int(key), json.dumps(timestamps), timestamps[-1])
+            )
+            conn.execute("DELETE FROM cooldowns WHERE kind = ? AND last_used <= ?", (kind, now - per))
+        return timestamps
+
+    def count_cooldowns(self, kind: str) -> int:
+        return self.execute("SELECT COUNT(*) FROM cooldowns WHERE kind = ?", (kind,)).fetchone()[0]
+
+    # === Command sync hashes ===
+    def get_sync_hash(self, application_id: int, guild_id: int = 0):
+        """Hash of the last successful sync; guild 0 is the global tree."""
+        row = self.execute(
+            "SELECT hash FROM command_sync WHERE application_id = ? AND guild_id = ?",
+            (int(application_id), int(guild_id))
+        ).fetchone()
+        return row["hash"] if row else None
+
+    def set_sync_hash(self, application_id: int, digest: str, guild_id: int = 0):
+        self.execute(
+            "INSERT OR REPLACE INTO command_sync (application_id, guild_id, hash) VALUES (?, ?, ?)",
+            (int(application_id), int(guild_id), digest)
+        )
+
+    # === Keyed stores ===
+    def load_store(self, namespace: str) -> dict:
+        rows = self.execute("SELECT key, value FROM store_entries WHERE namespace = ?", (namespace,)).fetchall()
+        return {row["key"]: json.loads(row["value"]) for row in rows}
+
+    def save_store(self, namespace: str, entries: list, replace: bool = False):
+        """Write (key, serialized value) pairs; a None value deletes the key. `replace` drops every other key."""
+        with self.transaction() as conn:
+            if replace:
+                conn.execute("DELETE FROM store_entries WHERE namespace = ?", (namespace,))
+            for key, value in entries:
+                if value is None:
+                    conn.execute("DELETE FROM store_entries WHERE namespace = ? AND key = ?", (namespace, key))
+                else:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO store_entries (namespace, key, value) VALUES (?, ?, ?)",
+                        (namespace, key, value)
+                    )
+
+
+def _player(row) -> dict:
+    return {key: row[key] for key in ROYALE_STATS}
+
+
+def _sort_key(sort_by: str) -> str:
+    # Column names can't be bound as parameters, so only known ones get through
+    if sort_by not in ROYALE_SORT_KEYS:
+        raise ValueError(f"Unknown sort key: {sort_by}")
+    return sort_by
+
+
+def _royale_scope(guild_id):
+    if guild_id is None:
+        return "royale_players p WHERE 1", []
+    return (
+        "royale_players p JOIN royale_guild_players g ON g.user_id = p.user_id WHERE g.guild_id = ?",
+        [int(guild_id)]
+    )
+
+
+def _shard_filter(sql: str, params: list, shard_count: int, shard_ids):
+    # Discord's shard formula, so each cluster only expires its own guilds
+    if shard_ids is None or shard_count <= 1:
+        return sql, params
+    marks = ", ".join("?" * len(shard_ids))
+    return f"{sql} AND ((guild_id >> 22) % ?) IN ({marks})", params + [shard_count, *shard_ids]
+
+
+def _exclude_guilds(sql: str, params: list, guild_ids):
+    # One JSON parameter rather than one per guild, so no list size can hit SQLite's variable limit
+    guild_ids = [int(guild_id) for guild_id in guild_ids]
+    if not guild_ids:
+        return sql, params
+    return f"{sql} AND guild_id NOT IN (SELECT value FROM json_each(?))", params + [json.dumps(guild_ids)]
+
+
+# === Warning timestamps ===
+def parse_timestamp(raw: str):
+    """Epoch seconds for a legacy ISO timestamp (unpadded dates and 'Z' allowed), or None."""
+    try:
+        raw = raw.replace("Z", "+00:00")
+        # Fix non-padded months/days (e.g. 2024-1-9 → 2024-01-09)
+        match = re.match(r"^(\d{4})-(\d{1,2})-(\d{1,2})T", raw)
+        if match:
+            year, month, day = map(int, match.groups())
+            raw = f"{year:04d}-{month:02d}-{day:02d}T{raw[match.end():]}"
+        parsed = datetime.fromisoformat(raw)
+    except (AttributeError, ValueError):
+        return None
+    if parsed.tzinfo is None:
+        parsed = parsed.replace(tzinfo=timezone.utc)
+    return int(parsed.timestamp())
+
+
+def backfill_warning_times(db: Database) -> int:
+    """Parse `timestamp` into created_at/expires_at once for warnings stored before those columns existed."""
+    if db.get_meta("warn_times_backfilled"):
+        return 0
+    retention = {row["guild_id"]: row["days"] for row in db.execute("SELECT guild_id, days FROM warn_retention")}
+    updates = []
+    for row in db.execute("SELECT id, guild_id, timestamp FROM warnings WHERE created_at IS NULL").fetchall():
+        created_at = parse_timestamp(row["timestamp"])
+        if created_at is None:
+            continue  # unreadable timestamp: keep the warning (safe fallback)
+        days = retention.get(row["guild_id"], DEFAULT_WARN_RETENTION_DAYS)
+        updates.append((created_at, created_at + days * DAY if days else None, row["id"]))
+
+    with db.lock:
+        db.conn.execute("BEGIN")
+        try:
+            db.conn.executemany("UPDATE warnings SET created_at = ?, expires_at = ? WHERE id = ?", updates)
+            db.conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('warn_times_backfilled', ?)", (str(len(updates)),))
+            db.conn.execute("COMMIT")
+        except Exception:
+            db.conn.execute("ROLLBACK")
+            raise
+    if updates:
+        log.info("Dated %d legacy warnings for expiry.", len(updates))
+    return len(updates)
+
+
+# === One-shot JSON migration ===
+def _read_legacy(path: str):
+    if not os.path.exists(path):
+        return None
+    try:
+        with open(path, "r", encoding="utf-8") as f:
+            return json.load(f)
+    except (json.JSONDecodeError, OSError) as e:
+        log.warning("Skipping unreadable %s: %s", path, e)
+        return None
+
+
+def migrate_json(db: Database) -> dict:
+    """Import warns.json, modlogs.json and guildConf.json once, then rename them to *.migrated."""
+    if db.get_meta("json_migrated"):
+        return {}
+
+    counts = {"warnings": 0, "log_channels": 0, "command_settings": 0}
+    warns = _read_legacy(LEGACY_WARN_FILE) or {}
+    logs = _read_legacy(LEGACY_LOG_FILE) or {}
+    conf = (_read_legacy(LEGACY_CONFIG_FILE) or {}).get("Servers", {})
+
+    with db.lock:
+        db.conn.execute("BEGIN")
+        try:
+            for guild_id, members in warns.items():
+                for user_id, entries in members.items():
+                    for warn in entries:
+                        db.conn.execute(
+                            "INSERT INTO warnings (guild_id, user_id, reason, moderator, timestamp) VALUES (?, ?, ?, ?, ?)",
+                            (int(guild_id), int(user_id), warn.get("reason", ""),
+                             warn.get("moderator", ""), warn.get("timestamp", ""))
+                        )
+                        counts["warnings"] += 1
+
+            for guild_id, channel_id in logs.items():
+                db.conn.execute(
+                    "INSERT OR REPLACE INTO modlog_channels (guild_id, channel_id) VALUES (?, ?)",
+                    (int(guild_id), int(channel_id))
+                )
+                counts["log_channels"] += 1
+
+            for guild_id, guild_conf in conf.items():
+                for key, value in guild_conf.items():
+                    if key in ("DevOnly", "UnderMaintenance"):
+                        items = [(key, name, flag) for name, flag in value.items()]
+                    else:
+                        items = [("General", key, value)]
+                    for category, name, flag in items:
+                        db.conn.execute(
+                            "INSERT OR REPLACE INTO command_config (guild_id, category, command_name, value) VALUES (?, ?, ?, ?)",
+                            (int(guild_id), category, name, int(bool(flag)))
+                        )
+                        counts["command_settings"] += 1
+
+            db.conn.execute(
+                "INSERT OR REPLACE INTO meta (key, value) VALUES ('json_migrated', ?)", (json.dumps(counts),)
+            )
+            db.conn.execute("COMMIT")
+        except Exception:
+            db.conn.execute("ROLLBACK")
+            raise
+
+    for path in (LEGACY_WARN_FILE, LEGACY_LOG_FILE, LEGACY_CONFIG_FILE):
+        if os.path.exists(path):
+            os.replace(path, path + ".migrated")
+
+    if any(counts.values()):
+        log.info("Migrated legacy JSON: %s", counts)
+    return counts
+
+
+def migrate_stores(db: Database) -> dict:
+    """
+    Import the per-process JSON stores (royal stats, deathlog, cooldowns, command
+    sync hashes, applied presets) once, then rename them to *.migrated.
+    """
+    paths = (LEGACY_STATS_FILE, LEGACY_DEATHLOG_FILE, LEGACY_COOLDOWN_FILE, LEGACY_SYNC_FILE, LEGACY_APPLIED_FILE)
+    counts = {"players": 0, "deathlog": 0, "cooldowns": 0, "sync_hashes": 0, "applied_presets": 0}
+    with db.transaction() as conn:
+        # Checked inside the write lock, so two clusters starting together import once
+        if conn.execute("SELECT 1 FROM meta WHERE key = 'stores_migrated'").fetchone():
+            return {}
+
+        columns = ", ".join(ROYALE_STATS)
+        for user_id, player in (_read_legacy(LEGACY_STATS_FILE) or {}).items():
+            stats = [int(player.get(key, 1 if key == "level" else 0)) for key in ROYALE_STATS]
+            conn.execute(
+                f"INSERT OR REPLACE INTO royale_players (user_id, {columns}) VALUES (?{', ?' * len(ROYALE_STATS)})",
+                (int(user_id), *stats)
+            )
+            for guild_id in player.get("guilds", ()):
+                conn.execute(
+                    "INSERT OR IGNORE INTO royale_guild_players (guild_id, user_id) VALUES (?, ?)",
+                    (int(guild_id), int(user_id))
+                )
+            counts["players"] += 1
+
+        for guild_id, entries in (_read_legacy(LEGACY_DEATHLOG_FILE) or {}).items():
+            if "timeout_end" in entries:
+                entries, guild_id = {guild_id: entries}, 0  # written before the log was keyed by guild
+            for user_id, entry in entries.items():
+                ends = parse_timestamp(entry.get("timeout_end", "")) or 0
+                conn.execute(
+                    "INSERT OR REPLACE INTO deathlog (guild_id, user_id, entry, expires_at) VALUES (?, ?, ?, ?)",
+                    (int(guild_id), int(user_id), json.dumps(entry), ends)
+                )
+                counts["deathlog"] += 1
+
+        for kind, keys in (_read_legacy(LEGACY_COOLDOWN_FILE) or {}).items():
+            for key, timestamps in keys.items():
+                if timestamps:
+                    conn.execute(
+                        "INSERT OR REPLACE INTO cooldowns (kind, key, timestamps, last_used) VALUES (?, ?, ?, ?)",
+                        (kind, int(key), json.dumps(sorted(timestamps)), max(timestamps))
+                    )
+                    counts["cooldowns"] += 1
+
+        for application_id, state in (_read_legacy(LEGACY_SYNC_FILE) or {}).items():
+            hashes = dict(state.get("guilds", {}))
+            if state.get("global"):
+                hashes[0] = state["global"]
+            for guild_id, digest in hashes.items():
+                conn.execute(
+                    "INSERT OR REPLACE INTO command_sync (application_id, guild_id, hash) VALUES (?, ?, ?)",
+                    (int(application_id), int(guild_id), digest)
+                )
+                counts["sync_hashes"] += 1
+
+        for guild_id, settings in (_read_legacy(LEGACY_APPLIED_FILE) or {}).items():
+            conn.execute(
+                "INSERT OR REPLACE INTO store_entries (namespace, key, value) VALUES ('applied_presets', ?, ?)",
+                (str(guild_id), json.dumps(settings))
+            )
+            counts["applied_presets"] += 1
+
+        conn.execute("INSERT OR REPLACE INTO meta (key, value) VALUES ('stores_migrated', ?)", (json.dumps(counts),))
+
+    for path in paths:
+        if os.path.exists(path):
+            os.replace(path, path + ".migrated")
+
+    if any(counts.values()):
+        log.info("Migrated JSON stores: %s", counts)
+    return counts
+
+
+def get_db() -> Database:
+    """Return the shared database, creating and migrating it on first use."""
+    global _db
+    if _db is None:
+        with _db_lock:
+            if _db is None:
+                db = Database()
+                migrate_json(db)
+                migrate_stores(db)
+                backfill_warning_times(db)
+                _db = db
+    return _db
+
+
+if __name__ == "__main__":
+    db = Database()
+    print(migrate_json(db) or "Already migrated.")
+    print(migrate_stores(db) or "Stores already migrated.")
+    backfill_warning_times(db)
@@ -0,0 +1,43 @@
+import time
+from datetime import datetime
+
+# === Knockout deathlog ===
+# One row per (guild, user) in the shared database, so /revive is a primary
+# key lookup from whichever cluster owns the guild. `expires_at` is indexed,
+# so expiry only reads the entries that are already due.
+
+LEGACY_GUILD = 0  # entries written before the log was keyed by guild
+
+
+def _timestamp(entry: dict) -> float:
+    try:
+        return datetime.fromisoformat(entry["timeout_end"]).timestamp()
+    except (KeyError, TypeError, ValueError):
+        return 0.0
+
+
+class DeathLog:
+    def __init__(self, db):
+        self.db = db
+
+    # === Lookups ===
+    def get(self, guild_id, user_id):
+        entry = self.db.get_deathlog_entry(guild_id, user_id)
+        if entry is None:
+            entry = self.db.get_deathlog_entry(LEGACY_GUILD, user_id)
+        return entry
+
+    def __len__(self):
+        return self.db.count_deathlog()
+
+    # === Mutations ===
+    def add(self, guild_id, user_id, entry: dict):
+        self.db.set_deathlog_entry(guild_id, user_id, entry, _timestamp(entry))
+
+    def remove(self, guild_id, user_id):
+        return (self.db.delete_deathlog_entry(guild_id, user_id)
+                or self.db.delete_deathlog_entry(LEGACY_GUILD, user_id))
+
+    def pop_expired(self, now: float = None) -> list:
+        """Remove and return (guild_id, user_id, entry) for every entry whose timeout has ended."""
+        return self.db.pop_expired_deathlog(time.time() if now is None else now)
@@ -0,0 +1,257 @@
+import asyncio
+import hashlib
+import json
+import logging
+import os
+import time
+import traceback
+import urllib.request
+import aiohttp
+import discord
+from util.json_store import get_store
+
+log = logging.getLogger(__name__)
+
+# === Error reporting pipeline ===
+# Errors are grouped by fingerprint: the exception type plus the (file,
+# function) of every frame. Line numbers are left out so a group survives
+# unrelated edits. record() only bumps in-memory counters and the local
+# index; a background task posts one aggregated webhook message per
+# FLUSH_INTERVAL. That message has one embed per group that fired, so an error
+# storm arrives as "×412" instead of 412 posts. Posts go through one pooled
+# aiohttp session. A token bucket and Discord's retry_after keep the webhook
+# under its rate limit.
+#
+# The index (data/errors.json) keeps every group's counts, first/last seen
+# times, context and a sample traceback, and can be searched with search().
+# Each cluster keeps its own index (data/errors-<cluster>.json), since a
+# whole-file store can't be shared between processes.
+
+ERROR_INDEX_FILE = (
+    f"data/errors-{os.getenv('CLUSTER_ID', '0')}.json" if os.getenv("CLUSTER_IPC_PORT") else "data/errors.json"
+)
+FLUSH_INTERVAL = 10.0
+MAX_INDEXED = 1000
+TRACE_CHARS = 1500               # sample traceback kept per group and shown in its first report
+EMBEDS_PER_POST = 10
+EMBED_CHARS_PER_POST = 6000
+POST_RATE, POST_PER = 5, 2.0     # Discord's webhook limit: 5 requests per 2 seconds
+WEBHOOK_USERNAME = "Melli Console"
+WEBHOOK_AVATAR = "https://www.setra.com/hubfs/Sajni/crc_error.jpg"
+
+
+def fingerprint(exc_type, tb) -> str:
+    frames = traceback.extract_tb(tb) if tb is not None else []
+    signature = [exc_type.__module__ + "." + exc_type.__qualname__]
+    signature += [f"{os.path.basename(frame.filename)}:{frame.name}" for frame in frames]
+    return hashlib.sha1("|".join(signature).encode()).hexdigest()[:12]
+
+
+class TokenBucket:
+    def __init__(self, rate: int = POST_RATE, per: float = POST_PER):
+        self.rate = rate
+        self.per = per
+        self.tokens = float(rate)
+        self.updated = time.monotonic()
+        self.blocked_until = 0.0
+
+    async def acquire(self):
+        while True:
+            now = time.monotonic()
+            self.tokens = min(self.rate, self.tokens + (now - self.updated) * self.rate / self.per)
+            self.updated = now
+            wait = self.blocked_until - now
+            if wait <= 0 and self.tokens >= 1:
+                self.tokens -= 1
+                return
+            await asyncio.sleep(max(wait, (1 - self.tokens) * self.per / self.rate))
+
+    def block(self, seconds: float):
+        """Hold every post back for `seconds`, as told by a 429."""
+        self.blocked_until = max(self.blocked_until, time.monotonic() + seconds)
+
+
+class ErrorReporter:
+    def __init__(self, webhook_url: str = None, store=None, interval: float = FLUSH_INTERVAL):
+        self.webhook_url = webhook_url
+        self.index = store if store is not None else get_store(ERROR_INDEX_FILE, {})
+        self.interval = interval
+        self.pending = {}   # fingerprint -> occurrences since the last report
+        self.bucket = TokenBucket()
+        self.session = None
+        self._task = None
+        self.stats = {"recorded": 0, "reported": 0, "posts": 0, "failed_posts": 0, "rate_limited": 0}
+
+    # === Intake ===
+    def record(self, error: BaseException, context: str = None) -> dict:
+        """Count `error` under its fingerprint; returns the group's index entry (with "fingerprint")."""
+        fp = fingerprint(type(error), error.__traceback__)
+        now = time.time()
+        entry = self.index.data.get(fp)
+        if entry is None:
+            trace = "".join(traceback.format_exception(type(error), error, error.__traceback__))
+            entry = self.index.data[fp] = {
+                "type": type(error).__name__, "message": str(error)[:300], "context": context,
+                "count": 0, "reported": 0, "first_seen": now, "last_seen": now, "trace": trace[-TRACE_CHARS:],
+            }
+            self._evict()
+        entry["count"] += 1
+        entry["last_seen"] = now
+        if context and context != entry["context"]:
+            entry["last_context"] = context
+        self.index.mark_dirty(fp)
+        self.pending[fp] = self.pending.get(fp, 0) + 1
+        self.stats["recorded"] += 1
+        return dict(entry, fingerprint=fp)
+
+    def _evict(self):
+        data = self.index.data
+        while len(data) > MAX_INDEXED:
+            oldest = min(data, key=lambda fp: data[fp]["last_seen"])
+            del data[oldest]
+            self.pending.pop(oldest, None)
+
+    # === Search ===
+    def search(self, query: str = None, limit: int = 10) -> list:
+        """Index entries matching `query` (fingerprint, type, message, context or trace), most recent first."""
+        needle = (query or "").lower()
+        found = []
+        for fp, entry in self.index.data.items():
+            if needle and fp != needle and not any(
+                needle in (entry.get(key) or "").lower() for key in ("type", "message", "context", "last_context", "trace")
+            ):
+                continue
+            found.append(dict(entry, fingerprint=fp))
+        found.sort(key=lambda entry: entry["last_seen"], reverse=True)
+        return found[:limit]
+
+    # === Reporting ===
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        try:
+            await self.flush()
+        finally:
+            if self.session is not None:
+                await self.session.close()
+                self.session = None
+
+    async def _run(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error("Flush failed: %s", e)
+
+    def _embed(self, fp: str, entry: dict, occurrences: int) -> discord.Embed:
+        first = entry["reported"] == 0
+        embed = discord.Embed(
+            title=f"{entry['type']} ×{occurrences}",
+            description=f"{entry['message'][:300]}" + (f"\n```py\n{entry['trace']}\n```" if first else ""),
+            color=discord.Color.red() if first else discord.Color.orange(),
+        )
+        context = entry.get("last_context") or entry.get("context")
+        if context:
+            embed.add_field(name="Context", value=context[:1024], inline=True)
+        embed.add_field(name="Total", value=f"`{entry['count']}` since <t:{int(entry['first_seen'])}:R>", inline=True)
+        embed.set_footer(text=f"fingerprint {fp}" + ("" if first else " · trace sent earlier"))
+        return embed
+
+    def _take_reports(self) -> list:
+        pending, self.pending = self.pending, {}
+        embeds = []
+        for fp, occurrences in sorted(pending.items(), key=lambda item: -item[1]):
+            entry = self.index.data.get(fp)
+            if entry is None:
+                continue
+            embeds.append(self._embed(fp, entry, occurrences))
+            entry["reported"] += occurrences
+            self.index.mark_dirty(fp)
+        return embeds
+
+    @staticmethod
+    def _pack(embeds: list) -> list:
+        posts, current, chars = [], [], 0
+        for embed in embeds:
+            size = len(embed)
+            if current and (len(current) >= EMBEDS_PER_POST or chars + size > EMBED_CHARS_PER_POST):
+                posts.append(current)
+                current, chars = [], 0
+            current.append(embed)
+            chars += size
+        if current:
+            posts.append(current)
+        return posts
+
+    def _payload(self, embeds: list) -> dict:
+        return {
+            "username": WEBHOOK_USERNAME,
+            "avatar_url": WEBHOOK_AVATAR,
+            "embeds": [embed.to_dict() for embed in embeds],
+        }
+
+    async def flush(self):
+        """Post one aggregated report for everything recorded since the last flush."""
+        if not self.pending:
+            return
+        embeds = self._take_reports()
+        if not self.webhook_url:
+            return  # still counted and indexed
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession(
+                connector=aiohttp.TCPConnector(limit=2), timeout=aiohttp.ClientTimeout(total=10)
+            )
+        for embeds in self._pack(embeds):
+            await self._post(self._payload(embeds), len(embeds))
+
+    async def _post(self, payload: dict, groups: int, attempts: int = 3):
+        for _ in range(attempts):
+            await self.bucket.acquire()
+            try:
+                async with self.session.post(self.webhook_url, json=payload) as resp:
+                    if resp.status == 429:
+                        data = await resp.json(content_type=None)
+                        self.stats["rate_limited"] += 1
+                        self.bucket.block(float(data.get("retry_after", 1.0)))
+                        continue
+                    if resp.status >= 400:
+                        log.warning("Webhook returned %d: %s", resp.status, (await resp.text())[:200])
+                        break
+                    self.stats["posts"] += 1
+                    self.stats["reported"] += groups
+                    return
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                log.warning("Webhook post failed: %s", e)
+                break
+        self.stats["failed_posts"] += 1
+
+    def flush_sync(self, timeout: float = 5.0):
+        """Blocking report and index write for interpreter shutdown (sys.excepthook), when no loop is running."""
+        if self.pending and self.webhook_url:
+            for embeds in self._pack(self._take_reports()):
+                request = urllib.request.Request(
+                    self.webhook_url, data=json.dumps(self._payload(embeds)).encode(),
+                    headers={"Content-Type": "application/json", "User-Agent": "Nari"},
+                )
+                try:
+                    urllib.request.urlopen(request, timeout=timeout).close()
+                except OSError as e:
+                    log.warning("Webhook post failed: %s", e)
+        self.index.flush_sync()
+
+
+_reporter = None
+RELOAD_KEEP = ("_reporter",)
+
+
+def get_reporter() -> ErrorReporter:
+    global _reporter
+    if _reporter is None:
+        _reporter = ErrorReporter(os.getenv("WEBHOOK"))
+    return _reporter
@@ -0,0 +1,89 @@
+import asyncio
+import time
+from dataclasses import dataclass, field
+
+# === Bounded, bucket-aware request fan-out ===
+# Calls are grouped by rate-limit bucket (for channel sends and edits that is
+# the channel). Calls inside a bucket run in order, so one bucket never has two
+# requests in flight; separate buckets run in parallel up to `concurrency`.
+# That keeps us under Discord's global limit without serialising everything.
+
+DEFAULT_CONCURRENCY = 10
+MAX_RETRIES = 2
+
+
+@dataclass
+class FanoutResult:
+    total: int = 0
+    done: int = 0
+    failed: dict = field(default_factory=dict)
+    elapsed: float = 0.0
+
+    @property
+    def succeeded(self) -> int:
+        return self.done - len(self.failed)
+
+
+def _retry_after(error) -> float:
+    """Seconds to back off for a 429, or None if `error` is not a rate limit."""
+    if getattr(error, "status", None) != 429:
+        return None
+    retry_after = getattr(error, "retry_after", None)
+    if retry_after is None:
+        response = getattr(error, "response", None)
+        headers = getattr(response, "headers", None) or {}
+        retry_after = headers.get("Retry-After", 1.0)
+    try:
+        return float(retry_after)
+    except (TypeError, ValueError):
+        return 1.0
+
+
+async def fan_out(buckets: dict, concurrency: int = DEFAULT_CONCURRENCY, on_progress=None) -> FanoutResult:
+    """
+    Run `buckets` ({bucket_key: [zero-arg coroutine factory, ...]}) with bounded concurrency.
+    `on_progress(done, total)` is awaited after each bucket finishes.
+    """
+    result = FanoutResult(total=len(buckets))
+    semaphore = asyncio.Semaphore(concurrency)
+    started = time.perf_counter()
+
+    async def run_bucket(key, calls):
+        async with semaphore:
+            for call in calls:
+                for attempt in range(MAX_RETRIES + 1):
+                    try:
+                        await call()
+                        break
+                    except Exception as e:
+                        delay = _retry_after(e)
+                        if delay is None or attempt == MAX_RETRIES:
+                            result.failed.setdefault(key, e)
+                            break
+                        await asyncio.sleep(delay)
+        result.done += 1
+        if on_progress is not None:
+            try:
+                await on_progress(result.done, result.total)
+            except Exception:
+                pass
+
+    await asyncio.gather(*(run_bucket(key, calls) for key, calls in buckets.items()))
+    result.elapsed = time.perf_counter() - started
+    return result
+
+
+class ProgressReporter:
+    """Throttled progress callback; at most one update every `interval` seconds."""
+
+    def __init__(self, update, interval: float = 1.5):
+        self.update = update
+        self.interval = interval
+        self._last = 0.0
+
+    async def __call__(self, done: int, total: int):
+        now = time.perf_counter()
+        if done != total and now - self._last < self.interval:
+            return
+        self._last = now
+        await self.update(done, total)
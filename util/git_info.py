@@ -0,0 +1,113 @@
+import asyncio
+import os
+from dataclasses import dataclass, field
+
+# === Async git helpers ===
+# git runs as an asyncio subprocess with a timeout, so a slow fetch or a
+# hung credential prompt never blocks the event loop. Repo metadata (branch,
+# short SHA, recent commits) is cached and only re-read when HEAD moves.
+
+GIT_TIMEOUT = 30.0
+GIT_DIR = ".git"
+COMMIT_FORMAT = "--pretty=format:• %s (%an)"
+COMMIT_COUNT = 5
+
+
+class GitError(Exception):
+    pass
+
+
+@dataclass
+class GitResult:
+    returncode: int
+    stdout: str
+    stderr: str
+
+    @property
+    def output(self) -> str:
+        return self.stdout or self.stderr
+
+
+async def run_git(*args, timeout: float = GIT_TIMEOUT) -> GitResult:
+    env = dict(os.environ, GIT_TERMINAL_PROMPT="0")
+    try:
+        process = await asyncio.create_subprocess_exec(
+            "git", *args,
+            stdout=asyncio.subprocess.PIPE,
+            stderr=asyncio.subprocess.PIPE,
+            env=env,
+        )
+    except FileNotFoundError:
+        raise GitError("git is not installed")
+    try:
+        stdout, stderr = await asyncio.wait_for(process.communicate(), timeout=timeout)
+    except asyncio.TimeoutError:
+        process.kill()
+        await process.wait()
+        raise GitError(f"`git {' '.join(args)}` timed out after {timeout:.0f}s")
+    return GitResult(process.returncode, stdout.decode(errors="replace").strip(), stderr.decode(errors="replace").strip())
+
+
+def read_head(git_dir: str = GIT_DIR):
+    """Current HEAD sha straight from .git, or None if it can't be resolved cheaply."""
+    try:
+        with open(os.path.join(git_dir, "HEAD"), "r") as f:
+            head = f.read().strip()
+        if not head.startswith("ref: "):
+            return head
+        ref = head[5:]
+        ref_path = os.path.join(git_dir, ref)
+        if os.path.exists(ref_path):
+            with open(ref_path, "r") as f:
+                return f.read().strip()
+        with open(os.path.join(git_dir, "packed-refs"), "r") as f:
+            for line in f:
+                if line.rstrip().endswith(" " + ref):
+                    return line.split(" ", 1)[0]
+    except OSError:
+        pass
+    return None
+
+
+@dataclass
+class GitMetadata:
+    head: str = ""
+    branch: str = "Unknown"
+    short: str = "Unknown"
+    commits: list = field(default_factory=list)
+
+
+class GitInfoCache:
+    def __init__(self):
+        self._meta = None
+        self._lock = asyncio.Lock()
+
+    async def get(self) -> GitMetadata:
+        head = read_head()
+        if self._meta is not None and head is not None and head == self._meta.head:
+            return self._meta
+        async with self._lock:
+            if self._meta is not None and head is not None and head == self._meta.head:
+                return self._meta
+            self._meta = await self._load(head)
+            return self._meta
+
+    async def _load(self, head) -> GitMetadata:
+        branch, short, log = await asyncio.gather(
+            run_git("rev-parse", "--abbrev-ref", "HEAD"),
+            run_git("rev-parse", "--short", "HEAD"),
+            run_git("log", f"-{COMMIT_COUNT}", COMMIT_FORMAT),
+        )
+        return GitMetadata(
+            head=head or "",
+            branch=branch.stdout or "Unknown",
+            short=short.stdout or "Unknown",
+            commits=log.stdout.splitlines() if log.returncode == 0 else [],
+        )
+
+    def invalidate(self):
+        self._meta = None
+
+
+git_info = GitInfoCache()
+RELOAD_KEEP = ("git_info",)
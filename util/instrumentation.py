@@ -0,0 +1,213 @@
+import logging
+import time
+import discord
+
+log = logging.getLogger(__name__)
+
+# === Latency instrumentation ===
+# Slash commands are timed from the tree's interaction_check to completion
+# (or error), with the first acknowledgement (defer / send_message / modal /
+# edit) recorded separately so slow acks stand out before Discord's 3 second
+# deadline. Gateway listeners are timed by the bot's _run_event override
+# (see InstrumentedBot). Everything lands in log-linear histograms.
+
+SUB_BUCKET_BITS = 4                 # 16 linear sub-buckets per power of two (~6% error)
+SUB_BUCKETS = 1 << SUB_BUCKET_BITS
+MAX_PENDING = 5000                  # interactions started but never completed
+INTERACTION_TTL = 900               # interaction tokens expire after 15 minutes
+QUANTILES = (0.5, 0.95, 0.99)
+
+
+class Histogram:
+    """Sparse HDR-style histogram of microsecond values."""
+
+    __slots__ = ("counts", "count", "total", "max")
+
+    def __init__(self):
+        self.counts = {}
+        self.count = 0
+        self.total = 0
+        self.max = 0
+
+    @staticmethod
+    def _index(value: int) -> int:
+        if value < SUB_BUCKETS:
+            return value
+        shift = value.bit_length() - SUB_BUCKET_BITS - 1
+        return (shift << SUB_BUCKET_BITS) + (value >> shift)
+
+    @staticmethod
+    def _upper(index: int) -> int:
+        if index < 2 * SUB_BUCKETS:
+            return index
+        shift = (index >> SUB_BUCKET_BITS) - 1
+        return ((index - (shift << SUB_BUCKET_BITS) + 1) << shift) - 1
+
+    def record(self, seconds: float):
+        value = max(0, int(seconds * 1_000_000))
+        index = self._index(value)
+        self.counts[index] = self.counts.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+        if value > self.max:
+            self.max = value
+
+    def percentile(self, q: float) -> float:
+        """Upper bound of the bucket holding quantile `q`, in seconds."""
+        if not self.count:
+            return 0.0
+        target = max(1, round(q * self.count))
+        seen = 0
+        for index in sorted(self.counts):
+            seen += self.counts[index]
+            if seen >= target:
+                return min(self._upper(index), self.max) / 1_000_000
+        return self.max / 1_000_000
+
+    @property
+    def sum_seconds(self) -> float:
+        return self.total / 1_000_000
+
+
+class CommandStats:
+    __slots__ = ("latency", "ack", "acks", "errors")
+
+    def __init__(self):
+        self.latency = Histogram()
+        self.ack = Histogram()
+        self.acks = {}    # ack method -> count
+        self.errors = 0
+
+
+class Metrics:
+    def __init__(self):
+        self.commands = {}
+        self.listeners = {}
+        self.started = time.time()
+        self._pending = {}  # interaction id -> [started, acked_at, ack kind]
+
+    def command(self, name: str) -> CommandStats:
+        stats = self.commands.get(name)
+        if stats is None:
+            stats = self.commands[name] = CommandStats()
+        return stats
+
+    # === Interaction lifecycle ===
+    def interaction_started(self, interaction: discord.Interaction):
+        if interaction.type is not discord.InteractionType.application_command:
+            return
+        if len(self._pending) >= MAX_PENDING:
+            self._pending.pop(next(iter(self._pending)))
+        self._pending[interaction.id] = [time.perf_counter(), None, None]
+
+    def interaction_acked(self, interaction: discord.Interaction, kind: str):
+        pending = self._pending.get(interaction.id)
+        if pending is not None and pending[1] is None:
+            pending[1] = time.perf_counter()
+            pending[2] = kind
+
+    def interaction_finished(self, interaction: discord.Interaction, failed: bool = False):
+        pending = self._pending.pop(interaction.id, None)
+        command = interaction.command
+        if pending is None or command is None:
+            return
+        started, acked_at, kind = pending
+        stats = self.command(command.qualified_name)
+        stats.latency.record(time.perf_counter() - started)
+        if acked_at is not None:
+            stats.ack.record(acked_at - started)
+            stats.acks[kind] = stats.acks.get(kind, 0) + 1
+        if failed:
+            stats.errors += 1
+
+    def in_flight(self, exclude=(), max_age: float = INTERACTION_TTL) -> int:
+        cutoff = time.perf_counter() - max_age
+        return sum(1 for interaction_id, pending in self._pending.items() if pending[0] > cutoff and interaction_id not in exclude)
+
+    def record_listener(self, name: str, seconds: float):
+        hist = self.listeners.get(name)
+        if hist is None:
+            hist = self.listeners[name] = Histogram()
+        hist.record(seconds)
+
+    # === Export ===
+    def prometheus(self) -> str:
+        lines = [
+            "# TYPE nari_command_latency_seconds summary",
+            "# TYPE nari_command_ack_seconds summary",
+            "# TYPE nari_command_errors_total counter",
+            "# TYPE nari_listener_seconds summary",
+        ]
+
+        def summary(metric, labels, hist):
+            for q in QUANTILES:
+                lines.append(f'{metric}{{{labels},quantile="{q}"}} {hist.percentile(q):.6f}')
+            lines.append(f"{metric}_sum{{{labels}}} {hist.sum_seconds:.6f}")
+            lines.append(f"{metric}_count{{{labels}}} {hist.count}")
+
+        for name, stats in sorted(self.commands.items()):
+            label = f'command="{name}"'
+            summary("nari_command_latency_seconds", label, stats.latency)
+            summary("nari_command_ack_seconds", label, stats.ack)
+            lines.append(f"nari_command_errors_total{{{label}}} {stats.errors}")
+        for name, hist in sorted(self.listeners.items()):
+            summary("nari_listener_seconds", f'listener="{name}"', hist)
+        lines.append(f"nari_uptime_seconds {time.time() - self.started:.0f}")
+        return "\n".join(lines) + "\n"
+
+
+metrics = Metrics()
+RELOAD_KEEP = ("metrics",)
+
+
+# === Hooks ===
+_ACK_METHODS = ("defer", "send_message", "send_modal", "edit_message")
+
+
+def _wrap_ack(name, original):
+    async def wrapper(self, *args, **kwargs):
+        metrics.interaction_acked(self._parent, name)
+        return await original(self, *args, **kwargs)
+    wrapper.__wrapped__ = original
+    return wrapper
+
+
+def install(bot):
+    """Hook the command tree and interaction responses; safe to call more than once."""
+    if getattr(bot, "_instrumented", False):
+        return
+    bot._instrumented = True
+
+    tree = bot.tree
+    original_check = tree.interaction_check
+
+    async def interaction_check(interaction: discord.Interaction) -> bool:
+        metrics.interaction_started(interaction)
+        return await original_check(interaction)
+
+    tree.interaction_check = interaction_check
+
+    async def on_app_command_completion(interaction, command):
+        metrics.interaction_finished(interaction)
+
+    bot.add_listener(on_app_command_completion, "on_app_command_completion")
+
+    for name in _ACK_METHODS:
+        original = getattr(discord.InteractionResponse, name)
+        if not hasattr(original, "__wrapped__"):
+            setattr(discord.InteractionResponse, name, _wrap_ack(name, original))
+
+
+class InstrumentedBot:
+    """Mixin for the bot class that times every dispatched listener."""
+
+    async def _run_event(self, coro, event_name, *args, **kwargs):
+        started = time.perf_counter()
+        try:
+            await super()._run_event(coro, event_name, *args, **kwargs)
+        finally:
+            owner = getattr(coro, "__qualname__", event_name)
+            elapsed = time.perf_counter() - started
+            metrics.record_listener(owner, elapsed)
+            if log.isEnabledFor(logging.DEBUG):
+                log.debug("%s handled %s in %.2fms", owner, event_name, elapsed * 1000)
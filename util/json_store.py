@@ -0,0 +1,194 @@
+import asyncio
+import json
+import logging
+import os
+import tempfile
+from util.database import get_db
+
+log = logging.getLogger(__name__)
+
+# === Write-behind JSON persistence ===
+# Cogs mutate `store.data` in place and call `mark_dirty(key)`. A background
+# task coalesces every change made within `interval` seconds (or until
+# `threshold` keys are dirty) into a single atomic rewrite of the file.
+#
+# SqliteStore has the same interface but writes just the dirty keys, one row
+# each, to the shared database. Use it when several clusters share the data
+# but each key only ever changes in one of them (e.g. per-guild settings), so
+# no process can overwrite another's keys.
+
+FLUSH_INTERVAL = 5.0
+FLUSH_THRESHOLD = 50
+
+_stores = {}
+RELOAD_KEEP = ("_stores",)
+
+
+def atomic_write_json(path: str, payload: str):
+    """Write a serialized document next to `path` and rename it into place."""
+    directory = os.path.dirname(path) or "."
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".tmp-", suffix=".json")
+    try:
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(payload)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.remove(tmp_path)
+        except OSError:
+            pass
+        raise
+
+
+class WriteBehindStore:
+    def __init__(self, path: str, default=None, interval: float = FLUSH_INTERVAL, threshold: int = FLUSH_THRESHOLD):
+        self.path = path
+        self.interval = interval
+        self.threshold = threshold
+        self.data = self._load({} if default is None else default)
+        self.dirty = set()
+        self.writes = 0
+        self._wake = None
+        self._task = None
+        self._lock = None
+
+    def _load(self, default):
+        if not os.path.exists(self.path):
+            return default
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                return json.load(f)
+        except (json.JSONDecodeError, OSError) as e:
+            log.warning("Could not read %s: %s", self.path, e)
+            return default
+
+    # === Dirty tracking ===
+    def mark_dirty(self, key="*"):
+        """Record that `key` changed; the write happens later in the background."""
+        self.dirty.add(str(key))
+        if not self._ensure_task():
+            return
+        if len(self.dirty) >= self.threshold:
+            self._wake.set()
+
+    def _ensure_task(self) -> bool:
+        if self._task is not None and not self._task.done():
+            return True
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            return False  # no loop yet; flush_sync() picks it up at shutdown
+        self._wake = asyncio.Event()
+        self._lock = asyncio.Lock()
+        self._task = loop.create_task(self._flush_loop())
+        return True
+
+    async def _flush_loop(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._wake.wait(), timeout=self.interval)
+            except asyncio.TimeoutError:
+                pass
+            self._wake.clear()
+            try:
+                await self.flush()
+            except Exception as e:
+                log.error("Flush of %s failed: %s", self.path, e)
+
+    # === Flushing ===
+    async def flush(self):
+        """Write pending changes now, off the event loop."""
+        if not self.dirty:
+            return
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.dirty:
+                return
+            pending = self.dirty
+            self.dirty = set()
+            # Serialize on the loop so the snapshot can't change mid-write
+            payload = self._snapshot(pending)
+            try:
+                await asyncio.to_thread(self._write, payload)
+            except BaseException:
+                self.dirty |= pending
+                raise
+            self.writes += 1
+
+    def flush_sync(self):
+        """Blocking flush for interpreter shutdown, when no loop is running."""
+        if not self.dirty:
+            return
+        self._write(self._snapshot(self.dirty))
+        self.dirty.clear()
+        self.writes += 1
+
+    def _snapshot(self, keys: set):
+        return json.dumps(self.data, indent=4)
+
+    def _write(self, payload):
+        atomic_write_json(self.path, payload)
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        await self.flush()
+
+
+class SqliteStore(WriteBehindStore):
+    def __init__(self, namespace: str, **kwargs):
+        self.namespace = namespace
+        super().__init__(f"sqlite:{namespace}", {}, **kwargs)
+
+    def _load(self, default):
+        return get_db().load_store(self.namespace) or default
+
+    def _snapshot(self, keys: set):
+        replace = "*" in keys
+        keys = self.data.keys() if replace else keys
+        # A key missing from `data` was deleted
+        entries = [(key, json.dumps(self.data[key]) if key in self.data else None) for key in keys]
+        return entries, replace
+
+    def _write(self, payload):
+        entries, replace = payload
+        get_db().save_store(self.namespace, entries, replace)
+
+
+# === Shared registry ===
+def get_store(path: str, default=None, **kwargs) -> WriteBehindStore:
+    """Return the process-wide store for `path`, creating it on first use."""
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = WriteBehindStore(path, default, **kwargs)
+    return store
+
+
+def get_db_store(namespace: str, **kwargs) -> SqliteStore:
+    """Return the process-wide database-backed store for `namespace`, creating it on first use."""
+    path = f"sqlite:{namespace}"
+    store = _stores.get(path)
+    if store is None:
+        store = _stores[path] = SqliteStore(namespace, **kwargs)
+    return store
+
+
+async def flush_all():
+    for store in list(_stores.values()):
+        try:
+            await store.flush()
+        except Exception as e:
+            log.error("Final flush of %s failed: %s", store.path, e)
+
+
+def flush_all_sync():
+    for store in list(_stores.values()):
+        try:
+            store.flush_sync()
+        except Exception as e:
+            log.error("Final flush of %s failed: %s", store.path, e)
@@ -0,0 +1,198 @@
+import atexit
+import json
+import logging
+import logging.handlers
+import os
+import queue
+import sys
+import time
+from datetime import datetime, timezone
+from colorama import Fore, Style
+
+# === Logging ===
+# Every module logs through `logging.getLogger(__name__)` (cogs.knockout,
+# util.json_store, ...). Records are only enqueued on the calling thread; a
+# QueueListener thread does the formatting and I/O, so a slow terminal or
+# disk never stalls the event loop. If the queue is full, records are dropped
+# and counted instead of blocking.
+#
+# Sinks: the terminal, with the classic "[HH:MM:SS] [INFO] ..." styling, and an
+# optional JSON-lines file with size-based rotation. Debug records are
+# rate-limited per call site before they reach the queue.
+#
+# Environment:
+#   LOG_LEVEL=INFO                           root level
+#   LOG_LEVELS=cogs.knockout=DEBUG,discord=WARNING
+#   LOG_JSON=logs/nari.jsonl                 enables the JSON-lines sink
+#   LOG_JSON_MAX_BYTES=10485760  LOG_JSON_BACKUPS=5
+#   LOG_DEBUG_BURST=20  LOG_DEBUG_WINDOW=10  per call site, per window (seconds)
+
+SUCCESS = 25
+logging.addLevelName(SUCCESS, "SUCCESS")
+
+QUEUE_SIZE = 10000
+DEBUG_BURST = 20
+DEBUG_WINDOW = 10.0
+
+LEVEL_TAGS = {
+    logging.DEBUG: Fore.WHITE + "[DEBUG]",
+    logging.INFO: Fore.CYAN + "[INFO]",
+    SUCCESS: Fore.GREEN + "[SUCCESS]",
+    logging.WARNING: Fore.YELLOW + "[WARN]",
+    logging.ERROR: Fore.RED + "[ERROR]",
+    logging.CRITICAL: Fore.MAGENTA + "[CRITICAL]",
+}
+
+_listener = None
+_handler = None
+RELOAD_KEEP = ("_listener", "_handler")
+
+
+class TerminalFormatter(logging.Formatter):
+    """The bot's original console look, plus the short logger name for anything that isn't the bot itself."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        stamp = datetime.fromtimestamp(record.created).strftime("%H:%M:%S")
+        tag = LEVEL_TAGS.get(record.levelno, Fore.WHITE + "[LOG]")
+        name = "" if record.name in ("root", "nari") else f"{Fore.BLUE}{record.name.rsplit('.', 1)[-1]}: "
+        text = f"{Fore.BLACK}[{stamp}]{Style.RESET_ALL} {tag} {name}{Fore.WHITE}{record.getMessage()}{Style.RESET_ALL}"
+        if record.exc_text:
+            text += f"\n{Fore.WHITE}{record.exc_text}"
+        return text
+
+
+class JsonLinesFormatter(logging.Formatter):
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "msg": record.getMessage(),
+            "thread": record.threadName,
+        }
+        if record.exc_text:
+            entry["exc"] = record.exc_text
+        suppressed = getattr(record, "suppressed", 0)
+        if suppressed:
+            entry["suppressed"] = suppressed
+        return json.dumps(entry, ensure_ascii=False)
+
+
+class DebugSampler(logging.Filter):
+    """Let through at most `burst` records per call site per `window`; the next one carries the skipped count."""
+
+    def __init__(self, burst: int = DEBUG_BURST, window: float = DEBUG_WINDOW, below: int = logging.INFO):
+        super().__init__()
+        self.burst = burst
+        self.window = window
+        self.below = below
+        self.sites = {}  # (logger, pathname, lineno) -> [window start, passed, suppressed]
+        self.suppressed = 0
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= self.below:
+            return True
+        key = (record.name, record.pathname, record.lineno)
+        now = time.monotonic()
+        site = self.sites.get(key)
+        if site is None or now - site[0] >= self.window:
+            skipped = site[2] if site else 0
+            site = self.sites[key] = [now, 0, 0]
+            if skipped:
+                record.suppressed = skipped
+                record.msg = f"{record.msg} (+{skipped} similar suppressed)"
+        if site[1] >= self.burst:
+            site[2] += 1
+            self.suppressed += 1
+            return False
+        site[1] += 1
+        return True
+
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Resolve the message and traceback here, where the arguments are still valid
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+            record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+
+def _levels(spec: str) -> dict:
+    levels = {}
+    for item in filter(None, (part.strip() for part in spec.split(","))):
+        name, _, level = item.partition("=")
+        levels[name.strip()] = level.strip().upper()
+    return levels
+
+
+def setup_logging(level: str = None, json_path: str = None) -> logging.handlers.QueueListener:
+    """Route all logging through the queue; safe to call more than once."""
+    global _listener, _handler
+    if _listener is not None:
+        return _listener
+
+    terminal = logging.StreamHandler(sys.__stdout__)
+    terminal.setFormatter(TerminalFormatter())
+    sinks = [terminal]
+
+    json_path = json_path if json_path is not None else os.getenv("LOG_JSON", "")
+    if json_path:
+        os.makedirs(os.path.dirname(json_path) or ".", exist_ok=True)
+        rotating = logging.handlers.RotatingFileHandler(
+            json_path, encoding="utf-8",
+            maxBytes=int(os.getenv("LOG_JSON_MAX_BYTES", str(10 * 2 ** 20))),
+            backupCount=int(os.getenv("LOG_JSON_BACKUPS", "5")),
+        )
+        rotating.setFormatter(JsonLinesFormatter())
+        sinks.append(rotating)
+
+    _handler = NonBlockingQueueHandler(queue.Queue(QUEUE_SIZE))
+    _handler.addFilter(DebugSampler(
+        burst=int(os.getenv("LOG_DEBUG_BURST", str(DEBUG_BURST))),
+        window=float(os.getenv("LOG_DEBUG_WINDOW", str(DEBUG_WINDOW))),
+    ))
+
+    root = logging.getLogger()
+    for handler in list(root.handlers):
+        root.removeHandler(handler)
+    root.addHandler(_handler)
+    root.setLevel((level or os.getenv("LOG_LEVEL", "INFO")).upper())
+    for name, logger_level in _levels(os.getenv("LOG_LEVELS", "")).items():
+        logging.getLogger(name).setLevel(logger_level)
+
+    _listener = logging.handlers.QueueListener(_handler.queue, *sinks, respect_handler_level=True)
+    _listener.start()
+    atexit.register(stop_logging)
+    return _listener
+
+
+def stop_logging():
+    """Drain the queue and stop the listener thread."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+def stats() -> dict:
+    if _handler is None:
+        return {"queued": 0, "dropped": 0, "suppressed": 0}
+    sampler = next((f for f in _handler.filters if isinstance(f, DebugSampler)), None)
+    return {
+        "queued": _handler.queue.qsize(),
+        "dropped": _handler.dropped,
+        "suppressed": sampler.suppressed if sampler else 0,
+    }
@@ -0,0 +1,116 @@
+import asyncio
+import logging
+import os
+import sys
+import threading
+import time
+from collections import Counter, deque
+
+log = logging.getLogger(__name__)
+
+# === Event loop stall detector ===
+# A heartbeat task stamps the time every INTERVAL seconds. A daemon thread
+# checks the stamp; once it is older than THRESHOLD the loop is stuck, and the
+# thread samples the loop thread's stack until the heartbeat comes back. Each
+# sample is attributed to the innermost frame inside this repo (the code that
+# made the blocking call) and the innermost frame overall (what it called).
+
+INTERVAL = 0.05
+THRESHOLD = 0.25
+RECENT_STALLS = 20
+PROJECT_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__))) + os.sep
+
+
+def _where(frame) -> str:
+    path = frame.f_code.co_filename
+    if path.startswith(PROJECT_ROOT):
+        path = path[len(PROJECT_ROOT):]
+    else:
+        path = os.path.basename(path)
+    return f"{path}:{frame.f_code.co_name}:{frame.f_lineno}"
+
+
+def attribute(frame):
+    """(repo caller, innermost frame) for a stack, innermost first."""
+    leaf = _where(frame)
+    while frame is not None:
+        path = frame.f_code.co_filename
+        if path.startswith(PROJECT_ROOT) and os.sep + "site-packages" + os.sep not in path:
+            return _where(frame), leaf
+        frame = frame.f_back
+    return "?", leaf
+
+
+class LoopWatchdog:
+    def __init__(self, threshold: float = THRESHOLD, interval: float = INTERVAL):
+        self.threshold = threshold
+        self.interval = interval
+        self.stalls = 0
+        self.stalled_seconds = 0.0
+        self.longest = 0.0
+        self.culprits = Counter()      # repo caller -> stalls
+        self.recent = deque(maxlen=RECENT_STALLS)
+        self._beat = time.perf_counter()
+        self._loop_thread = None
+        self._heartbeat = None
+        self._stop = threading.Event()
+        self._thread = None
+
+    # === Lifecycle ===
+    def start(self):
+        """Call from inside the running loop."""
+        if self._thread is not None:
+            return
+        self._loop_thread = threading.get_ident()
+        self._beat = time.perf_counter()
+        self._heartbeat = asyncio.get_running_loop().create_task(self._beat_loop())
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._watch, name="loop-watchdog", daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        if self._heartbeat is not None:
+            self._heartbeat.cancel()
+            self._heartbeat = None
+        self._thread = None
+
+    async def _beat_loop(self):
+        while True:
+            self._beat = time.perf_counter()
+            await asyncio.sleep(self.interval)
+
+    # === Watchdog thread ===
+    def _watch(self):
+        samples = Counter()
+        stalled_since = None
+        while not self._stop.wait(self.interval):
+            lag = time.perf_counter() - self._beat
+            if lag > self.threshold:
+                if stalled_since is None:
+                    stalled_since = self._beat
+                frame = sys._current_frames().get(self._loop_thread)
+                if frame is not None:
+                    samples[attribute(frame)] += 1
+            elif stalled_since is not None:
+                self._record(self._beat - stalled_since - self.interval, samples)
+                samples = Counter()
+                stalled_since = None
+
+    def _record(self, duration: float, samples: Counter):
+        caller, leaf = samples.most_common(1)[0][0] if samples else ("?", "?")
+        self.stalls += 1
+        self.stalled_seconds += duration
+        self.longest = max(self.longest, duration)
+        self.culprits[caller] += 1
+        self.recent.append((time.time(), duration, caller, leaf))
+        log.warning("Event loop blocked for %.0fms in %s (→ %s)", duration * 1000, caller, leaf)
+
+    def summary(self) -> str:
+        if not self.stalls:
+            return "0 stalls"
+        return f"{self.stalls} stalls · longest {self.longest * 1000:.0f}ms"
+
+
+watchdog = LoopWatchdog()
+RELOAD_KEEP = ("watchdog",)
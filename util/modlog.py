@@ -0,0 +1,158 @@
+import asyncio
+import logging
+import time
+from collections import deque
+import discord
+from util.database import get_db
+from util.instrumentation import Histogram, QUANTILES
+
+log = logging.getLogger(__name__)
+
+# === Batched mod-log dispatcher ===
+# Mod-log embeds are queued per channel instead of being sent inline. Each
+# channel has one flush task: it lingers briefly so a burst of actions can
+# pile up, then packs up to 10 embeds (within Discord's 6000 character total)
+# into a single message. Guilds that set a log webhook are posted through it,
+# which keeps mod-log traffic off the bot's per-channel rate limit bucket;
+# if the webhook is deleted the dispatcher falls back to the channel.
+
+LINGER = 1.0                 # seconds to wait for more embeds before sending
+EMBEDS_PER_MESSAGE = 10      # Discord's cap per message
+EMBED_CHARS_PER_MESSAGE = 6000
+MAX_PENDING = 500            # per channel; beyond this new embeds are dropped (and counted)
+
+
+class ModLogDispatcher:
+    def __init__(self, bot, linger: float = LINGER, db=None):
+        self.bot = bot
+        self.linger = linger
+        self.db = db or get_db()
+        self.queues = {}    # channel_id -> deque of (enqueued_at, embed)
+        self._full = {}     # channel_id -> Event set once a full message is waiting
+        self._tasks = {}    # channel_id -> flush task
+        self._closing = False
+        self.flush_latency = Histogram()
+        self.stats = {
+            "submitted": 0, "dropped": 0, "embeds": 0, "messages": 0,
+            "webhook_messages": 0, "errors": 0, "max_depth": 0,
+        }
+
+    def depth(self) -> int:
+        return sum(len(queue) for queue in self.queues.values())
+
+    # === Intake ===
+    def submit(self, guild: discord.Guild, embed: discord.Embed) -> bool:
+        """Queue `embed` for the guild's mod-log channel; False if there's none or the queue is full."""
+        channel_id = self.db.get_log_channel(guild.id)
+        if not channel_id:
+            return False
+        queue = self.queues.setdefault(channel_id, deque())
+        if len(queue) >= MAX_PENDING:
+            self.stats["dropped"] += 1
+            return False
+        queue.append((time.perf_counter(), embed))
+        self.stats["submitted"] += 1
+        self.stats["max_depth"] = max(self.stats["max_depth"], self.depth())
+
+        full = self._full.setdefault(channel_id, asyncio.Event())
+        if len(queue) >= EMBEDS_PER_MESSAGE:
+            full.set()
+        task = self._tasks.get(channel_id)
+        if task is None or task.done():
+            self._tasks[channel_id] = asyncio.create_task(self._drain(guild.id, channel_id))
+        return True
+
+    # === Flushing ===
+    async def _drain(self, guild_id: int, channel_id: int):
+        queue = self.queues[channel_id]
+        full = self._full[channel_id]
+        try:
+            while queue:
+                if len(queue) < EMBEDS_PER_MESSAGE and not self._closing:
+                    try:
+                        await asyncio.wait_for(full.wait(), timeout=self.linger)
+                    except asyncio.TimeoutError:
+                        pass
+                full.clear()
+                batch = self._take(queue)
+                try:
+                    await self._send(guild_id, channel_id, [embed for _, embed in batch])
+                except Exception as e:
+                    self.stats["errors"] += 1
+                    log.warning("Could not post %d embed(s) to %s: %s", len(batch), channel_id, e)
+                else:
+                    self.flush_latency.record(time.perf_counter() - batch[0][0])
+                if len(queue) >= EMBEDS_PER_MESSAGE:
+                    full.set()
+        finally:
+            if not queue:
+                self.queues.pop(channel_id, None)
+                self._full.pop(channel_id, None)
+            self._tasks.pop(channel_id, None)
+
+    @staticmethod
+    def _take(queue: deque) -> list:
+        batch, chars = [], 0
+        while queue and len(batch) < EMBEDS_PER_MESSAGE:
+            size = len(queue[0][1])
+            if batch and chars + size > EMBED_CHARS_PER_MESSAGE:
+                break
+            batch.append(queue.popleft())
+            chars += size
+        return batch
+
+    async def _send(self, guild_id: int, channel_id: int, embeds: list):
+        webhook_url = self.db.get_log_webhook(guild_id)
+        if webhook_url:
+            try:
+                await discord.Webhook.from_url(webhook_url, client=self.bot).send(embeds=embeds)
+                self._sent(embeds, webhook=True)
+                return
+            except (discord.NotFound, ValueError) as e:
+                # Deleted in Discord or not a webhook URL; use the channel from now on
+                self.db.set_log_webhook(guild_id, None)
+                log.warning("Dropped the mod-log webhook for guild %s: %s", guild_id, e)
+            except Exception as e:
+                log.warning("Mod-log webhook for guild %s failed, posting as the bot: %s", guild_id, e)
+
+        channel = self.bot.get_channel(channel_id)
+        if channel is None or not channel.permissions_for(channel.guild.me).send_messages:
+            self.stats["dropped"] += len(embeds)
+            return
+        await channel.send(embeds=embeds)
+        self._sent(embeds)
+
+    def _sent(self, embeds: list, webhook: bool = False):
+        self.stats["embeds"] += len(embeds)
+        self.stats["messages"] += 1
+        if webhook:
+            self.stats["webhook_messages"] += 1
+
+    async def flush(self):
+        """Send everything queued right away, e.g. before a restart."""
+        self._closing = True
+        for event in self._full.values():
+            event.set()
+        await asyncio.gather(*list(self._tasks.values()), return_exceptions=True)
+        self._closing = False
+
+    # === Export ===
+    def prometheus(self) -> str:
+        hist = self.flush_latency
+        lines = ["# TYPE nari_modlog_flush_seconds summary"]
+        for q in QUANTILES:
+            lines.append(f'nari_modlog_flush_seconds{{quantile="{q}"}} {hist.percentile(q):.6f}')
+        lines.append(f"nari_modlog_flush_seconds_sum {hist.sum_seconds:.6f}")
+        lines.append(f"nari_modlog_flush_seconds_count {hist.count}")
+        lines.append(f"nari_modlog_queue_depth {self.depth()}")
+        for key, value in self.stats.items():
+            suffix = "" if key == "max_depth" else "_total"
+            lines.append(f"nari_modlog_{key}{suffix} {value}")
+        return "\n".join(lines) + "\n"
+
+
+def get_modlog(bot) -> ModLogDispatcher:
+    dispatcher = getattr(bot, "modlog", None)
+    if dispatcher is None:
+        dispatcher = bot.modlog = ModLogDispatcher(bot)
+    return dispatcher
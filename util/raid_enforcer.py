@@ -0,0 +1,165 @@
+import asyncio
+import logging
+import time
+import discord
+from datetime import timedelta
+from util.fanout import fan_out
+
+log = logging.getLogger(__name__)
+
+# === Raid-mode enforcement pipeline ===
+# on_message only enqueues. A single worker drains the queue in batches:
+# deletions are grouped per channel into bulk deletes, every offender is timed
+# out once, and DMs are dropped while the queue is under pressure.
+
+BATCH_WINDOW = 0.5          # seconds to gather messages into one batch
+MAX_BATCH = 500
+MAX_QUEUE = 10000           # beyond this, new messages are dropped (and counted)
+DM_PRESSURE = 100           # skip DMs while this many messages are still waiting
+TIMEOUT_DURATION = timedelta(hours=1)
+BULK_DELETE_LIMIT = 100     # Discord's cap per bulk delete call
+CONCURRENCY = 8
+
+
+class RaidEnforcer:
+    def __init__(self, is_active=None):
+        self.queue = asyncio.Queue(maxsize=MAX_QUEUE)
+        self.is_active = is_active  # guild_id -> bool; batches skip guilds no longer in lockdown
+        self.timed_out = {}  # (guild_id, user_id) -> monotonic expiry
+        self.metrics = {
+            "enqueued": 0, "dropped": 0, "batches": 0, "deleted": 0, "bulk_calls": 0,
+            "timeouts": 0, "deduped": 0, "dm_sent": 0, "dm_skipped": 0, "errors": 0,
+            "max_depth": 0, "last_batch_size": 0, "last_batch_seconds": 0.0,
+        }
+        self._task = None
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    # === Intake ===
+    def submit(self, message: discord.Message) -> bool:
+        try:
+            self.queue.put_nowait((time.perf_counter(), message))
+        except asyncio.QueueFull:
+            self.metrics["dropped"] += 1
+            return False
+        self.metrics["enqueued"] += 1
+        self.metrics["max_depth"] = max(self.metrics["max_depth"], self.queue.qsize())
+        self.start()
+        return True
+
+    def forget_guild(self, guild_id: int):
+        """Drop queued messages and timeout bookkeeping once a guild's lockdown is lifted."""
+        for key in [k for k in self.timed_out if k[0] == guild_id]:
+            del self.timed_out[key]
+        kept = []
+        while not self.queue.empty():
+            item = self.queue.get_nowait()
+            if item[1].guild.id != guild_id:
+                kept.append(item)
+        for item in kept:
+            self.queue.put_nowait(item)
+
+    # === Worker ===
+    async def _run(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            batch = [await self.queue.get()]
+            deadline = loop.time() + BATCH_WINDOW
+            while len(batch) < MAX_BATCH:
+                remaining = deadline - loop.time()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(self.queue.get(), timeout=remaining))
+                except asyncio.TimeoutError:
+                    break
+            try:
+                await self._process(batch)
+            except Exception as e:
+                self.metrics["errors"] += 1
+                log.exception("Enforcement batch failed: %s", e)
+
+    async def _process(self, batch: list):
+        oldest = batch[0][0]
+        if self.is_active is not None:
+            # Messages gathered before an unlock belong to a lockdown that is over
+            batch = [item for item in batch if self.is_active(item[1].guild.id)]
+            if not batch:
+                return
+        by_channel = {}
+        offenders = {}
+        for _, message in batch:
+            by_channel.setdefault(message.channel, []).append(message)
+            offenders.setdefault((message.guild.id, message.author.id), message)
+
+        buckets = {}
+        for channel, messages in by_channel.items():
+            buckets[("channel", channel.id)] = [
+                lambda c=channel, chunk=messages[i:i + BULK_DELETE_LIMIT]: self._delete(c, chunk)
+                for i in range(0, len(messages), BULK_DELETE_LIMIT)
+            ]
+
+        now = time.monotonic()
+        if len(self.timed_out) > MAX_QUEUE:
+            self.timed_out = {k: until for k, until in self.timed_out.items() if until > now}
+        timed_out = []
+        for key, message in offenders.items():
+            if self.timed_out.get(key, 0) > now:
+                self.metrics["deduped"] += 1
+                continue
+            self.timed_out[key] = now + TIMEOUT_DURATION.total_seconds()
+            # Member edits share one bucket per guild
+            calls = buckets.setdefault(("members", key[0]), [])
+            calls.append(lambda m=message: self._timeout(m, timed_out))
+
+        result = await fan_out(buckets, concurrency=CONCURRENCY)
+        self.metrics["errors"] += len(result.failed)
+
+        # DMs are the first thing to go when the queue backs up
+        if self.queue.qsize() < DM_PRESSURE:
+            dms = {("dm", m.author.id): [lambda m=m: self._dm(m)] for m in timed_out}
+            await fan_out(dms, concurrency=CONCURRENCY)
+        else:
+            self.metrics["dm_skipped"] += len(timed_out)
+        self.metrics["batches"] += 1
+        self.metrics["last_batch_size"] = len(batch)
+        self.metrics["last_batch_seconds"] = round(time.perf_counter() - oldest, 3)
+
+    async def _delete(self, channel, messages: list):
+        try:
+            await channel.delete_messages(messages, reason="Anti-Raid lockdown")
+        except discord.NotFound:
+            pass
+        self.metrics["deleted"] += len(messages)
+        self.metrics["bulk_calls"] += 1
+
+    async def _timeout(self, message: discord.Message, timed_out: list):
+        try:
+            await message.author.timeout(TIMEOUT_DURATION, reason="Spoke during Anti-Raid lockdown.")
+        except (discord.Forbidden, discord.NotFound):
+            return
+        self.metrics["timeouts"] += 1
+        timed_out.append(message)
+
+    async def _dm(self, message: discord.Message):
+        dm_embed = discord.Embed(
+            title="🚨 Lockdown Violation",
+            description=f"You attempted to send a message in **{message.guild.name}** while the server was under lockdown.\n"
+                        "You have been **timed out for 1 hour**.",
+            color=discord.Color.red()
+        )
+        try:
+            await message.author.send(embed=dm_embed, delete_after=30)
+            self.metrics["dm_sent"] += 1
+        except discord.HTTPException:
+            self.metrics["dm_skipped"] += 1
+
+    def stats(self) -> dict:
+        return dict(self.metrics, depth=self.queue.qsize())
@@ -0,0 +1,201 @@
+import ast
+import hashlib
+import importlib
+import logging
+import os
+import sys
+import time
+from dataclasses import dataclass, field
+
+log = logging.getLogger(__name__)
+
+# === Dependency-aware hot reload ===
+# Every cogs/*.py and util/*.py file is hashed. On reload only the files whose
+# hash changed are considered: changed util modules (and util modules that
+# import them) are re-imported in dependency order, then every extension that
+# imports any of them - directly or through another util module - is reloaded
+# along with the extensions that changed themselves.
+#
+# Cogs can hand state to their replacement: `export_state()` is called on the
+# old instance before unloading and the result is passed to `import_state()`
+# on the new instance of the same class. Util modules list process-wide
+# globals in RELOAD_KEEP; those objects survive a re-import untouched.
+
+PACKAGES = ("cogs", "util")
+
+
+def file_hash(path: str) -> str:
+    with open(path, "rb") as f:
+        return hashlib.sha1(f.read()).hexdigest()
+
+
+def module_imports(path: str, packages=PACKAGES) -> set:
+    """Names of in-repo modules imported by the file at `path`."""
+    with open(path, "rb") as f:
+        tree = ast.parse(f.read(), filename=path)
+    found = set()
+    for node in ast.walk(tree):
+        if isinstance(node, ast.Import):
+            names = [alias.name for alias in node.names]
+        elif isinstance(node, ast.ImportFrom) and node.module and not node.level:
+            names = [node.module] + [f"{node.module}.{alias.name}" for alias in node.names]
+        else:
+            continue
+        for name in names:
+            if name.split(".")[0] in packages and name.count(".") == 1:
+                found.add(name)
+    return found
+
+
+@dataclass
+class ReloadReport:
+    changed: list = field(default_factory=list)
+    modules: list = field(default_factory=list)
+    reloaded: list = field(default_factory=list)
+    loaded: list = field(default_factory=list)
+    failed: list = field(default_factory=list)
+    handed_off: list = field(default_factory=list)
+    elapsed: float = 0.0
+
+
+class ReloadManager:
+    def __init__(self, bot, packages=PACKAGES):
+        self.bot = bot
+        self.packages = packages
+        self.hashes = self.snapshot()
+
+    # === Source tracking ===
+    def sources(self) -> dict:
+        found = {}
+        for package in self.packages:
+            if not os.path.isdir(package):
+                continue
+            for filename in os.listdir(package):
+                if filename.endswith(".py") and filename != "__init__.py":
+                    found[f"{package}.{filename[:-3]}"] = os.path.join(package, filename)
+        return found
+
+    def snapshot(self) -> dict:
+        return {name: file_hash(path) for name, path in self.sources().items()}
+
+    def dependency_graph(self) -> dict:
+        """module -> set of in-repo modules it imports."""
+        graph = {}
+        for name, path in self.sources().items():
+            try:
+                graph[name] = module_imports(path, self.packages)
+            except SyntaxError:
+                graph[name] = set()
+        return graph
+
+    def affected(self, changed: set, graph: dict) -> set:
+        """`changed` plus everything that imports any of it, transitively."""
+        dependents = {}
+        for name, imports in graph.items():
+            for dep in imports:
+                dependents.setdefault(dep, set()).add(name)
+        result, stack = set(changed), list(changed)
+        while stack:
+            for parent in dependents.get(stack.pop(), ()):
+                if parent not in result:
+                    result.add(parent)
+                    stack.append(parent)
+        return result
+
+    @staticmethod
+    def import_order(modules: set, graph: dict) -> list:
+        ordered, seen = [], set()
+
+        def visit(name):
+            if name in seen:
+                return
+            seen.add(name)
+            for dep in sorted(graph.get(name, ())):
+                if dep in modules:
+                    visit(dep)
+            ordered.append(name)
+
+        for name in sorted(modules):
+            visit(name)
+        return ordered
+
+    # === Reloading ===
+    def _reimport(self, name: str):
+        module = sys.modules.get(name)
+        if module is None:
+            importlib.import_module(name)
+            return
+        kept = {attr: getattr(module, attr) for attr in getattr(module, "RELOAD_KEEP", ()) if hasattr(module, attr)}
+        importlib.reload(module)
+        for attr, value in kept.items():
+            setattr(module, attr, value)
+
+    def _cogs_of(self, extension: str) -> list:
+        return [cog for cog in self.bot.cogs.values() if type(cog).__module__ == extension]
+
+    async def _reload_extension(self, extension: str, report: ReloadReport):
+        states = {}
+        for cog in self._cogs_of(extension):
+            if hasattr(cog, "export_state"):
+                try:
+                    states[type(cog).__name__] = cog.export_state()
+                except Exception as e:
+                    log.warning("Could not export state from %s: %s", type(cog).__name__, e)
+
+        await self.bot.reload_extension(extension)
+        report.reloaded.append(extension)
+
+        for cog in self._cogs_of(extension):
+            state = states.get(type(cog).__name__)
+            if state is not None and hasattr(cog, "import_state"):
+                cog.import_state(state)
+                report.handed_off.append(type(cog).__name__)
+
+    async def reload(self, everything: bool = False) -> ReloadReport:
+        started = time.perf_counter()
+        report = ReloadReport()
+        current = self.snapshot()
+        graph = self.dependency_graph()
+
+        if everything:
+            changed = set(current)
+        else:
+            changed = {name for name, digest in current.items() if self.hashes.get(name) != digest}
+        report.changed = sorted(changed)
+        affected = self.affected(changed, graph)
+
+        # Util modules first, dependencies before dependents
+        util_modules = {name for name in affected if not name.startswith("cogs.")}
+        for name in self.import_order(util_modules, graph):
+            try:
+                self._reimport(name)
+                report.modules.append(name)
+            except Exception as e:
+                report.failed.append((name, str(e)))
+                current.pop(name, None)
+
+        for extension in sorted(name for name in affected if name.startswith("cogs.")):
+            try:
+                if extension in self.bot.extensions:
+                    await self._reload_extension(extension, report)
+                elif extension in changed:
+                    await self.bot.load_extension(extension)
+                    report.loaded.append(extension)
+            except Exception as e:
+                report.failed.append((extension, str(e)))
+                current.pop(extension, None)  # retry on the next reload
+
+        # Keep the old hash for anything that failed so it's picked up again
+        for name, _ in report.failed:
+            if name in self.hashes:
+                current[name] = self.hashes[name]
+        self.hashes = current
+        report.elapsed = time.perf_counter() - started
+        return report
+
+
+def get_reloader(bot) -> ReloadManager:
+    manager = getattr(bot, "reloader", None)
+    if manager is None:
+        manager = bot.reloader = ReloadManager(bot)
+    return manager
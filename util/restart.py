@@ -0,0 +1,60 @@
+import asyncio
+import logging
+import os
+import sys
+import time
+import discord
+from util.instrumentation import metrics
+from util.json_store import flush_all
+from util.logs import stop_logging
+from util.loop_watchdog import watchdog
+
+log = logging.getLogger(__name__)
+
+# === Graceful restart ===
+# New slash commands are turned away, in-flight ones get DRAIN_TIMEOUT to
+# finish, queued mod-log embeds and every write-behind store are flushed,
+# and only then is the process replaced with a fresh interpreter.
+
+DRAIN_TIMEOUT = 15.0
+
+
+def refuse_new_interactions(bot):
+    original_check = bot.tree.interaction_check
+
+    async def interaction_check(interaction: discord.Interaction) -> bool:
+        if interaction.type is discord.InteractionType.application_command:
+            try:
+                await interaction.response.send_message("🔁 Nari is restarting, try again in a few seconds.", ephemeral=True)
+            except discord.HTTPException:
+                pass
+            return False
+        return await original_check(interaction)
+
+    bot.tree.interaction_check = interaction_check
+
+
+async def drain(keep=(), timeout: float = DRAIN_TIMEOUT) -> int:
+    """Wait for tracked interactions (other than `keep`) to finish; returns how many were left."""
+    deadline = time.monotonic() + timeout
+    while True:
+        left = metrics.in_flight(exclude=keep)
+        if not left or time.monotonic() >= deadline:
+            return left
+        await asyncio.sleep(0.25)
+
+
+async def graceful_restart(bot, keep=()):
+    bot.draining = True
+    refuse_new_interactions(bot)
+    left = await drain(keep)
+    if left:
+        log.warning("%d interaction(s) still running after %.0fs, restarting anyway.", left, DRAIN_TIMEOUT)
+    watchdog.stop()
+    modlog = getattr(bot, "modlog", None)
+    if modlog is not None:
+        await modlog.flush()
+    await flush_all()
+    log.info("Pending data flushed, restarting.")
+    stop_logging()  # exec skips atexit; drain the log queue first
+    os.execv(sys.executable, [sys.executable] + sys.argv)
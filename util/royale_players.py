@@ -0,0 +1,111 @@
+from util.database import get_db, ROYALE_SORT_KEYS
+
+# === Royale player repository ===
+# The single owner of the royale_players table. Both the knockout and the
+# stats cogs reach it through get_player_repo(bot), so there is one XP curve
+# and one write path. Every change is a read-modify-write inside one SQLite
+# transaction, so clusters updating the same player never lose each other's
+# kills or XP, and the leaderboards read the indexed table directly.
+
+MAX_LEVEL = 15
+SORT_KEYS = ROYALE_SORT_KEYS
+
+DEFAULT_PLAYER = {
+    "kills": 0,
+    "deaths": 0,
+    "revives": 0,
+    "failed_revives": 0,
+    "xp": 0,
+    "level": 1,
+    "prestige": 0
+}
+
+
+def xp_needed(level: int) -> int:
+    return 60 + (level * 12)
+
+
+class PlayerRepository:
+    def __init__(self, db):
+        self.db = db
+        self._backfilled = set()  # guilds whose cached members were already adopted
+
+    def get(self, user_id) -> dict:
+        return self.db.get_royale_player(user_id) or dict(DEFAULT_PLAYER)
+
+    def _update(self, user_id, change, guild_id=None) -> dict:
+        return self.db.update_royale_player(user_id, change, guild_id)
+
+    # === Leaderboards ===
+    def _adopt_members(self, guild):
+        """Players from before guild membership was recorded: adopt the cached members that have stats, once."""
+        if guild.id not in self._backfilled:
+            self._backfilled.add(guild.id)
+            self.db.join_royale_guild(guild.id, (member.id for member in guild.members))
+
+    def top(self, sort_by: str, n: int = 10, guild=None) -> list:
+        """(user_id, stats) for the best `n` players, across every cluster or within `guild`."""
+        if guild is not None:
+            self._adopt_members(guild)
+        return self.db.royale_top(sort_by, n, guild.id if guild is not None else None)
+
+    def rank(self, sort_by: str, user_id, guild=None):
+        """(1-based rank or None, number of ranked players) in the same order as top()."""
+        return self.db.royale_rank(sort_by, user_id, guild.id if guild is not None else None)
+
+    # === Mutations ===
+    def add_xp(self, user_id, amount: int, guild_id=None) -> bool:
+        """Add XP and roll over levels; returns True if the player leveled up."""
+        leveled_up = False
+
+        def change(player):
+            nonlocal leveled_up
+            player["xp"] += amount
+            while player["level"] < MAX_LEVEL and player["xp"] >= xp_needed(player["level"]):
+                player["xp"] -= xp_needed(player["level"])
+                player["level"] += 1
+                leveled_up = True
+
+        self._update(user_id, change, guild_id)
+        return leveled_up
+
+    def add_kill(self, user_id, guild_id=None):
+        self._update(user_id, _increment("kills"), guild_id)
+
+    def add_death(self, user_id, guild_id=None):
+        self._update(user_id, _increment("deaths"), guild_id)
+
+    def add_revive(self, user_id, success: bool, xp_gain: int = 0, guild_id=None):
+        if not success:
+            self._update(user_id, _increment("failed_revives"), guild_id)
+            return 0, False
+        self._update(user_id, _increment("revives"), guild_id)
+        return xp_gain, self.add_xp(user_id, xp_gain, guild_id)
+
+    def prestige(self, user_id, guild_id=None) -> bool:
+        """Reset a max-level player to level 1 and bump their prestige."""
+        prestiged = False
+
+        def change(player):
+            nonlocal prestiged
+            prestiged = player["level"] >= MAX_LEVEL
+            if prestiged:
+                player["prestige"] += 1
+                player["level"] = 1
+                player["xp"] = 0
+
+        self._update(user_id, change, guild_id)
+        return prestiged
+
+
+def _increment(key: str):
+    def change(player):
+        player[key] += 1
+    return change
+
+
+def get_player_repo(bot) -> PlayerRepository:
+    """Return the repository attached to the bot, creating it on first use."""
+    if not hasattr(bot, "royale_players"):
+        bot.royale_players = PlayerRepository(get_db())
+    return bot.royale_players
@@ -0,0 +1,154 @@
+import random
+import time
+from collections import OrderedDict
+
+# === Random target selection ===
+# Each guild keeps its eligible member ids in a list plus an id -> index map,
+# so picks are O(1) and removals are swap-with-last. The pool is built from
+# the member cache the first time a guild is sampled and kept current by the
+# member listeners in the Royale cog. Timed-out members stay in the pool and
+# are skipped at pick time: Discord sends no member update when a timeout
+# runs out, so dropping them would shrink the pool for good. Recent channel
+# activity is tracked separately (bounded per channel) for the "active here"
+# filter.
+
+ACTIVITY_WINDOW = 600       # seconds a message counts as "recently active"
+ACTIVITY_PER_CHANNEL = 500  # most recent authors remembered per channel
+MAX_TRIES = 16
+
+
+def is_indexed(member) -> bool:
+    return not member.bot
+
+
+def is_eligible(member) -> bool:
+    return is_indexed(member) and not member.is_timed_out()
+
+
+class _Pool:
+    __slots__ = ("ids", "pos")
+
+    def __init__(self):
+        self.ids = []
+        self.pos = {}
+
+    def add(self, member_id: int):
+        if member_id not in self.pos:
+            self.pos[member_id] = len(self.ids)
+            self.ids.append(member_id)
+
+    def discard(self, member_id: int):
+        index = self.pos.pop(member_id, None)
+        if index is None:
+            return
+        last = self.ids.pop()
+        if index < len(self.ids):
+            self.ids[index] = last
+            self.pos[last] = index
+
+
+class TargetSampler:
+    def __init__(self, rng: random.Random = None):
+        self.rng = rng or random.Random()
+        self._pools = {}
+        self._activity = {}  # channel_id -> OrderedDict(user_id -> last seen)
+
+    # === Membership ===
+    def _pool(self, guild) -> _Pool:
+        pool = self._pools.get(guild.id)
+        if pool is None:
+            pool = self._pools[guild.id] = _Pool()
+            for member in guild.members:
+                if is_indexed(member):
+                    pool.add(member.id)
+        return pool
+
+    def update(self, member):
+        """Add or drop `member` from the guild's pool; no-op for guilds not sampled yet."""
+        pool = self._pools.get(member.guild.id)
+        if pool is None:
+            return
+        if is_indexed(member):
+            pool.add(member.id)
+        else:
+            pool.discard(member.id)
+
+    def remove(self, member):
+        pool = self._pools.get(member.guild.id)
+        if pool is not None:
+            pool.discard(member.id)
+
+    def forget_guild(self, guild_id: int):
+        self._pools.pop(guild_id, None)
+
+    # === Activity ===
+    def record_activity(self, message):
+        if message.author.bot or message.guild is None:
+            return
+        seen = self._activity.setdefault(message.channel.id, OrderedDict())
+        seen[message.author.id] = time.monotonic()
+        seen.move_to_end(message.author.id)
+        if len(seen) > ACTIVITY_PER_CHANNEL:
+            seen.popitem(last=False)
+
+    def _recent(self, channel_id: int, window: float):
+        seen = self._activity.get(channel_id)
+        if not seen:
+            return
+        cutoff = time.monotonic() - window
+        # Newest first; stop at the first author older than the window
+        for user_id, last in reversed(seen.items()):
+            if last < cutoff:
+                break
+            yield user_id
+
+    # === Picking ===
+    def pick(self, guild, exclude=(), channel=None, window: float = ACTIVITY_WINDOW):
+        """
+        Random eligible member of `guild`, or None. With `channel`, only members who
+        spoke there within `window` seconds are considered.
+        """
+        if channel is not None:
+            return self._pick_recent(guild, exclude, channel.id, window)
+
+        pool = self._pool(guild)
+        for _ in range(min(MAX_TRIES, len(pool.ids))):
+            member = self._candidate(guild, pool, pool.ids[self.rng.randrange(len(pool.ids))], exclude)
+            if member is not None:
+                return member
+            if not pool.ids:
+                return None
+        # Mostly excluded or timed out: walk the pool once from a random offset
+        ids = list(pool.ids)
+        start = self.rng.randrange(len(ids)) if ids else 0
+        for member_id in ids[start:] + ids[:start]:
+            member = self._candidate(guild, pool, member_id, exclude)
+            if member is not None:
+                return member
+        return None
+
+    @staticmethod
+    def _candidate(guild, pool: _Pool, member_id: int, exclude):
+        if member_id in exclude:
+            return None
+        member = guild.get_member(member_id)
+        if member is None or not is_indexed(member):
+            pool.discard(member_id)  # cache drifted; fix it up as we go
+            return None
+        if member.is_timed_out():
+            return None  # still indexed; eligible again once the timeout runs out
+        return member
+
+    def _pick_recent(self, guild, exclude, channel_id: int, window: float):
+        # Reservoir sample over the (bounded) recent authors of the channel
+        chosen, seen = None, 0
+        for user_id in self._recent(channel_id, window):
+            if user_id in exclude:
+                continue
+            member = guild.get_member(user_id)
+            if member is None or not is_eligible(member):
+                continue
+            seen += 1
+            if self.rng.randrange(seen) == 0:
+                chosen = member
+        return chosen